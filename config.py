@@ -1,5 +1,8 @@
 import os
-import alpaca_trade_api as tradeapi
+import time
+import random
+import threading
+import contextlib
 from dotenv import load_dotenv
 import pathlib
 
@@ -8,9 +11,12 @@ load_dotenv()
 
 # --- Paths ---
 BASE_DIR = pathlib.Path(__file__).parent.resolve()
-LOGS_DIR = BASE_DIR / "logs"
+LOGS_DIR = pathlib.Path(os.getenv("LOGS_DIR", BASE_DIR / "logs"))  # Overridable for sandboxed runs (bench_suite.py)
 PERFORMANCE_LOG = LOGS_DIR / "performance.csv"
 MACRO_CACHE_DIR = LOGS_DIR / "macro_cache"
+BARS_DIR = LOGS_DIR / "bars"
+EQUITY_DIR = LOGS_DIR / "equity"
+DATASTORE_DB = LOGS_DIR / "datastore.sqlite3"
 EXECUTION_LOGS_DIR = LOGS_DIR / "execution"
 EXPERIMENT_START_DATE = os.getenv("EXPERIMENT_START_DATE", "2026-01-05")
 
@@ -18,6 +24,16 @@ EXPERIMENT_START_DATE = os.getenv("EXPERIMENT_START_DATE", "2026-01-05")
 # The GitHub Pages URL for the interactive dashboard
 INTERACTIVE_URL = "https://seve1995.github.io/ai-portfolio-experiment/"
 
+# --- Alpaca rate budget ---
+# Alpaca allows 200 requests per minute per account. A bucket of BURST tokens refilled at
+# RATE_PER_MINUTE / 60 per second keeps any 60s window at or below BURST + RATE_PER_MINUTE.
+ALPACA_RATE_PER_MINUTE = int(os.getenv("ALPACA_RATE_PER_MINUTE", "190"))
+ALPACA_RATE_BURST = int(os.getenv("ALPACA_RATE_BURST", "10"))
+ALPACA_MAX_RETRIES = int(os.getenv("ALPACA_MAX_RETRIES", "4"))
+ALPACA_BACKOFF_BASE = 0.5  # Seconds; doubles on each retry (plus jitter)
+ALPACA_POOL_SIZE = 32      # Keep-alive connections per client
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
 # --- Models ---
 MODELS = {
     "1": {"name": "ChatGPT", "env_prefix": "CHATGPT"},
@@ -38,8 +54,18 @@ def select_model():
             return MODELS[choice]
         print("Invalid choice. Please enter a number between 1 and 4.")
 
-def get_alpaca_api(model_info):
-    """Returns an Alpaca REST API instance for the selected model."""
+def find_model(name):
+    """Looks up a model by name (case-insensitive) or menu number. Raises ValueError if unknown."""
+    if name in MODELS:
+        return MODELS[name]
+    for info in MODELS.values():
+        if info['name'].lower() == name.strip().lower():
+            return info
+    choices = ", ".join(info['name'] for info in MODELS.values())
+    raise ValueError(f"Unknown model '{name}'. Choose one of: {choices}")
+
+def get_alpaca_credentials(model_info):
+    """Returns (key, secret, base_url) for the selected model's paper account."""
     prefix = model_info['env_prefix']
     key = os.getenv(f"{prefix}_ALPACA_KEY")
     secret = os.getenv(f"{prefix}_ALPACA_SECRET")
@@ -55,4 +81,188 @@ def get_alpaca_api(model_info):
         print(f"⚠️  Note: Using default ALPACA_KEY for {model_info['name']}")
 
     base_url = "https://paper-api.alpaca.markets"
-    return tradeapi.REST(key, secret, base_url, api_version="v2")
+    return key, secret, base_url
+
+# One client per model, shared by every script and thread in the process. Models that fall
+# back to the same API key get their own client (and stats) but share the account's bucket.
+_clients = {}
+_buckets = {}
+_clients_lock = threading.Lock()
+
+def get_alpaca_api(model_info):
+    """
+    Returns the cached Alpaca client for the selected model.
+    Calls are rate limited per account (API key), idempotent reads are retried with backoff,
+    and per-endpoint latency/error counters are kept (see api_stats()).
+    """
+    key, secret, base_url = get_alpaca_credentials(model_info)
+    with _clients_lock:
+        client = _clients.get(model_info['name'])
+        if client is None:
+            bucket = _buckets.setdefault(key, TokenBucket())
+            client = AlpacaClient(lambda: _build_rest(key, secret, base_url), model_info['name'], bucket)
+            _clients[model_info['name']] = client
+        return client
+
+def _build_rest(key, secret, base_url):
+    # The SDK pulls in pandas and aiohttp (~0.6s), so it is only imported once a call is made
+    import alpaca_trade_api as tradeapi
+    from requests.adapters import HTTPAdapter
+
+    rest = tradeapi.REST(key, secret, base_url, api_version="v2")
+    # Retries are handled by AlpacaClient (with backoff), not the SDK's fixed 3s wait
+    rest._retry = 0
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=ALPACA_POOL_SIZE)
+    rest._session.mount("https://", adapter)
+    return rest
+
+def api_stats():
+    """Returns {account name: {endpoint: counters}} for every client created in this process."""
+    with _clients_lock:
+        clients = list(_clients.values())
+    return {client.name: client.stats() for client in clients}
+
+def print_api_stats():
+    for name, endpoints in api_stats().items():
+        calls = sum(e["calls"] for e in endpoints.values())
+        if not calls:
+            continue
+        print(f"   📊 {name}: {calls} API call(s)")
+        for endpoint, e in sorted(endpoints.items()):
+            avg_ms = 1000 * e["total_s"] / e["calls"]
+            print(
+                f"      {endpoint}: {e['calls']} call(s), avg {avg_ms:.0f}ms, max {1000 * e['max_s']:.0f}ms, "
+                f"{e['retries']} retr{'y' if e['retries'] == 1 else 'ies'}, {e['errors']} error(s)"
+            )
+
+
+class TokenBucket:
+    """Thread-safe token bucket. acquire() blocks until a token is available."""
+
+    def __init__(self, rate_per_minute=ALPACA_RATE_PER_MINUTE, burst=ALPACA_RATE_BURST):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _status_code(error):
+    """HTTP status of a failed Alpaca call, or None for connection-level errors."""
+    code = getattr(error, "status_code", None)
+    if code is None and getattr(error, "response", None) is not None:
+        code = error.response.status_code
+    return code
+
+def _is_retryable(endpoint, error):
+    import requests
+
+    # A 429 is rejected before the broker acts on it, so any call may be retried
+    if _status_code(error) == 429:
+        return True
+    if not endpoint.startswith(("get_", "list_")):
+        return False  # Never repeat orders/cancels that may already have gone through
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return _status_code(error) in RETRYABLE_STATUS
+
+
+# Endpoints whose first positional argument is a symbol (the others take an order id)
+SYMBOL_ARG_ENDPOINTS = {"get_position", "get_asset", "close_position", "get_latest_trade", "get_latest_quote"}
+
+def _call_symbol(endpoint, args, kwargs):
+    """The symbol(s) an API call is about, for its trace span, or None."""
+    if kwargs.get("symbol"):
+        return kwargs["symbol"]
+    if kwargs.get("symbols"):
+        return ",".join(kwargs["symbols"])
+    if endpoint in SYMBOL_ARG_ENDPOINTS and args and isinstance(args[0], str):
+        return args[0]
+    return None
+
+def _span(kind, endpoint, **fields):
+    """A tracing span (scripts/tracing.py) around a call; a plain field dict when tracing is unavailable."""
+    try:
+        import tracing
+    except ImportError:
+        return contextlib.nullcontext({})
+    return tracing.span(kind, endpoint, **fields)
+
+
+class AlpacaClient:
+    """
+    Wraps an Alpaca REST client for one account. Every method call takes a token from the
+    account's bucket, is timed and counted per endpoint (and traced as one span), and is
+    retried with exponential backoff when it is safe to do so.
+    """
+
+    def __init__(self, factory, name, bucket=None):
+        self._factory = factory  # Builds the underlying REST client on first use
+        self._rest = None
+        self._rest_lock = threading.Lock()
+        self.name = name
+        self._bucket = bucket or TokenBucket()
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def _record(self, endpoint, elapsed, error=False, retry=False):
+        with self._stats_lock:
+            e = self._stats.setdefault(
+                endpoint, {"calls": 0, "errors": 0, "retries": 0, "total_s": 0.0, "max_s": 0.0}
+            )
+            e["calls"] += 1
+            e["total_s"] += elapsed
+            e["max_s"] = max(e["max_s"], elapsed)
+            e["errors"] += error
+            e["retries"] += retry
+
+    def stats(self):
+        with self._stats_lock:
+            return {endpoint: dict(e) for endpoint, e in self._stats.items()}
+
+    def _client(self):
+        with self._rest_lock:
+            if self._rest is None:
+                self._rest = self._factory()
+            return self._rest
+
+    def __getattr__(self, name):
+        attr = getattr(self._client(), name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with _span("alpaca", name, model=self.name, symbol=_call_symbol(name, args, kwargs)) as span:
+                attempt = 0
+                waited = 0.0
+                while True:
+                    queued = time.perf_counter()
+                    self._bucket.acquire()
+                    started = time.perf_counter()
+                    waited += started - queued
+                    span.update(attempts=attempt + 1, wait_ms=round(waited * 1000, 2))
+                    try:
+                        result = attr(*args, **kwargs)
+                    except Exception as e:
+                        retry = attempt < ALPACA_MAX_RETRIES and _is_retryable(name, e)
+                        self._record(name, time.perf_counter() - started, error=not retry, retry=retry)
+                        if not retry:
+                            raise
+                        time.sleep(ALPACA_BACKOFF_BASE * 2 ** attempt * (1 + random.random()))
+                        attempt += 1
+                        continue
+                    self._record(name, time.perf_counter() - started)
+                    return result
+        return call
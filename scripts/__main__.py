@@ -0,0 +1,207 @@
+"""
+Unified entry point:
+
+    python -m scripts prompt  (--model NAME | --all)   # --all: one shared data fetch, every prompt saved
+    python -m scripts execute (--model NAME | --batch DIR) [--dry-run]
+    python -m scripts history (--model NAME | --all)
+    python -m scripts refresh [--full]
+    python -m scripts schedule [--once]   # Long-running: refresh during market sessions (Alpaca calendar)
+    python -m scripts serve [--port 8000] [--schedule]   # Dashboard with live updates over SSE
+    python -m scripts report
+    python -m scripts trace [FILE] [--top N]  # Slowest calls and call counts of a run (newest by default)
+    python -m scripts startup          # Measure each command's startup time against its budget
+
+Each command imports its script (and the heavy libraries behind it) only when it runs,
+and the Alpaca SDK itself is only imported on the first API call.
+"""
+import sys
+import time
+import argparse
+import pathlib
+import importlib
+import subprocess
+
+# Scripts import each other by bare name, and config lives in the repo root
+SCRIPTS_DIR = pathlib.Path(__file__).parent.resolve()
+root_dir = SCRIPTS_DIR.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+sys.path.append(str(root_dir))
+import config
+
+# Configuration
+# Seconds from process start until a command's modules are loaded and it is ready to run
+STARTUP_BUDGET = {
+    "prompt": 1.5,
+    "execute": 0.5,
+    "history": 0.3,
+    "refresh": 0.5,
+    "schedule": 0.5,
+    "serve": 0.5,
+    "report": 0.3,
+    "trace": 0.3,
+}
+# What each standalone script imported at module level before this entry point existed
+LEGACY_IMPORTS = {
+    "prompt": "pyperclip, alpaca_trade_api, yfinance, numpy, pandas",
+    "execute": "pyperclip, alpaca_trade_api",
+    "history": "alpaca_trade_api",
+    "refresh": "alpaca_trade_api, yfinance",
+    "schedule": "alpaca_trade_api, yfinance",
+    "serve": "http.server",
+    "report": "pandas, alpaca_trade_api",
+    "trace": "json",
+}
+
+
+def selected_models(args):
+    """Models chosen with --model NAME or --all."""
+    if args.all:
+        return list(config.MODELS.values())
+    return [config.find_model(args.model)]
+
+
+def run_prompt(module, args):
+    if args.all:
+        module.generate_all_prompts()
+        return
+    for info in selected_models(args):
+        module.init_session(info)
+        module.generate_daily_prompt()
+
+
+def run_execute(module, args):
+    if args.batch:
+        module.run_batch(args.batch, dry_run=args.dry_run)
+        return
+    if args.all:
+        raise SystemExit("❌ The clipboard holds one model's table; use --model NAME or --batch DIR.")
+    module.init_session(config.find_model(args.model))
+    module.main(dry_run=args.dry_run)
+
+
+def run_history(module, args):
+    for info in selected_models(args):
+        module.init_session(info)
+        module.get_history()
+
+
+def run_refresh(module, args):
+    module.run_refresh(full=args.full)
+
+
+def run_schedule(module, args):
+    import asyncio
+    asyncio.run(module.main(once=args.once))
+
+
+def run_serve(module, args):
+    import asyncio
+    asyncio.run(module.main(args.host, args.port, schedule=args.schedule))
+
+
+def run_report(module, args):
+    module.generate_report()
+
+
+def run_trace(module, args):
+    path = args.file or module.latest_trace()
+    if path is None:
+        raise SystemExit(f"❌ No trace files in {module.TRACE_DIR}")
+    module.summarize(path, top=args.top)
+
+
+# command -> (module to import on demand, runner, needs a model selection)
+COMMANDS = {
+    "prompt": ("generate_prompt", run_prompt, True),
+    "execute": ("execute_trade", run_execute, True),
+    "history": ("check_history", run_history, True),
+    "refresh": ("refresh_engine", run_refresh, False),
+    "schedule": ("scheduler", run_schedule, False),
+    "serve": ("live_server", run_serve, False),
+    "report": ("generate_substack_report", run_report, False),
+    "trace": ("tracing", run_trace, False),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m scripts", description="AI trading challenge tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name, (_, _, needs_model) in COMMANDS.items():
+        cmd = sub.add_parser(name)
+        if needs_model:
+            group = cmd.add_mutually_exclusive_group(required=True)
+            group.add_argument("--model", help="Model name (e.g. Claude) or menu number")
+            group.add_argument("--all", action="store_true", help="Run for every configured model")
+            if name == "execute":
+                group.add_argument("--batch", metavar="DIR", help="Execute every <model>.md/.csv table in DIR concurrently")
+        # Loads the command's modules and exits; used by the startup command
+        cmd.add_argument("--startup-probe", action="store_true", help=argparse.SUPPRESS)
+    sub.choices["execute"].add_argument("--dry-run", action="store_true")
+    sub.choices["refresh"].add_argument("--full", action="store_true", help="Rebuild history from the experiment start")
+    sub.choices["schedule"].add_argument("--once", action="store_true", help="Run every job once now and exit")
+    sub.choices["serve"].add_argument("--host", default="127.0.0.1")
+    sub.choices["serve"].add_argument("--port", type=int, default=8000)
+    sub.choices["serve"].add_argument("--schedule", action="store_true", help="Also run the refresh scheduler")
+    sub.choices["trace"].add_argument("file", nargs="?", help="Trace file (default: newest in logs/traces)")
+    sub.choices["trace"].add_argument("--top", type=int, default=15, help="Slowest calls to list")
+
+    startup = sub.add_parser("startup", help="Measure startup time per command against STARTUP_BUDGET")
+    startup.add_argument("--runs", type=int, default=3, help="Cold starts per command (best is reported)")
+    return parser
+
+
+def _cold_start(argv):
+    """Best-effort wall time of a fresh interpreter running argv."""
+    started = time.perf_counter()
+    subprocess.run(argv, cwd=root_dir, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def measure_startup(runs=3):
+    """Times every command's cold start (interpreter + imports) against its budget and the old imports."""
+    print(f"⏱️  Startup time (best of {runs} cold starts)")
+    print(f"   {'command':<9} {'now':>7} {'budget':>7} {'before':>7}")
+    over_budget = []
+    for name in COMMANDS:
+        probe = [sys.executable, "-m", "scripts", name, "--startup-probe"]
+        if COMMANDS[name][2]:
+            probe += ["--all"]
+        legacy = [sys.executable, "-c", f"import {LEGACY_IMPORTS[name]}"]
+        now = min(_cold_start(probe) for _ in range(runs))
+        before = min(_cold_start(legacy) for _ in range(runs))
+        flag = "✅" if now <= STARTUP_BUDGET[name] else "❌"
+        if flag == "❌":
+            over_budget.append(name)
+        print(f"   {name:<9} {now:>6.2f}s {STARTUP_BUDGET[name]:>6.2f}s {before:>6.2f}s {flag}")
+    return not over_budget
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "model", None):
+        try:
+            config.find_model(args.model)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.command == "startup":
+        sys.exit(0 if measure_startup(args.runs) else 1)
+
+    module_name, runner, _ = COMMANDS[args.command]
+    module = importlib.import_module(module_name)
+    if args.startup_probe:
+        return
+    if args.command == "trace":
+        runner(module, args)
+        return
+
+    import tracing
+    trace_file = tracing.start_run(args.command)
+    runner(module, args)
+    if trace_file:
+        print(f"\n🔎 Trace saved to: {trace_file} (summary: python -m scripts trace)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import sys
+import json
+import hashlib
+import pathlib
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+# Add root directory to path to import config
+root_dir = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.append(str(root_dir))
+import config
+import datastore
+
+# Configuration
+ANALYTICS_CACHE = config.LOGS_DIR / "analytics.json"
+BENCHMARK = "SPY"
+TRADING_DAYS = 252
+ROLLING_WINDOW = 20      # Trading days for the rolling volatility
+RISK_FREE_RATE = 0.0     # Annual; Sharpe and Sortino use excess daily returns
+START_CAPITAL = 1000.0
+
+METRIC_COLUMNS = [
+    "equity", "total_return_pct", "ann_return_pct", "ann_vol_pct", "rolling_vol_pct",
+    "sharpe", "sortino", "max_drawdown_pct", "current_drawdown_pct", "max_drawdown_days",
+    "beta", "correlation", "days",
+]
+
+
+def load_equity_frame(conn=None):
+    """Returns a (dates x models) equity DataFrame from the datastore, in config model order."""
+    if conn is None:
+        with closing(datastore.connect()) as conn:
+            return load_equity_frame(conn)
+    rows = datastore.equity_rows(conn)
+    frame = pd.DataFrame([tuple(r) for r in rows], columns=["date", "model", "equity"])
+    frame = frame.pivot(index="date", columns="model", values="equity")
+    frame.index = pd.DatetimeIndex(frame.index)
+    models = [info['name'] for info in config.MODELS.values() if info['name'] in frame.columns]
+    return frame[models].sort_index()
+
+
+def load_benchmark(index, refresh=True):
+    """Benchmark closes aligned to the equity dates (None if unavailable)."""
+    try:
+        import bar_store
+        closes = bar_store.get_close_frame([BENCHMARK], refresh=refresh)[BENCHMARK].dropna()
+    except Exception as e:
+        print(f"   ⚠️ {BENCHMARK} benchmark unavailable: {e}")
+        return None
+    if closes.empty:
+        return None
+    return closes.reindex(index)
+
+
+def _drawdown_stats(values):
+    """
+    values: (days x models) equity array. Returns (max drawdown, current drawdown,
+    longest stretch in days below a prior peak) per column, all vectorized.
+    """
+    peaks = np.fmax.accumulate(values, axis=0)
+    drawdown = values / peaks - 1.0
+    # Position of the most recent peak at every row, then the gap since it
+    positions = np.arange(len(values))[:, None]
+    at_peak = np.where((drawdown >= 0) | np.isnan(drawdown), positions, 0)
+    last_peak = np.maximum.accumulate(at_peak, axis=0)
+    duration = positions - last_peak
+    return np.nanmin(drawdown, axis=0), drawdown[-1], duration.max(axis=0)
+
+
+def compute_metrics(equity, benchmark=None):
+    """
+    Risk/return metrics for every model at once as column operations.
+    equity: (dates x models) DataFrame. benchmark: closes on the same index, or None.
+    Only weekdays are used, so carried-forward weekend rows do not dilute volatility.
+    Returns a DataFrame indexed by model with METRIC_COLUMNS.
+    """
+    trading = equity.index.dayofweek < 5
+    equity = equity[trading].ffill()
+    returns = equity.pct_change(fill_method=None).iloc[1:]
+    daily_rf = RISK_FREE_RATE / TRADING_DAYS
+    excess = returns - daily_rf
+
+    mean = excess.mean()
+    std = returns.std()
+    downside = np.sqrt((excess.clip(upper=0) ** 2).mean())
+    max_dd, current_dd, dd_days = _drawdown_stats(equity.to_numpy(dtype=float))
+
+    last = equity.ffill().iloc[-1]
+    days = returns.count()
+    growth = last / START_CAPITAL
+    metrics = pd.DataFrame({
+        "equity": last,
+        "total_return_pct": (growth - 1) * 100,
+        "ann_return_pct": (growth ** (TRADING_DAYS / days.clip(lower=1)) - 1) * 100,
+        "ann_vol_pct": std * np.sqrt(TRADING_DAYS) * 100,
+        "rolling_vol_pct": returns.rolling(ROLLING_WINDOW, min_periods=ROLLING_WINDOW).std().iloc[-1]
+        * np.sqrt(TRADING_DAYS) * 100,
+        "sharpe": mean / std.replace(0, np.nan) * np.sqrt(TRADING_DAYS),
+        "sortino": mean / downside.replace(0, np.nan) * np.sqrt(TRADING_DAYS),
+        "max_drawdown_pct": pd.Series(max_dd * 100, index=equity.columns),
+        "current_drawdown_pct": pd.Series(current_dd * 100, index=equity.columns),
+        "max_drawdown_days": pd.Series(dd_days, index=equity.columns),
+        "days": days,
+    })
+
+    if benchmark is not None:
+        bench = benchmark[trading].ffill().pct_change(fill_method=None).iloc[1:]
+        aligned = returns[bench.notna()]
+        bench = bench[bench.notna()]
+        centered = aligned - aligned.mean()
+        bench_centered = bench - bench.mean()
+        cov = centered.mul(bench_centered, axis=0).mean()
+        metrics["beta"] = cov / (bench_centered ** 2).mean()
+        metrics["correlation"] = aligned.corrwith(bench)
+    else:
+        metrics["beta"] = np.nan
+        metrics["correlation"] = np.nan
+    return metrics[METRIC_COLUMNS]
+
+
+def _cache_key(equity):
+    # The last row's values are hashed too: the live refresh rewrites today's equity in place
+    last_row = np.ascontiguousarray(equity.iloc[-1].to_numpy(dtype=float))
+    return {
+        "last_date": equity.index[-1].strftime("%Y-%m-%d"),
+        "rows": int(len(equity)),
+        "models": list(equity.columns),
+        "last_row": hashlib.sha1(last_row.tobytes()).hexdigest(),
+    }
+
+
+def _load_cache():
+    try:
+        with open(ANALYTICS_CACHE, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def get_metrics(refresh_benchmark=True, use_cache=True):
+    """
+    Returns {model: {metric: value}} for the current equity history.
+    Results are cached in logs/analytics.json keyed by the data's last date (plus row
+    count, models and a hash of the last row), so repeated reports reuse them until
+    new equity is logged or today's row is updated.
+    """
+    equity = load_equity_frame()
+    if equity.empty:
+        return {}
+    key = _cache_key(equity)
+
+    cached = _load_cache() if use_cache else None
+    # A cache written while the benchmark was unreachable is retried when refreshing is allowed
+    if cached and cached.get("key") == key and (cached.get("benchmark") or not refresh_benchmark):
+        return cached["metrics"]
+
+    benchmark = load_benchmark(equity.index, refresh=refresh_benchmark)
+    metrics = compute_metrics(equity, benchmark)
+    result = {
+        model: {k: (None if pd.isna(v) else round(float(v), 4)) for k, v in row.items()}
+        for model, row in metrics.iterrows()
+    }
+
+    ANALYTICS_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ANALYTICS_CACHE.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump({"key": key, "benchmark": BENCHMARK if benchmark is not None else None, "metrics": result}, f, indent=2)
+    tmp.replace(ANALYTICS_CACHE)
+    return result
+
+
+def format_metric(value, fmt):
+    return "n/a" if value is None else format(value, fmt)
+
+
+if __name__ == "__main__":
+    for model, m in get_metrics().items():
+        print(
+            f"{model:<11} Sharpe {format_metric(m['sharpe'], '.2f'):>6} | Sortino {format_metric(m['sortino'], '.2f'):>6} | "
+            f"Vol {format_metric(m['ann_vol_pct'], '.1f'):>5}% | MaxDD {format_metric(m['max_drawdown_pct'], '.1f'):>6}% "
+            f"({format_metric(m['max_drawdown_days'], '.0f')}d) | Beta {format_metric(m['beta'], '.2f'):>5}"
+        )
@@ -0,0 +1,246 @@
+import sys
+import os
+import json
+import pathlib
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+# Add root directory to path to import config
+root_dir = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.append(str(root_dir))
+import config
+import tracing
+
+# Configuration
+BARS_DIR = config.BARS_DIR
+BARS_INDEX = BARS_DIR / "_index.json"
+MARKET_TZ = ZoneInfo("America/New_York")
+DEFAULT_BACKFILL_DAYS = 400  # Calendar days fetched the first time a symbol is seen
+ADJUSTMENT_RTOL = 1e-4       # Overlap bar moved more than this: splits/dividends re-based the adjusted history
+
+BAR_DTYPE = np.dtype([
+    ("date", "datetime64[D]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+EMPTY_BARS = np.empty(0, dtype=BAR_DTYPE)
+
+# Bar fields pulled from the yfinance download, in BAR_DTYPE order
+PRICE_FIELDS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+
+def _bar_path(symbol):
+    """Maps a ticker (including ^TNX / DX-Y.NYB style symbols) to its .npy file."""
+    safe = symbol.upper().replace("^", "_").replace("/", "_")
+    return BARS_DIR / f"{safe}.npy"
+
+
+def _market_today():
+    return datetime.now(MARKET_TZ).date()
+
+
+def _last_complete_session(today):
+    """Most recent weekday strictly before today. Holidays cost one extra check per day."""
+    return np.busday_offset(np.datetime64(today, "D"), -1, roll="forward")
+
+
+def _load_index():
+    if BARS_INDEX.exists():
+        try:
+            with open(BARS_INDEX, "r") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            pass
+    return {}
+
+
+def _save_index(index):
+    tmp = BARS_INDEX.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp, BARS_INDEX)
+
+
+def load_bars(symbol):
+    """
+    Returns the stored daily bars for a symbol as a read-only memory-mapped
+    structured array (fields: date, open, high, low, close, volume).
+    Column access such as bars["close"] is a zero-copy view.
+    """
+    path = _bar_path(symbol)
+    if not path.exists():
+        return EMPTY_BARS
+    return np.load(path, mmap_mode="r")
+
+
+def last_stored_date(symbol):
+    bars = load_bars(symbol)
+    return bars["date"][-1] if len(bars) else None
+
+
+def _write_bars(symbol, bars):
+    path = _bar_path(symbol)
+    tmp = path.with_name(path.stem + ".tmp.npy")
+    np.save(tmp, bars)
+    os.replace(tmp, path)
+
+
+def _frame_to_bars(frame):
+    """Converts one symbol's OHLCV frame (yfinance columns) to a BAR_DTYPE array."""
+    frame = frame.dropna(subset=["Close"])
+    bars = np.empty(len(frame), dtype=BAR_DTYPE)
+    bars["date"] = frame.index.values.astype("datetime64[D]")
+    for field, column in PRICE_FIELDS.items():
+        bars[field] = frame[column].to_numpy(dtype=float) if column in frame else np.nan
+    return bars
+
+
+def _split_download(hist, symbols):
+    """Yields (symbol, frame) pairs from a yf.download result."""
+    if isinstance(hist.columns, pd.MultiIndex):
+        tickers = set(hist.columns.get_level_values(1))
+        for symbol in symbols:
+            if symbol in tickers:
+                yield symbol, hist.xs(symbol, axis=1, level=1)
+    elif len(symbols) == 1:
+        yield symbols[0], hist
+
+
+def _append_bars(symbol, new_bars, today):
+    """
+    Appends finalized bars newer than what is stored. Today's (possibly live) bar is never persisted.
+    Returns the number of bars appended, or None (nothing written) when the download's copy of
+    the last stored bar differs from the stored one: a split or dividend since then moved the
+    adjusted history, so the stored bars must be refetched rather than extended.
+    """
+    stored = np.load(_bar_path(symbol)) if _bar_path(symbol).exists() else EMPTY_BARS
+    cutoff = stored["date"][-1] if len(stored) else np.datetime64("1970-01-01", "D")
+    overlap = new_bars[new_bars["date"] == cutoff]
+    if len(overlap) and not np.isclose(overlap["close"][0], stored["close"][-1], rtol=ADJUSTMENT_RTOL):
+        return None
+    keep = (new_bars["date"] > cutoff) & (new_bars["date"] < np.datetime64(today, "D"))
+    if keep.any():
+        _write_bars(symbol, np.concatenate([stored, new_bars[keep]]))
+    return int(keep.sum())
+
+
+def _download(group, start):
+    """One multi-ticker adjusted daily download since start, or None on failure."""
+    print(f"   🌐 Fetching bars for {len(group)} symbol(s) since {start} ...")
+    try:
+        with tracing.span("yahoo", "download", symbol=",".join(group), start=start.isoformat()):
+            return yf.download(group, start=start.isoformat(), interval="1d", auto_adjust=True,
+                               group_by="column", progress=False, threads=True)
+    except Exception as e:
+        print(f"   ⚠️ Bar download failed for {', '.join(group)}: {e}")
+        return None
+
+
+def _rebuild_bars(symbols, today):
+    """
+    Refetches the full stored window of symbols whose adjusted history moved and replaces
+    their files. Returns the symbols that were rebuilt.
+    """
+    rebuilt = set()
+    by_start = {}
+    for symbol in symbols:
+        by_start.setdefault(load_bars(symbol)["date"][0].astype(object), []).append(symbol)
+    for start, group in sorted(by_start.items()):
+        print(f"   🔁 Adjusted prices changed (split/dividend); rebuilding {', '.join(group)}")
+        hist = _download(group, start)
+        if hist is None or hist.empty:
+            continue
+        for symbol, frame in _split_download(hist, group):
+            bars = _frame_to_bars(frame)
+            bars = bars[bars["date"] < np.datetime64(today, "D")]
+            if len(bars):
+                _write_bars(symbol, bars)
+                rebuilt.add(symbol)
+    return rebuilt
+
+
+def update_bars(symbols, backfill_days=DEFAULT_BACKFILL_DAYS):
+    """
+    Brings the store up to the last complete session for every symbol.
+    Only the missing date range (plus the last stored bar, to detect re-adjusted prices) is
+    downloaded, batched into one multi-ticker request per distinct start date. Symbols whose
+    stored bars no longer match Yahoo's adjusted history are rebuilt in full.
+    Failures leave stored bars untouched and the symbol unchecked, so the next call retries it.
+    """
+    symbols = sorted({s.upper() for s in symbols})
+    if not symbols:
+        return
+
+    BARS_DIR.mkdir(parents=True, exist_ok=True)
+    today = _market_today()
+    expected = _last_complete_session(today)
+    index = _load_index()
+
+    # Group stale symbols by the first date to download
+    by_start = {}
+    for symbol in symbols:
+        last = last_stored_date(symbol)
+        if last is not None and last >= expected:
+            continue
+        if index.get(symbol, {}).get("checked") == today.isoformat():
+            continue  # Already asked today (e.g. holiday); nothing new will appear
+        if last is None:
+            start = today - timedelta(days=backfill_days)
+        else:
+            start = last.astype(object)  # The last stored bar is re-downloaded as the overlap check
+        by_start.setdefault(start, []).append(symbol)
+
+    if not by_start:
+        return
+
+    fetched = set()
+    rebuild = []
+    for start, group in sorted(by_start.items()):
+        hist = _download(group, start)
+        if hist is None or hist.empty:
+            continue
+        for symbol, frame in _split_download(hist, group):
+            bars = _frame_to_bars(frame)
+            if not len(bars):
+                continue  # Missing from the download (yfinance fills failed tickers with NaN)
+            if _append_bars(symbol, bars, today) is None:
+                rebuild.append(symbol)
+            else:
+                fetched.add(symbol)
+    if rebuild:
+        fetched |= _rebuild_bars(rebuild, today)
+
+    # Only symbols Yahoo answered for are marked checked; the others are retried on the next call
+    for symbol in fetched:
+        last = last_stored_date(symbol)
+        index[symbol] = {
+            "checked": today.isoformat(),
+            "last_date": str(last) if last is not None else None,
+        }
+
+    _save_index(index)
+
+
+def get_close_frame(symbols, lookback=None, refresh=True):
+    """
+    Returns a (dates x symbols) DataFrame of daily closes read from the store.
+    Missing bars are fetched first unless refresh is False.
+    """
+    symbols = sorted({s.upper() for s in symbols})
+    if refresh:
+        update_bars(symbols)
+
+    series = {}
+    for symbol in symbols:
+        bars = load_bars(symbol)
+        if lookback:
+            bars = bars[-lookback:]
+        series[symbol] = pd.Series(bars["close"], index=pd.DatetimeIndex(bars["date"]), dtype=float)
+    return pd.DataFrame(series, columns=symbols)
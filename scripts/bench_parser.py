@@ -0,0 +1,257 @@
+"""
+Benchmarks the single-pass execution-table parser (trade_table) against the previous
+three-stage parser (CSV scan, markdown re-tokenization, whole-text regex).
+
+Corpus:
+  - every clipboard table recorded in logs/trades/*/*.md, with the expected rows taken
+    from what the executor logged for that run (PROCESSING / SYNCING / HOLDING lines);
+  - synthetic markdown and CSV tables of increasing size with known rows, plus
+    prose-only input that forces the regex fallback and commentary with no orders.
+
+Both parsers are scored only on rows that produce trades (an ACTION the executor acts on);
+separator and prose rows the executor ignores are not counted against either.
+
+Usage: python scripts/bench_parser.py [--repeat N]
+"""
+import re
+import io
+import csv
+import sys
+import time
+import random
+import pathlib
+import argparse
+
+# Add root directory to path to import config
+root_dir = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.append(str(root_dir))
+import config
+from trade_table import parse_trades_text, HEADER_MAP
+
+TRADES_DIR = config.LOGS_DIR / "trades"
+SYNTHETIC_SIZES = [10, 100, 1000, 10000]
+
+# Executor log lines that reveal which row it processed
+_EXPECTED_PATTERNS = [
+    (re.compile(r"PROCESSING (BUY|SELL|CANCEL): (\S+)"), None),
+    (re.compile(r"SYNCING PROTECTION: (\S+)"), "HOLD"),
+    (re.compile(r"HOLDING: (\S+)"), "HOLD"),
+    (re.compile(r"No open position found for (\S+) to protect"), "HOLD"),
+    (re.compile(r"NO_TRADES:"), "NO_TRADES"),
+]
+# Older executors stopped at the first NO_TRADES row, so those logs do not reveal every row
+_SHORT_CIRCUIT = "AI Signal: Maintain Current Portfolio"
+# Actions execute_trade acts on; any other row is skipped there, so it is not scored
+TRADE_ACTIONS = {"BUY", "SELL", "HOLD", "CANCEL", "NO_TRADES"}
+
+
+# -------------------------------------------------
+# Previous parser (frozen copy, logging removed)
+# -------------------------------------------------
+def legacy_map_headers(row_keys):
+    mapped = {}
+    for canonical, variations in HEADER_MAP.items():
+        for var in variations:
+            for rk in row_keys:
+                if var == rk.upper().strip():
+                    mapped[canonical] = rk
+                    break
+            if canonical in mapped:
+                break
+    return mapped
+
+
+def legacy_parse(text):
+    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    trades = []
+
+    header_line_idx = None
+    for i, line in enumerate(lines):
+        if "ACTION" in line.upper() and "TICKER" in line.upper() and "," in line:
+            header_line_idx = i
+            break
+
+    if header_line_idx is not None:
+        reader = csv.DictReader(io.StringIO("\n".join(lines[header_line_idx:])))
+        if reader.fieldnames:
+            h_map = legacy_map_headers(reader.fieldnames)
+            for row in reader:
+                trade = {canonical: row.get(original) for canonical, original in h_map.items()}
+                if trade.get("ACTION") and trade.get("TICKER"):
+                    trades.append(trade)
+        if trades:
+            return trades, "csv"
+
+    processed_lines = []
+    for line in lines:
+        if "|" in line:
+            parts = [p.strip() for p in line.split("|") if p.strip()]
+            processed_lines.append(",".join(parts))
+        else:
+            processed_lines.append(line)
+
+    header_idx = -1
+    for i, line in enumerate(processed_lines):
+        if any(h in line.upper() for h in ["ACTION", "TICKER"]):
+            header_idx = i
+            break
+
+    if header_idx != -1:
+        reader = csv.DictReader(io.StringIO("\n".join(processed_lines[header_idx:])))
+        if reader.fieldnames:
+            h_map = legacy_map_headers(reader.fieldnames)
+            for row in reader:
+                trade = {canonical: row.get(original) for canonical, original in h_map.items()}
+                if trade.get("ACTION") and trade.get("TICKER"):
+                    trades.append(trade)
+    if trades:
+        return trades, "markdown"
+
+    pattern = r"(?:^|[,\s|])\s*(BUY|SELL|HOLD|CANCEL)\s*[,\s|]\s*([A-Z]+)\s*[,\s|]\s*([A-Z0-9\.]+)\s*[,\s|]\s*([A-Z\s/]+)\s*[,\s|]\s*(\$?[NA\d\.\-]+)\s*[,\s|]\s*(\$?[NA\d\.\-]+)\s*(?:[,\s|]\s*(\$?[NA\d\.\-]+))?"
+    for m in re.findall(pattern, text, re.IGNORECASE | re.MULTILINE):
+        trades.append({
+            "ACTION": m[0].upper(), "TICKER": m[1].upper(), "QTY": m[2], "TYPE": m[3].upper(),
+            "LIMIT_PRICE": m[4], "STOP_LOSS": m[5], "TAKE_PROFIT": m[6] if len(m) > 6 else None,
+        })
+    return trades, ("regex" if trades else None)
+
+
+PARSERS = {"legacy": legacy_parse, "single-pass": parse_trades_text}
+
+
+# -------------------------------------------------
+# Corpus
+# -------------------------------------------------
+def _expected_rows(log_lines):
+    """(action, ticker) rows the executor processed; ticker None matches anything. None if unknowable."""
+    if any(_SHORT_CIRCUIT in line for line in log_lines):
+        return None
+    rows = []
+    for line in log_lines:
+        for pattern, action in _EXPECTED_PATTERNS:
+            m = pattern.search(line)
+            if not m:
+                continue
+            if action == "NO_TRADES":
+                rows.append(("NO_TRADES", None))
+            elif action:
+                ticker = m.group(1)
+                rows.append((action, None if ticker == "None" else ticker))  # N/A tickers log as None
+            else:
+                rows.append((m.group(1), m.group(2)))
+            break
+    return rows
+
+
+def load_logged_tables(trades_dir=TRADES_DIR):
+    """Returns [(label, clipboard text, expected (action, ticker) rows)] from saved execution logs."""
+    corpus = []
+    for path in sorted(trades_dir.glob("*/*.md")):
+        lines = path.read_text(encoding="utf-8").splitlines()
+        if "📋 CLIPBOARD CONTENT:" not in lines:
+            continue
+        start = lines.index("📋 CLIPBOARD CONTENT:") + 1
+        end = lines.index("-" * 20, start)
+        label = f"{path.parent.name}/{path.stem}"
+        corpus.append((label, "\n".join(lines[start:end]), _expected_rows(lines[end:])))
+    return corpus
+
+
+def synthetic_table(n_rows, dialect, seed=0):
+    """Builds an execution table with n_rows known rows, surrounded by prose like a chat reply."""
+    rng = random.Random(seed)
+    actions = ["BUY", "SELL", "HOLD", "CANCEL"]
+    rows = []
+    for _ in range(n_rows):
+        ticker = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rng.randint(2, 4)))
+        price = rng.uniform(3, 50)
+        rows.append((rng.choice(actions), ticker, str(rng.randint(1, 50)), "LIMIT",
+                     f"${price:.2f}", f"${price * 0.9:.2f}", f"${price * 1.3:.2f}",
+                     "Catalyst, trend above 50SMA; thesis intact"))
+
+    header = ["ACTION", "TICKER", "QTY", "TYPE", "LIMIT_PRICE", "STOP_LOSS", "TAKE_PROFIT", "REASON"]
+    out = ["Here is today's execution table, based on the data provided:", ""]
+    if dialect == "markdown":
+        out.append("| " + " | ".join(header) + " |")
+        out.append("| " + " | ".join(":---" for _ in header) + " |")
+        out.extend("| " + " | ".join(row) + " |" for row in rows)
+    elif dialect == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(header)
+        writer.writerows(rows)
+        out.append(buf.getvalue().rstrip("\n"))
+    elif dialect == "prose":  # one order per line, no table
+        out.extend(f"{a} {t} {q} {ty} {lp} {sl} {tp}" for a, t, q, ty, lp, sl, tp, _ in rows)
+    else:  # "noise": commentary with no orders at all, e.g. a reply pasted by mistake
+        out.extend(f"{t} trades {q}% above its 50SMA, so the setup is not confirmed yet." for _, t, q, *_ in rows)
+        rows = []
+    out += ["", "Note: sizes respect the 1.5% risk rule, and stops sit below the 50SMA."]
+    return "\n".join(out), [(a, t) for a, t, *_ in rows]
+
+
+# -------------------------------------------------
+# Measurement
+# -------------------------------------------------
+def _trade_rows(trades):
+    """(action, ticker) for the rows the executor would act on."""
+    rows = [((t.get("ACTION") or "").strip("*` ").upper(), (t.get("TICKER") or "").strip("*` ").upper()) for t in trades]
+    return [row for row in rows if row[0] in TRADE_ACTIONS]
+
+
+def _matches(trades, expected):
+    got = _trade_rows(trades)
+    if not any(action == "NO_TRADES" for action, _ in expected):
+        # Older executors did not log NO_TRADES rows, so they are only scored when logged
+        got = [row for row in got if row[0] != "NO_TRADES"]
+    if len(got) != len(expected):
+        return False
+    return all(g[0] == e[0] and (e[1] is None or g[1] == e[1]) for g, e in zip(got, expected))
+
+
+def _best_time(parser, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parser(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_benchmark(repeat=5):
+    logged = load_logged_tables()
+    scored = [(label, text, expected) for label, text, expected in logged if expected is not None]
+    print(f"📚 Logged tables: {len(logged)} from {TRADES_DIR} ({len(scored)} with fully known rows)")
+    print(f"   {'parser':<12} {'exact':>9} {'rows':>6} {'total time':>11}")
+    for name, parser in PARSERS.items():
+        exact = sum(_matches(parser(text)[0], expected) for _, text, expected in scored)
+        rows = sum(len(_trade_rows(parser(text)[0])) for _, text, _ in logged)
+        elapsed = sum(_best_time(parser, text, repeat) for _, text, _ in logged)
+        print(f"   {name:<12} {exact:>4}/{len(scored):<4} {rows:>6} {elapsed * 1000:>9.2f}ms")
+
+    for name, parser in PARSERS.items():
+        misses = [label for label, text, expected in scored if not _matches(parser(text)[0], expected)]
+        if misses:
+            print(f"   ⚠️ {name} mismatches: {', '.join(misses)}")
+
+    print(f"\n🧪 Synthetic tables (best of {repeat})")
+    print(f"   {'dialect':<9} {'rows':>6} " + " ".join(f"{name:>18}" for name in PARSERS) + f" {'speedup':>8}")
+    for dialect in ["markdown", "csv", "prose", "noise"]:
+        for n in SYNTHETIC_SIZES:
+            if dialect in ("prose", "noise") and n > 1000:
+                continue
+            text, expected = synthetic_table(n, dialect)
+            cells, times = [], []
+            for parser in PARSERS.values():
+                elapsed = _best_time(parser, text, repeat)
+                times.append(elapsed)
+                ok = "✅" if _matches(parser(text)[0], expected) else "❌"
+                cells.append(f"{elapsed * 1000:>14.2f}ms {ok}")
+            print(f"   {dialect:<9} {n:>6} " + " ".join(cells) + f" {times[0] / times[1]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run_benchmark(repeat=args.repeat)
@@ -0,0 +1,518 @@
+"""
+End-to-end benchmarks for the prompt (per model and all-models), execute and refresh
+paths, run against local stand-ins for Alpaca and Yahoo Finance so they need no
+network or credentials:
+
+  - FakeREST: the tradeapi.REST methods the scripts call, backed by replay.SimAccount
+    (same order, OCO and buying-power rules) plus closed-order paging, portfolio
+    history and trade_updates events on a LocalTradeUpdates stream;
+  - a fake yfinance module (Ticker().history / .info and download) serving
+    deterministic random-walk bars, and an in-memory pyperclip.
+
+Both inject a fixed delay per call (--api-latency-ms / --yf-latency-ms). The fake REST
+client is installed under config.AlpacaClient, so rate limiting, retries and the
+per-endpoint counters stay on the measured path (the rate limit itself is lifted
+unless --rate-limit is given, so it does not hide code changes).
+
+Scenarios are the grid accounts x positions x table rows (rows only apply to execute).
+Each runs in a fresh process with LOGS_DIR in a temporary directory and records wall
+time, API and Yahoo call counts and peak RSS to logs/bench/results.jsonl, next to the
+change against the previous run of the same scenario.
+
+Usage: python scripts/bench_suite.py [--paths prompt,prompt_all,execute,refresh] [--accounts 1,4]
+                                     [--positions 5,40] [--rows 5,40] [--api-latency-ms 0]
+                                     [--yf-latency-ms 0] [--repeat N] [--rate-limit]
+"""
+import io
+import os
+import sys
+import json
+import time
+import types
+import zlib
+import pathlib
+import argparse
+import resource
+import importlib
+import tempfile
+import threading
+import subprocess
+import contextlib
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+# Add root directory to path to import config
+root_dir = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.append(str(root_dir))
+import config
+
+# Configuration
+RESULTS_LOG = config.LOGS_DIR / "bench" / "results.jsonl"
+PATHS = ["prompt", "prompt_all", "execute", "refresh"]
+DEFAULT_ACCOUNTS = [1, 4]
+DEFAULT_POSITIONS = [5, 40]
+DEFAULT_ROWS = [5, 40]
+START_CASH = 10000.0
+BAR_EPOCH = "2024-01-02"   # Fake bars start here, so every window of a symbol agrees
+SECTORS = ["Technology", "Healthcare", "Energy", "Financial Services", "Industrials", "Consumer Cyclical"]
+UNLIMITED_RATE = "1000000"
+
+
+# -------------------------------------------------
+# Fake market data
+# -------------------------------------------------
+def bench_symbol(i):
+    """Synthetic ticker for universe slot i (QAAA, QAAB, ...)."""
+    letters = ""
+    for _ in range(3):
+        i, r = divmod(i, 26)
+        letters = chr(65 + r) + letters
+    return "Q" + letters
+
+
+def base_price(symbol):
+    """Deterministic last close for a symbol, between $5 and $45."""
+    return 5.0 + zlib.crc32(symbol.encode()) % 4000 / 100.0
+
+
+_bar_cache = {}
+_bar_lock = threading.Lock()
+
+
+def fake_bars(symbol):
+    """(business days, open, high, low, close) from BAR_EPOCH to today, ending at base_price(symbol)."""
+    with _bar_lock:
+        if symbol not in _bar_cache:
+            days = np.arange(np.datetime64(BAR_EPOCH), np.datetime64(date.today()) + 1)
+            days = days[np.is_busday(days)]
+            rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+            walk = np.cumsum(rng.normal(0, 0.015, len(days)))
+            close = base_price(symbol) * np.exp(walk - walk[-1])
+            opens = np.concatenate([[close[0]], close[:-1]]) * (1 + rng.normal(0, 0.003, len(days)))
+            high = np.maximum(opens, close) * (1 + rng.uniform(0, 0.01, len(days)))
+            low = np.minimum(opens, close) * (1 - rng.uniform(0, 0.01, len(days)))
+            _bar_cache[symbol] = (days, opens, high, low, close)
+        return _bar_cache[symbol]
+
+
+def _bar_frame(symbol, start=None, sessions=None):
+    days, opens, high, low, close = fake_bars(symbol)
+    keep = slice(-sessions, None) if sessions else days >= np.datetime64(start or BAR_EPOCH)
+    return pd.DataFrame(
+        {"Open": opens[keep], "High": high[keep], "Low": low[keep], "Close": close[keep], "Volume": 1_000_000},
+        index=pd.DatetimeIndex(days[keep], name="Date"),
+    )
+
+
+def make_fake_yfinance(latency, counts):
+    """A yfinance stand-in module: download(), Ticker().history() and Ticker().info."""
+    module = types.ModuleType("yfinance")
+    lock = threading.Lock()
+
+    def _call(name):
+        with lock:
+            counts[name] += 1
+        if latency:
+            time.sleep(latency)
+
+    def download(tickers, start=None, **kwargs):
+        _call("download")
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {t: _bar_frame(t, start=start) for t in tickers}
+        return pd.concat(frames, axis=1).swaplevel(0, 1, axis=1)  # (field, ticker) columns
+
+    class Ticker:
+        def __init__(self, symbol):
+            self.ticker = symbol
+
+        def history(self, period="1mo", **kwargs):
+            _call("history")
+            return _bar_frame(self.ticker, sessions=22)
+
+        @property
+        def info(self):
+            _call("info")
+            sector = SECTORS[zlib.crc32(self.ticker.encode()) % len(SECTORS)]
+            return {"symbol": self.ticker, "sector": sector, "industry": f"{sector} Services"}
+
+    module.download = download
+    module.Ticker = Ticker
+    return module
+
+
+def make_fake_pyperclip():
+    """An in-memory clipboard (the real one needs a display)."""
+    module = types.ModuleType("pyperclip")
+    clipboard = {"text": ""}
+    module.copy = lambda text: clipboard.update(text=text)
+    module.paste = lambda: clipboard["text"]
+    return module
+
+
+# -------------------------------------------------
+# Fake Alpaca
+# -------------------------------------------------
+class BenchMarket:
+    """The slice of replay.Market that SimAccount reads: one fixed price per symbol."""
+
+    def __init__(self, symbols):
+        self.prices = {s: base_price(s) for s in symbols}
+        self.column = {s: j for j, s in enumerate(self.prices)}
+        self.has_bars = np.ones(len(self.prices), dtype=bool)
+
+    def prior_close(self, symbol):
+        return self.prices.get(symbol)
+
+
+class FakeREST:
+    """
+    Local stand-in for tradeapi.REST on one account. Open orders, positions and the
+    account are a replay.SimAccount; closed-order paging, portfolio history and
+    trade_updates events are added here.
+    """
+
+    def __init__(self, account, history, stream):
+        self._account = account
+        self._history = history  # Filled orders, oldest first
+        self.stream = stream
+
+    def __getattr__(self, name):
+        return getattr(self._account, name)
+
+    def list_orders(self, status="open", limit=50, after=None, until=None, direction="desc", **kwargs):
+        if status != "closed":
+            return self._account.list_orders(status=status, limit=limit, **kwargs)
+        after = datetime.fromisoformat(after) if after else None
+        until = datetime.fromisoformat(until) if until else None
+        orders = [
+            o for o in self._history
+            if (after is None or o.submitted_at > after) and (until is None or o.submitted_at <= until)
+        ]
+        if direction != "asc":
+            orders.reverse()
+        return orders[:limit]
+
+    def cancel_order(self, order_id):
+        active = [o for o in self._account.orders.values() if o.status in ("new", "accepted", "held")]
+        self._account.cancel_order(order_id)
+        for o in active:
+            if o.status == "canceled":  # The order plus any OCO siblings
+                self.stream.publish("canceled", {"id": o.id, "symbol": o.symbol})
+
+    def get_portfolio_history(self, date_start=None, date_end=None, timeframe="1D", period=None, **kwargs):
+        if period is not None:  # "<N>D", ending today (equity_store backfills)
+            date_end = np.datetime64(date.today())
+            date_start = date_end - int(period.rstrip("D"))
+        days = np.arange(np.datetime64(date_start), np.datetime64(date_end) + 1)
+        days = days[np.is_busday(days)]
+        equity = float(self._account.get_account().equity)
+        if timeframe == "1D":
+            # Noon UTC keeps each point on its own date in any local timezone
+            offsets = np.array([12 * 3600])
+        else:
+            # Regular session (14:30-21:00 UTC) at the requested step
+            step = 900 if timeframe == "15Min" else 3600
+            offsets = np.arange(14 * 3600 + 1800, 21 * 3600 + 1, step)
+        stamps = (days.astype("datetime64[s]").astype(np.int64)[:, None] + offsets).ravel()
+        return types.SimpleNamespace(
+            timestamp=stamps.tolist(),
+            equity=np.linspace(START_CASH, equity, len(stamps)).round(2).tolist(),
+            timeframe=timeframe,
+        )
+
+
+class Delayed:
+    """Adds a fixed round-trip delay to every method call of the wrapped client."""
+
+    def __init__(self, target, seconds):
+        self._target = target
+        self._seconds = seconds
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr) or not self._seconds:
+            return attr
+
+        def call(*args, **kwargs):
+            time.sleep(self._seconds)
+            return attr(*args, **kwargs)
+        return call
+
+
+def _filled_history(name, symbols, count):
+    """count filled orders spread from the experiment start to yesterday (oldest first)."""
+    start = datetime.strptime(config.EXPERIMENT_START_DATE, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    span = max((datetime.now(timezone.utc) - timedelta(days=1) - start).total_seconds(), 1)
+    history = []
+    for i in range(count):
+        stamp = start + timedelta(seconds=span * (i + 1) / (count + 1))
+        symbol = symbols[i % len(symbols)]
+        history.append(types.SimpleNamespace(
+            id=f"{name.lower()}-h{i}", symbol=symbol, side="buy" if i % 2 == 0 else "sell", qty="5",
+            type="limit", order_class="simple", status="filled", limit_price=str(base_price(symbol)),
+            stop_price=None, filled_avg_price=str(base_price(symbol)), legs=None,
+            submitted_at=stamp, created_at=stamp, filled_at=stamp + timedelta(seconds=30),
+        ))
+    return history
+
+
+def build_accounts(models, positions, rows):
+    """
+    Seeds one FakeREST per model: `positions` holdings, each protected by a GTC stop,
+    two filled orders per holding in the history, and START_CASH to spend.
+    Returns {model name: FakeREST}.
+    """
+    from replay import SimAccount
+    from order_events import LocalTradeUpdates
+
+    held = [bench_symbol(i) for i in range(positions)]
+    market = BenchMarket(held + [bench_symbol(positions + i) for i in range(rows)])
+    accounts = {}
+    for info in models:
+        account = SimAccount(info['name'], market, cash=START_CASH)
+        for symbol in held:
+            price = market.prices[symbol]
+            account.positions[symbol] = [10, round(10 * price * 0.97, 2)]
+            account._new_order(symbol, 10, "sell", "stop", "gtc", stop_price=round(price * 0.92, 2))
+        history = _filled_history(info['name'], held or [bench_symbol(0)], 2 * len(held))
+        accounts[info['name']] = FakeREST(account, history, LocalTradeUpdates())
+    return accounts
+
+
+def build_table(positions, rows):
+    """
+    A markdown execution table cycling through HOLD (stop replace), BUY (bracket),
+    SELL (cancel stop, then market sell) and CANCEL rows over the seeded holdings.
+    """
+    lines = [
+        "| ACTION | TICKER | QTY | TYPE | LIMIT_PRICE | STOP_LOSS | TAKE_PROFIT | REASON |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    for i in range(rows):
+        kind = i % 4
+        symbol = bench_symbol(i % positions) if positions and kind != 1 else bench_symbol(positions + i)
+        price = base_price(symbol)
+        if kind == 0:
+            row = ["HOLD", symbol, "N/A", "N/A", "N/A", f"{price * 0.9:.2f}", "N/A"]
+        elif kind == 1:
+            row = ["BUY", symbol, "1", "LIMIT", f"{price:.2f}", f"{price * 0.95:.2f}", f"{price * 1.1:.2f}"]
+        elif kind == 2:
+            row = ["SELL", symbol, "1", "MARKET", "N/A", "N/A", "N/A"]
+        else:
+            row = ["CANCEL", symbol, "N/A", "N/A", "N/A", "N/A", "N/A"]
+        lines.append("| " + " | ".join(row + ["bench"]) + " |")
+    return "\n".join(lines)
+
+
+# -------------------------------------------------
+# Worker (one scenario, own process)
+# -------------------------------------------------
+def install_fakes(scenario, yf_counts):
+    """Points this process at the stand-ins: bench models, fake REST clients, yfinance and pyperclip."""
+    sys.modules["yfinance"] = make_fake_yfinance(scenario["yf_latency_ms"] / 1000, yf_counts)
+    sys.modules["pyperclip"] = make_fake_pyperclip()
+
+    config.MODELS = {
+        str(i): {"name": f"Bench{i}", "env_prefix": f"BENCH{i}"}
+        for i in range(1, scenario["accounts"] + 1)
+    }
+    for info in config.MODELS.values():
+        os.environ[f"{info['env_prefix']}_ALPACA_KEY"] = info['name']
+        os.environ[f"{info['env_prefix']}_ALPACA_SECRET"] = "bench"
+
+    models = list(config.MODELS.values())
+    accounts = build_accounts(models, scenario["positions"], scenario["rows"])
+    latency = scenario["api_latency_ms"] / 1000
+    # get_alpaca_credentials() returns the model name as the key
+    config._build_rest = lambda key, secret, base_url: Delayed(accounts[key], latency)
+
+    from order_events import OrderEventSubscriber
+    OrderEventSubscriber.for_model = classmethod(lambda cls, info: cls(accounts[info['name']].stream))
+    return models
+
+
+def run_prompt(models, scenario):
+    import generate_prompt
+    if scenario["path"] == "prompt_all":
+        generate_prompt.generate_all_prompts(models)
+        return
+    for info in models:
+        generate_prompt.init_session(info)
+        generate_prompt.generate_daily_prompt()
+
+
+def run_execute(models, scenario):
+    import execute_trade as et
+    table = build_table(scenario["positions"], scenario["rows"])
+    for info in models:
+        et.init_session(info)  # Also resets the previous account's per-run state
+        et.main(text=table)
+
+
+def run_refresh(models, scenario):
+    import refresh_engine
+    refresh_engine.run_refresh()
+
+
+RUNNERS = {"prompt": run_prompt, "prompt_all": run_prompt, "execute": run_execute, "refresh": run_refresh}
+MODULES = {
+    "prompt": ["generate_prompt"],
+    "prompt_all": ["generate_prompt"],
+    "execute": ["execute_trade"],
+    "refresh": ["refresh_engine"],
+}
+
+
+def run_worker(scenario):
+    """Runs one scenario and returns its measurements. The scripts' own output is discarded."""
+    yf_counts = Counter()
+    started = time.perf_counter()
+    models = install_fakes(scenario, yf_counts)
+    for name in MODULES[scenario["path"]]:
+        importlib.import_module(name)
+    setup_s = time.perf_counter() - started
+
+    error = None
+    output = io.StringIO()
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            RUNNERS[scenario["path"]](models, scenario)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    wall_s = time.perf_counter() - started
+
+    endpoints = Counter()
+    for stats in config.api_stats().values():
+        for endpoint, e in stats.items():
+            endpoints[endpoint] += e["calls"]
+    return {
+        **scenario,
+        "wall_s": round(wall_s, 4),
+        "setup_s": round(setup_s, 4),
+        "api_calls": sum(endpoints.values()),
+        "yf_calls": sum(yf_counts.values()),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "endpoints": dict(sorted(endpoints.items())),
+        "yf": dict(sorted(yf_counts.items())),
+        "failures": output.getvalue().count("❌"),
+        "error": error,
+    }
+
+
+# -------------------------------------------------
+# Driver
+# -------------------------------------------------
+def scenarios(paths, accounts, positions, rows, api_latency_ms, yf_latency_ms):
+    grid = []
+    for path in paths:
+        for a in accounts:
+            for p in positions:
+                for r in (rows if path == "execute" else [0]):
+                    grid.append({
+                        "path": path, "accounts": a, "positions": p, "rows": r,
+                        "api_latency_ms": api_latency_ms, "yf_latency_ms": yf_latency_ms,
+                    })
+    return grid
+
+
+def scenario_key(result):
+    return tuple(result[k] for k in ("path", "accounts", "positions", "rows", "api_latency_ms", "yf_latency_ms"))
+
+
+def spawn(scenario, rate_limit=False):
+    """Runs a scenario in a fresh interpreter whose logs and working directory are a temporary directory."""
+    with tempfile.TemporaryDirectory(prefix="bench_") as tmp:
+        env = dict(os.environ, LOGS_DIR=str(pathlib.Path(tmp) / "logs"))
+        if not rate_limit:
+            env.update(ALPACA_RATE_PER_MINUTE=UNLIMITED_RATE, ALPACA_RATE_BURST=UNLIMITED_RATE)
+        proc = subprocess.run(
+            [sys.executable, str(pathlib.Path(__file__).resolve()), "--worker", json.dumps(scenario)],
+            cwd=tmp, env=env, capture_output=True, text=True,
+        )
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        return {**scenario, "error": (proc.stderr.strip().splitlines() or ["worker failed"])[-1]}
+    return json.loads(lines[-1])
+
+
+def load_previous():
+    """Latest recorded result per scenario key."""
+    previous = {}
+    if RESULTS_LOG.exists():
+        with open(RESULTS_LOG, "r") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                    previous[scenario_key(result)] = result
+                except (json.JSONDecodeError, KeyError):
+                    continue
+    return previous
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root_dir,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _ints(text):
+    return [int(v) for v in text.split(",") if v.strip()]
+
+
+def main(args):
+    grid = scenarios(args.paths.split(","), _ints(args.accounts), _ints(args.positions), _ints(args.rows),
+                     args.api_latency_ms, args.yf_latency_ms)
+    previous = load_previous()
+    run = {"run": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": _commit(),
+           "repeat": args.repeat, "rate_limit": args.rate_limit}
+    print(f"🏁 Running {len(grid)} scenario(s) x {args.repeat} "
+          f"(API latency {args.api_latency_ms}ms, Yahoo latency {args.yf_latency_ms}ms) ...\n")
+    print(f"{'Path':<10} {'Acct':>4} {'Pos':>4} {'Rows':>4} {'Wall':>9} {'Prev':>9} {'Δ':>7} "
+          f"{'API':>6} {'Yahoo':>6} {'RSS MB':>7}")
+
+    RESULTS_LOG.parent.mkdir(parents=True, exist_ok=True)
+    with open(RESULTS_LOG, "a") as log:
+        for scenario in grid:
+            # Best of N: the fastest run is the least disturbed by the machine
+            runs = [spawn(scenario, args.rate_limit) for _ in range(args.repeat)]
+            ok = [r for r in runs if not r.get("error")]
+            result = {**run, **(min(ok, key=lambda r: r["wall_s"]) if ok else runs[-1])}
+            log.write(json.dumps(result) + "\n")
+
+            label = f"{scenario['path']:<10} {scenario['accounts']:>4} {scenario['positions']:>4} {scenario['rows']:>4}"
+            if result.get("error"):
+                print(f"{label}  ❌ {result['error']}")
+                continue
+            prev = previous.get(scenario_key(result), {}).get("wall_s")
+            change = f"{(result['wall_s'] / prev - 1) * 100:+.0f}%" if prev else "-"
+            prev_str = f"{prev:.3f}s" if prev else "-"
+            flag = " ⚠️" if result["failures"] else ""
+            print(f"{label} {result['wall_s']:>8.3f}s {prev_str:>9} {change:>7} "
+                  f"{result['api_calls']:>6} {result['yf_calls']:>6} {result['peak_rss_mb']:>7.1f}{flag}")
+
+    print(f"\n📂 Results appended to: {RESULTS_LOG}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end benchmarks against local Alpaca/Yahoo stand-ins")
+    parser.add_argument("--paths", default=",".join(PATHS), help="Comma-separated: prompt,prompt_all,execute,refresh")
+    parser.add_argument("--accounts", default=",".join(map(str, DEFAULT_ACCOUNTS)))
+    parser.add_argument("--positions", default=",".join(map(str, DEFAULT_POSITIONS)))
+    parser.add_argument("--rows", default=",".join(map(str, DEFAULT_ROWS)), help="Execution table rows (execute only)")
+    parser.add_argument("--api-latency-ms", type=float, default=0.0, help="Delay added to every Alpaca call")
+    parser.add_argument("--yf-latency-ms", type=float, default=0.0, help="Delay added to every Yahoo call")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario; the fastest is kept")
+    parser.add_argument("--rate-limit", action="store_true", help="Keep the real Alpaca rate budget")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(json.loads(args.worker))))
+    else:
+        main(args)
@@ -0,0 +1,225 @@
+"""
+Builds the dashboard's first-load bundle in logs/dashboard/:
+
+    manifest.json            -> names of the current artifacts (fetched uncached)
+    equity.<hash>.json       -> equity series, downsampled to at most EQUITY_POINTS dates
+    latest.<hash>.json       -> the newest portfolio snapshot only
+    summary.<hash>.json      -> per-model standings, risk metrics, intraday drawdowns and the newest fills
+
+Artifacts are compact JSON named by a hash of their content, so they can be cached
+forever. Compressed variants are not written here (so they never reach git); the
+server compresses each artifact once when it is first served (live_server.py).
+The page's first load is bounded by these sizes however long the experiment runs;
+the full performance.csv / portfolios.json stay available for drill-down.
+
+Usage: python scripts/build_dashboard.py
+"""
+import sys
+import gzip
+import json
+import hashlib
+import pathlib
+from contextlib import closing
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Add root directory to path to import config
+root_dir = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.append(str(root_dir))
+import config
+import datastore
+
+# Configuration
+BUNDLE_DIR = config.LOGS_DIR / "dashboard"
+MANIFEST = BUNDLE_DIR / "manifest.json"
+LAST_UPDATED_LOG = config.LOGS_DIR / "last_updated.json"
+EQUITY_POINTS = 400        # Max dates in the chart series; first and last are always kept
+RECENT_TRANSACTIONS = 20   # The activity feed shows the newest 20 fills
+START_CAPITAL = 1000.0
+HASH_LENGTH = 12
+SUMMARY_METRICS = ["sharpe", "sortino", "ann_vol_pct", "max_drawdown_pct", "current_drawdown_pct", "beta"]
+INTRADAY_METRICS = ["intraday_max_drawdown_pct", "intraday_current_drawdown_pct"]
+
+
+def _dumps(obj):
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def downsample_indexes(n, max_points=EQUITY_POINTS):
+    """Evenly spaced row positions covering [0, n), always including the first and last row."""
+    if n <= max_points:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n - 1, max_points).round().astype(int))
+
+
+def build_equity(conn, models):
+    """
+    Returns ({"models", "dates", "points", "series": {model: [equity]}}, full values array).
+    The series share one downsampled date axis; "points" is the full number of dates.
+    """
+    rows = datastore.equity_rows(conn)
+    dates = sorted({row["date"] for row in rows})
+    position = {dt: i for i, dt in enumerate(dates)}
+    column = {m: j for j, m in enumerate(models)}
+    values = np.full((len(dates), len(models)), np.nan)
+    for row in rows:
+        if row["model"] in column:
+            values[position[row["date"]], column[row["model"]]] = row["equity"]
+
+    keep = downsample_indexes(len(dates))
+    sampled = values[keep].round(2)
+    return {
+        "models": models,
+        "dates": [dates[i] for i in keep],
+        "points": len(dates),
+        "series": {m: [None if np.isnan(v) else float(v) for v in sampled[:, j]] for m, j in column.items()},
+    }, values
+
+
+def build_latest(conn, models):
+    """{"date", "models": {model: snapshot}} for the newest portfolio snapshot."""
+    latest_date = datastore.latest_portfolio_date(conn)
+    if latest_date is None:
+        return {"date": None, "models": {}}
+    view = datastore.portfolios_view(conn, models, date=latest_date)
+    return {"date": latest_date, "models": view.get(latest_date, {})}
+
+
+def _risk_metrics():
+    """Cached analytics for each model, without touching the network; {} if unavailable."""
+    try:
+        import analytics
+        return analytics.get_metrics(refresh_benchmark=False)
+    except Exception as e:
+        print(f"   ⚠️ Risk metrics skipped: {e}")
+        return {}
+
+
+def _intraday_metrics(models):
+    """Drawdowns from the intraday equity store (equity_store.py); {} if unavailable."""
+    try:
+        import equity_store
+        return equity_store.intraday_metrics(models)
+    except Exception as e:
+        print(f"   ⚠️ Intraday metrics skipped: {e}")
+        return {}
+
+
+def build_summary(conn, models, equity, values):
+    """Per-model standings (equity, change, rank) plus risk metrics, intraday drawdowns and the newest fills."""
+    risk = _risk_metrics()
+    intraday = _intraday_metrics(models)
+    last = {}
+    for j, model in enumerate(models):
+        known = values[:, j][~np.isnan(values[:, j])]
+        last[model] = round(float(known[-1]), 2) if len(known) else None
+    ranked = sorted((m for m in models if last[m] is not None), key=lambda m: last[m], reverse=True)
+
+    summary = {}
+    for model in models:
+        equity_now = last[model]
+        summary[model] = {
+            "equity": equity_now,
+            "change_pct": None if equity_now is None else round((equity_now / START_CAPITAL - 1) * 100, 2),
+            "rank": ranked.index(model) + 1 if model in ranked else None,
+            **{k: risk.get(model, {}).get(k) for k in SUMMARY_METRICS},
+            **{k: intraday.get(model, {}).get(k) for k in INTRADAY_METRICS},
+        }
+    dates = equity["dates"]
+    return {
+        "period": [dates[0], dates[-1]] if dates else None,
+        "models": summary,
+        "transactions": datastore.recent_transactions(conn, models, RECENT_TRANSACTIONS),
+    }
+
+
+def _write_if_changed(path, data):
+    if path.exists() and path.read_bytes() == data:
+        return
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+def write_artifact(name, payload):
+    """Writes <name>.<hash>.json. Returns (filename, sizes) with its raw and gzipped sizes."""
+    data = _dumps(payload)
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    filename = f"{name}.{digest}.json"
+    _write_if_changed(BUNDLE_DIR / filename, data)
+    return filename, {"json": len(data), "gz": len(gzip.compress(data, compresslevel=9))}
+
+
+def _load_manifest():
+    try:
+        with open(MANIFEST, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def prune(keep):
+    """Removes artifacts referenced by neither the new nor the previous manifest."""
+    removed = 0
+    for path in BUNDLE_DIR.iterdir():
+        if path.name == MANIFEST.name:
+            continue
+        base = path.name.split(".json")[0] + ".json"
+        if base not in keep:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def build_bundle():
+    """Builds every artifact and swaps in the new manifest. Returns the manifest."""
+    print("\n📦 Building dashboard bundle...")
+
+    models = [info['name'] for info in config.MODELS.values()]
+    with closing(datastore.connect()) as conn:
+        equity, values = build_equity(conn, models)
+        artifacts = {
+            "equity": equity,
+            "latest": build_latest(conn, models),
+            "summary": build_summary(conn, models, equity, values),
+        }
+
+    BUNDLE_DIR.mkdir(parents=True, exist_ok=True)
+    previous = _load_manifest()
+    files, sizes = {}, {}
+    for name, payload in artifacts.items():
+        files[name], sizes[name] = write_artifact(name, payload)
+
+    try:
+        with open(LAST_UPDATED_LOG, "r") as f:
+            last_updated = json.load(f).get("timestamp")
+    except (FileNotFoundError, json.JSONDecodeError):
+        last_updated = None
+
+    if previous.get("files") == files and previous.get("last_updated") == last_updated:
+        print("   ✅ Bundle unchanged")
+        return previous
+
+    manifest = {
+        "generated": datetime.now(timezone.utc).isoformat(),
+        "last_updated": last_updated,
+        "files": files,
+        "sizes": sizes,
+    }
+    _write_if_changed(MANIFEST, json.dumps(manifest, indent=2).encode("utf-8"))
+    # Pages that loaded the previous manifest can still fetch its artifacts
+    removed = prune(set(files.values()) | set((previous.get("files") or {}).values()))
+
+    for name, filename in files.items():
+        s = sizes[name]
+        compressed = " | ".join(f"{k} {v / 1024:.1f} KB" for k, v in s.items() if k != "json")
+        print(f"   ✅ {filename}: {s['json'] / 1024:.1f} KB ({compressed})")
+    if removed:
+        print(f"   🧹 Removed {removed} stale artifact file(s)")
+    print(f"📂 Manifest saved to: {MANIFEST}")
+    return manifest
+
+
+if __name__ == "__main__":
+    build_bundle()
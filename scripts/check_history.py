@@ -1,8 +1,3 @@
-import os
-from dotenv import load_dotenv
-import alpaca_trade_api as tradeapi
-from datetime import datetime, timedelta
-
 import sys
 import pathlib
 # Add root directory to path to import config
@@ -10,9 +5,15 @@ root_dir = pathlib.Path(__file__).parent.parent.resolve()
 sys.path.append(str(root_dir))
 import config
 
-# 1. Select Model and Get API
-model_info = config.select_model()
-api = config.get_alpaca_api(model_info)
+# Set by init_session()
+model_info = None
+api = None
+
+def init_session(selected=None):
+    """Selects the model (interactively unless one is given) and gets its API client."""
+    global model_info, api
+    model_info = selected or config.select_model()
+    api = config.get_alpaca_api(model_info)
 
 def get_history():
     print("\n" + "="*60)
@@ -53,4 +54,5 @@ def get_history():
         print(f"⚠️ Error fetching history: {e}")
 
 if __name__ == "__main__":
+    init_session()
     get_history()
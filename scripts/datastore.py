@@ -0,0 +1,383 @@
+import sys
+import csv
+import os
+import json
+import sqlite3
+import pathlib
+import threading
+import contextlib
+
+# Add root directory to path to import config
+root_dir = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.append(str(root_dir))
+import config
+
+# Configuration
+DATASTORE_DB = config.DATASTORE_DB
+PORTFOLIOS_LOG = config.LOGS_DIR / "portfolios.json"
+TRANSACTIONS_STORE = config.LOGS_DIR / "transactions.jsonl"
+TRANSACTIONS_LOG = config.LOGS_DIR / "transactions.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS equity (
+    date TEXT NOT NULL,
+    model TEXT NOT NULL,
+    equity REAL NOT NULL,
+    PRIMARY KEY (date, model)
+) WITHOUT ROWID;
+
+-- One row per model per snapshot date. equity IS NULL marks a legacy
+-- positions-only entry, which is exported back as a bare list.
+CREATE TABLE IF NOT EXISTS accounts (
+    date TEXT NOT NULL,
+    model TEXT NOT NULL,
+    equity REAL,
+    cash REAL,
+    buying_power REAL,
+    PRIMARY KEY (date, model)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS positions (
+    date TEXT NOT NULL,
+    model TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    qty REAL,
+    avg_cost REAL,
+    current_price REAL,
+    market_value REAL,
+    unrealized_pl REAL,
+    unrealized_pl_pct REAL,
+    sector TEXT,
+    industry TEXT,
+    PRIMARY KEY (date, model, ticker)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS fills (
+    id TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    symbol TEXT,
+    side TEXT,
+    qty REAL,
+    price REAL,
+    timestamp TEXT,
+    submitted_at TEXT,
+    type TEXT
+);
+CREATE INDEX IF NOT EXISTS fills_model_timestamp ON fills (model, timestamp);
+CREATE INDEX IF NOT EXISTS equity_model_date ON equity (model, date);
+CREATE INDEX IF NOT EXISTS fills_timestamp ON fills (timestamp);
+
+-- Size and mtime of each committed log when it was last imported or exported
+CREATE TABLE IF NOT EXISTS synced_logs (
+    path TEXT PRIMARY KEY,
+    signature TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+POSITION_FIELDS = [
+    "ticker", "qty", "avg_cost", "current_price", "market_value",
+    "unrealized_pl", "unrealized_pl_pct", "sector", "industry",
+]
+FILL_FIELDS = ["id", "model", "symbol", "side", "qty", "price", "timestamp", "submitted_at", "type"]
+
+
+def connect(db_path=None):
+    """
+    Opens the datastore in WAL mode, creating the schema if needed.
+    The database is gitignored, so every connect first imports any committed
+    CSV/JSON log that changed since it was last imported or exported (a cold
+    checkout, or a git pull bringing rows added by the refresh workflow).
+    """
+    db_path = pathlib.Path(db_path or DATASTORE_DB)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+
+    imported = import_existing_logs(conn)
+    if imported:
+        print(f"   🗄️ Datastore updated from {', '.join(imported)}: {db_path}")
+    return conn
+
+
+# -------------------------------------------------
+# Upserts
+# -------------------------------------------------
+def upsert_equity(conn, rows):
+    """rows: iterable of (date, model, equity)."""
+    with conn:
+        conn.executemany(
+            "INSERT INTO equity (date, model, equity) VALUES (?, ?, ?) "
+            "ON CONFLICT (date, model) DO UPDATE SET equity = excluded.equity",
+            rows,
+        )
+
+
+def upsert_portfolio(conn, date, model, entry):
+    """
+    Replaces one model's snapshot for a date. entry is either the current
+    {"equity", "cash", "buying_power", "positions"} dict or a legacy list of positions.
+    """
+    if isinstance(entry, list):
+        account = (None, None, None)
+        positions = entry
+    else:
+        account = (entry.get("equity"), entry.get("cash"), entry.get("buying_power"))
+        positions = entry.get("positions", [])
+
+    with conn:
+        conn.execute(
+            "INSERT INTO accounts (date, model, equity, cash, buying_power) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (date, model) DO UPDATE SET equity = excluded.equity, "
+            "cash = excluded.cash, buying_power = excluded.buying_power",
+            (date, model, *account),
+        )
+        # Positions closed since the last refresh today must disappear from the snapshot
+        conn.execute("DELETE FROM positions WHERE date = ? AND model = ?", (date, model))
+        conn.executemany(
+            f"INSERT INTO positions (date, model, {', '.join(POSITION_FIELDS)}) "
+            f"VALUES (?, ?, {', '.join('?' for _ in POSITION_FIELDS)})",
+            [(date, model, *(p.get(f) for f in POSITION_FIELDS)) for p in positions],
+        )
+
+
+def upsert_fills(conn, records):
+    with conn:
+        conn.executemany(
+            f"INSERT INTO fills ({', '.join(FILL_FIELDS)}) VALUES ({', '.join('?' for _ in FILL_FIELDS)}) "
+            "ON CONFLICT (id) DO NOTHING",
+            [tuple(r.get(f) for f in FILL_FIELDS) for r in records],
+        )
+
+
+# -------------------------------------------------
+# Queries
+# -------------------------------------------------
+def equity_rows(conn, since=None, until=None):
+    """Returns (date, model, equity) rows ordered by date, optionally bounded."""
+    query = "SELECT date, model, equity FROM equity WHERE date >= ? AND date <= ? ORDER BY date"
+    return conn.execute(query, (since or "", until or "9999-12-31")).fetchall()
+
+
+def last_equity_before(conn, date):
+    """Returns {model: equity} for each model's latest row strictly before date."""
+    rows = conn.execute(
+        "SELECT model, equity FROM equity e WHERE date = "
+        "(SELECT MAX(date) FROM equity WHERE model = e.model AND date < ?)",
+        (date,),
+    ).fetchall()
+    return {row["model"]: row["equity"] for row in rows}
+
+
+def recent_equity_dates(conn, limit):
+    """Returns the latest `limit` distinct equity dates, oldest first."""
+    rows = conn.execute(
+        "SELECT DISTINCT date FROM equity ORDER BY date DESC LIMIT ?", (limit,)
+    ).fetchall()
+    return sorted(row["date"] for row in rows)
+
+
+def known_fill_ids(conn, ids):
+    """Returns the subset of ids already stored in the fills table."""
+    ids = list(ids)
+    known = set()
+    for i in range(0, len(ids), 500):  # Stay under SQLite's bound-parameter limit
+        chunk = ids[i:i + 500]
+        rows = conn.execute(
+            f"SELECT id FROM fills WHERE id IN ({', '.join('?' for _ in chunk)})", chunk
+        ).fetchall()
+        known.update(row["id"] for row in rows)
+    return known
+
+
+def newest_fill_stamps(conn):
+    """Returns {model: newest submitted_at (or fill timestamp)} from the fills table."""
+    rows = conn.execute(
+        "SELECT model, MAX(COALESCE(submitted_at, timestamp)) AS stamp FROM fills GROUP BY model"
+    ).fetchall()
+    return {row["model"]: row["stamp"] for row in rows}
+
+
+# -------------------------------------------------
+# Exports (files the dashboard reads)
+# -------------------------------------------------
+@contextlib.contextmanager
+def _exporting(conn, path):
+    """
+    Writes an export atomically (readers, including a concurrent connect(), never see a
+    partial file) and records its signature, since it already matches the database.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", newline="") as f:
+        yield f
+    os.replace(tmp, path)
+    _mark_synced(conn, path)
+
+
+def export_performance_csv(conn, path, models):
+    by_date = {}
+    for row in equity_rows(conn):
+        by_date.setdefault(row["date"], {})[row["model"]] = row["equity"]
+
+    with _exporting(conn, path) as f:
+        writer = csv.DictWriter(f, fieldnames=["Date"] + models)
+        writer.writeheader()
+        for dt in sorted(by_date):
+            writer.writerow({"Date": dt, **{m: by_date[dt].get(m, "") for m in models}})
+
+
+def latest_portfolio_date(conn):
+    """Returns the newest portfolio snapshot date, or None if there are none."""
+    return conn.execute("SELECT MAX(date) FROM accounts").fetchone()[0]
+
+
+def portfolios_view(conn, models, date=None):
+    """Builds the dashboard's {date: {model: snapshot}} view, for every date or just one."""
+    where, params = ("WHERE date = ?", (date,)) if date else ("", ())
+    portfolios = {}
+    positions = {}
+    for row in conn.execute(f"SELECT date, model, {', '.join(POSITION_FIELDS)} FROM positions {where}", params):
+        holding = {f: row[f] for f in POSITION_FIELDS if row[f] is not None}
+        positions.setdefault((row["date"], row["model"]), []).append(holding)
+
+    for row in conn.execute(
+        f"SELECT date, model, equity, cash, buying_power FROM accounts {where} ORDER BY date", params
+    ):
+        held = positions.get((row["date"], row["model"]), [])
+        if row["equity"] is None:
+            entry = held
+        else:
+            entry = {
+                "equity": row["equity"],
+                "cash": row["cash"],
+                "buying_power": row["buying_power"],
+                "positions": held,
+            }
+        portfolios.setdefault(row["date"], {})[row["model"]] = entry
+
+    # Keep the configured model order within each date
+    rank = {m: i for i, m in enumerate(models)}
+    return {
+        dt: dict(sorted(entries.items(), key=lambda kv: rank.get(kv[0], len(rank))))
+        for dt, entries in portfolios.items()
+    }
+
+
+def export_portfolios_json(conn, path, models):
+    portfolios = portfolios_view(conn, models)
+    with _exporting(conn, path) as f:
+        json.dump(portfolios, f, indent=2)
+
+
+def transactions_view(conn, models):
+    """Builds the dashboard's {model: [transactions, newest first]} view with an indexed query."""
+    view = {m: [] for m in models}
+    for row in conn.execute(
+        "SELECT model, symbol, side, qty, price, timestamp, type, id FROM fills ORDER BY model, timestamp DESC"
+    ):
+        tx = {k: row[k] for k in ("symbol", "side", "qty", "price", "timestamp", "type", "id")}
+        view.setdefault(row["model"], []).append(tx)
+    return view
+
+
+def recent_transactions(conn, models, limit):
+    """Same shape as transactions_view, holding only the `limit` newest fills across all models."""
+    view = {m: [] for m in models}
+    for row in conn.execute(
+        "SELECT model, symbol, side, qty, price, timestamp, type, id FROM fills ORDER BY timestamp DESC LIMIT ?",
+        (limit,),
+    ):
+        tx = {k: row[k] for k in ("symbol", "side", "qty", "price", "timestamp", "type", "id")}
+        view.setdefault(row["model"], []).append(tx)
+    return view
+
+
+def export_transactions_json(conn, path, models):
+    view = transactions_view(conn, models)
+    with _exporting(conn, path) as f:
+        json.dump(view, f, indent=2)
+
+
+# -------------------------------------------------
+# Syncing from the committed logs
+# -------------------------------------------------
+def _signature(path):
+    stat = path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _needs_import(conn, path):
+    if not path.exists():
+        return False
+    row = conn.execute("SELECT signature FROM synced_logs WHERE path = ?", (path.name,)).fetchone()
+    return row is None or row["signature"] != _signature(path)
+
+
+def _mark_synced(conn, path, signature=None):
+    with conn:
+        conn.execute(
+            "INSERT INTO synced_logs (path, signature) VALUES (?, ?) "
+            "ON CONFLICT (path) DO UPDATE SET signature = excluded.signature",
+            (path.name, signature or _signature(path)),
+        )
+
+
+def _import_performance(conn, path):
+    with open(path, "r", newline="") as f:
+        upsert_equity(conn, [
+            (row["Date"], model, float(value))
+            for row in csv.DictReader(f)
+            for model, value in row.items() if model != "Date" and value not in (None, "")
+        ])
+
+
+def _import_portfolios(conn, path):
+    with open(path, "r") as f:
+        portfolios = json.load(f)
+    for date, models in portfolios.items():
+        for model, entry in models.items():
+            upsert_portfolio(conn, date, model, entry)
+
+
+def _import_transactions_store(conn, path):
+    with open(path, "r") as f:
+        upsert_fills(conn, [json.loads(line) for line in f if line.strip()])
+
+
+def _import_transactions_view(conn, path):
+    with open(path, "r") as f:
+        view = json.load(f)
+    upsert_fills(conn, [{"model": model, **tx} for model, txs in view.items() for tx in txs])
+
+
+def import_existing_logs(conn):
+    """
+    Upserts performance.csv, portfolios.json and the transaction log into the database,
+    each only when it changed since it was last imported or exported. Committed rows
+    win over stored ones for the same key; rows only in the database are kept.
+    Returns the names of the logs that were imported.
+    """
+    sources = [
+        (config.PERFORMANCE_LOG, _import_performance),
+        (PORTFOLIOS_LOG, _import_portfolios),
+        # The append-only store is the source of truth; the view only seeds a tree without one
+        (TRANSACTIONS_STORE, _import_transactions_store) if TRANSACTIONS_STORE.exists()
+        else (TRANSACTIONS_LOG, _import_transactions_view),
+    ]
+    imported = []
+    for path, load in sources:
+        if not _needs_import(conn, path):
+            continue
+        signature = _signature(path)
+        try:
+            load(conn, path)
+        except (json.JSONDecodeError, ValueError, KeyError, IOError) as e:
+            print(f"   ⚠️ Skipped importing {path.name}: {e}")
+            continue
+        _mark_synced(conn, path, signature)
+        imported.append(path.name)
+    return imported
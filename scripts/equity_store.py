@@ -0,0 +1,345 @@
+"""
+Intraday equity store (logs/equity/), three .npy files per model:
+
+    <model>.raw.npy      -> (ts, equity) points: one per refresh, or backfilled from
+                            get_portfolio_history at 15Min/1H; kept for RAW_RETENTION
+    <model>.hourly.npy   -> hourly OHLC buckets rolled up from raw points; kept for HOURLY_RETENTION
+    <model>.daily.npy    -> daily OHLC buckets rolled up from hourly ones; kept forever
+
+Each refresh appends a point and rolls whatever aged out of a tier into the next one,
+so the files stay bounded (about 100 KB per model per decade) however often it runs.
+Timestamps are UTC seconds; a bucket's ts is its start.
+
+The store is not committed: a model without one (a fresh checkout, e.g. the refresh
+workflow) is rebuilt on its first refresh from Alpaca's intraday history for the last
+MAX_BACKFILL_DAYS, plus daily buckets from the datastore's equity for the days before.
+
+Usage: python scripts/equity_store.py [--backfill [--timeframe 15Min|1H] [--days N]]
+"""
+import sys
+import os
+import time
+import pathlib
+import argparse
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Add root directory to path to import config
+root_dir = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.append(str(root_dir))
+import config
+import tracing
+import datastore
+
+# Configuration
+EQUITY_DIR = config.EQUITY_DIR
+RAW_RETENTION = np.timedelta64(7, "D")       # Raw points older than this become hourly buckets
+HOURLY_RETENTION = np.timedelta64(90, "D")   # Hourly buckets older than this become daily buckets
+DAY_OFFSET = np.timedelta64(5, "h")          # Daily buckets run midnight to midnight US/Eastern (EST)
+BACKFILL_TIMEFRAMES = ["15Min", "1H"]
+MAX_BACKFILL_DAYS = 30                       # Alpaca only serves intraday timeframes for periods under a month
+TIERS = ["raw", "hourly", "daily"]
+
+POINT_DTYPE = np.dtype([
+    ("ts", "datetime64[s]"),
+    ("equity", "f8"),
+])
+OHLC_DTYPE = np.dtype([
+    ("ts", "datetime64[s]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("points", "i4"),   # Raw points the bucket was built from
+])
+EMPTY = {"raw": np.empty(0, dtype=POINT_DTYPE), "ohlc": np.empty(0, dtype=OHLC_DTYPE)}
+
+
+def _path(model, tier):
+    return EQUITY_DIR / f"{model}.{tier}.npy"
+
+
+def load_tier(model, tier):
+    """Returns one tier of a model's store as a read-only memory-mapped structured array."""
+    path = _path(model, tier)
+    if not path.exists():
+        return EMPTY["raw" if tier == "raw" else "ohlc"]
+    return np.load(path, mmap_mode="r")
+
+
+def _write(model, tier, rows):
+    EQUITY_DIR.mkdir(parents=True, exist_ok=True)
+    path = _path(model, tier)
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+    np.save(tmp, rows)
+    os.replace(tmp, path)
+
+
+def _now():
+    return np.datetime64(int(time.time()), "s")
+
+
+def _hour_bucket(ts):
+    return ts.astype("datetime64[h]").astype("datetime64[s]")
+
+
+def _day_bucket(ts):
+    # Regular and extended sessions never cross midnight Eastern, so a day bucket is one session
+    return ((ts - DAY_OFFSET).astype("datetime64[D]") + DAY_OFFSET).astype("datetime64[s]")
+
+
+def _dedupe(rows, priority=None):
+    """
+    Sorts rows by ts and keeps one row per ts: the one with the highest priority, and
+    among equals the one that came last (so newer rows win when appended after stored ones).
+    """
+    if not len(rows):
+        return rows
+    order = np.lexsort((rows["ts"],) if priority is None else (rows[priority], rows["ts"]))
+    rows = rows[order]
+    last = np.r_[rows["ts"][1:] != rows["ts"][:-1], True]
+    return rows[last]
+
+
+def _as_ohlc(points):
+    rows = np.empty(len(points), dtype=OHLC_DTYPE)
+    rows["ts"] = points["ts"]
+    for field in ("open", "high", "low", "close"):
+        rows[field] = points["equity"]
+    rows["points"] = 1
+    return rows
+
+
+def _aggregate(rows, keys):
+    """Collapses ts-ordered OHLC rows into one row per bucket key (first open, max high, min low, last close)."""
+    if not len(rows):
+        return EMPTY["ohlc"]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(rows)] - 1
+    buckets = np.empty(len(starts), dtype=OHLC_DTYPE)
+    buckets["ts"] = keys[starts]
+    buckets["open"] = rows["open"][starts]
+    buckets["high"] = np.maximum.reduceat(rows["high"], starts)
+    buckets["low"] = np.minimum.reduceat(rows["low"], starts)
+    buckets["close"] = rows["close"][ends]
+    buckets["points"] = np.add.reduceat(rows["points"], starts)
+    return buckets
+
+
+def _merge_buckets(stored, new):
+    """
+    Adds rolled-up buckets to a tier. A bucket that is already stored (late or backfilled
+    points for a period that was rolled up before) is replaced only by one built from more points.
+    """
+    if not len(new):
+        return stored
+    return _dedupe(np.concatenate([stored, new]), priority="points")
+
+
+def append_points(model, timestamps, equities):
+    """
+    Adds (unix seconds, equity) points to a model's raw tier. Missing or non-positive
+    equity (Alpaca reports 0 for days before an account was funded) is dropped, and a
+    point at an already stored ts replaces it. Returns the number of points kept.
+    """
+    equity = np.array([np.nan if e is None else e for e in equities], dtype=float)
+    points = np.empty(len(equity), dtype=POINT_DTYPE)
+    points["ts"] = np.asarray(timestamps, dtype=np.int64).astype("datetime64[s]")
+    points["equity"] = equity
+    points = points[equity > 0]
+    if not len(points):
+        return 0
+    stored = np.load(_path(model, "raw")) if _path(model, "raw").exists() else EMPTY["raw"]
+    _write(model, "raw", _dedupe(np.concatenate([stored, points])))
+    return len(points)
+
+
+def rollup(model, now=None):
+    """
+    Moves raw points older than RAW_RETENTION into hourly buckets and hourly buckets older
+    than HOURLY_RETENTION into daily ones. Cutoffs fall on bucket boundaries, so a bucket is
+    never split across tiers. Returns {"hourly": buckets rolled up, "daily": buckets rolled up}.
+    """
+    now = now if now is not None else _now()
+    added = {"hourly": 0, "daily": 0}
+
+    raw = np.load(_path(model, "raw")) if _path(model, "raw").exists() else EMPTY["raw"]
+    cutoff = _hour_bucket(now - RAW_RETENTION)
+    old = raw["ts"] < cutoff
+    if old.any():
+        rows = _as_ohlc(raw[old])
+        buckets = _aggregate(rows, _hour_bucket(rows["ts"]))
+        _write(model, "hourly", _merge_buckets(np.array(load_tier(model, "hourly")), buckets))
+        _write(model, "raw", raw[~old])
+        added["hourly"] = len(buckets)
+
+    hourly = np.array(load_tier(model, "hourly"))
+    cutoff = _day_bucket(now - HOURLY_RETENTION)
+    old = hourly["ts"] < cutoff
+    if old.any():
+        rows = hourly[old]
+        buckets = _aggregate(rows, _day_bucket(rows["ts"]))
+        _write(model, "daily", _merge_buckets(np.array(load_tier(model, "daily")), buckets))
+        _write(model, "hourly", hourly[~old])
+        added["daily"] = len(buckets)
+    return added
+
+
+def load_series(model):
+    """
+    The model's full equity curve as one ts-ordered OHLC array: daily buckets, then
+    hourly buckets, then raw points (as single-point buckets).
+    """
+    parts = [load_tier(model, "daily"), load_tier(model, "hourly"), _as_ohlc(load_tier(model, "raw"))]
+    return _dedupe(np.concatenate(parts), priority="points")
+
+
+def drawdowns(series):
+    """
+    Returns (max, current) drawdown in % for an OHLC series. Each bucket's low is measured
+    against the highest high before it or its own open, since its high may come after its low.
+    """
+    if not len(series):
+        return None, None
+    prior_peak = np.r_[-np.inf, np.maximum.accumulate(series["high"])[:-1]]
+    peak = np.maximum(prior_peak, series["open"])
+    max_dd = float(np.min(series["low"] / peak - 1)) * 100
+    current_dd = float(series["close"][-1] / np.max(series["high"]) - 1) * 100
+    return round(max_dd, 2), round(current_dd, 2)
+
+
+def intraday_metrics(models=None):
+    """{model: {"intraday_max_drawdown_pct", "intraday_current_drawdown_pct", "intraday_points"}} for stored models."""
+    models = models or [info["name"] for info in config.MODELS.values()]
+    metrics = {}
+    for model in models:
+        series = load_series(model)
+        if not len(series):
+            continue
+        max_dd, current_dd = drawdowns(series)
+        metrics[model] = {
+            "intraday_max_drawdown_pct": max_dd,
+            "intraday_current_drawdown_pct": current_dd,
+            "intraday_points": int(series["points"].sum()),
+        }
+    return metrics
+
+
+def has_store(model):
+    return any(_path(model, tier).exists() for tier in TIERS)
+
+
+def seed_daily(model, before=None):
+    """
+    Writes the datastore's daily equity (performance.csv) as single-point daily buckets,
+    for days before `before` (the first intraday point) so no day is counted twice.
+    Returns the number of buckets written.
+    """
+    with closing(datastore.connect()) as conn:
+        rows = [(row["date"], row["equity"]) for row in datastore.equity_rows(conn) if row["model"] == model]
+    if not rows:
+        return 0
+    points = np.empty(len(rows), dtype=POINT_DTYPE)
+    points["ts"] = (np.array([d for d, _ in rows], dtype="datetime64[D]") + DAY_OFFSET).astype("datetime64[s]")
+    points["equity"] = [e for _, e in rows]
+    if before is not None:
+        points = points[points["ts"] < _day_bucket(before)]
+    points = points[points["equity"] > 0]
+    if not len(points):
+        return 0
+    _write(model, "daily", _merge_buckets(np.array(load_tier(model, "daily")), _as_ohlc(points)))
+    return len(points)
+
+
+def rebuild(models):
+    """
+    Cold start for {key: model_info} models without a store: backfills the last
+    MAX_BACKFILL_DAYS of 15Min equity, then seeds daily buckets for the days before it.
+    """
+    print(f"   🧱 Rebuilding the intraday equity store for {', '.join(i['name'] for i in models.values())} ...")
+    backfill(models, timeframe="15Min", days=MAX_BACKFILL_DAYS)
+    for info in models.values():
+        model = info["name"]
+        first = load_series(model)["ts"][:1]
+        seeded = seed_daily(model, before=first[0] if len(first) else None)
+        print(f"   📅 {model}: {seeded} daily bucket(s) seeded from the performance history")
+
+
+def record_snapshots(snapshots):
+    """
+    Appends each model's live equity from a refresh (refresh_engine.fetch_all_snapshots)
+    and rolls up its store. Models without a store are rebuilt first.
+    """
+    missing = {key: info for key, info in config.MODELS.items()
+               if info["name"] in snapshots and not has_store(info["name"])}
+    if missing:
+        rebuild(missing)
+
+    now = _now()
+    stored = 0
+    for model_name, snapshot in snapshots.items():
+        account = snapshot.get("account")
+        if account is None:
+            continue
+        try:
+            stored += append_points(model_name, [int(now.astype(np.int64))], [float(account.equity)])
+            rollup(model_name, now)
+        except Exception as e:
+            print(f"   ⚠️ {model_name}: intraday equity not stored: {e}")
+    print(f"   📈 Intraday equity: {stored} point(s) stored in {EQUITY_DIR}")
+    return stored
+
+
+def backfill(models=None, timeframe="15Min", days=7):
+    """
+    Fills the raw tier from Alpaca's intraday portfolio history for the last `days` days,
+    one concurrent request per model, then rolls up. Returns {model: points stored}.
+    """
+    if timeframe not in BACKFILL_TIMEFRAMES:
+        raise ValueError(f"timeframe must be one of {BACKFILL_TIMEFRAMES}")
+    days = max(1, min(days, MAX_BACKFILL_DAYS))
+    models = models or config.MODELS
+
+    def fetch(info):
+        api = config.get_alpaca_api(info)
+        return api.get_portfolio_history(period=f"{days}D", timeframe=timeframe)
+
+    print(f"🔄 Backfilling {timeframe} equity for {len(models)} model(s) over {days} day(s) ...")
+    with ThreadPoolExecutor(max_workers=max(1, len(models))) as pool:
+        futures = {info["name"]: pool.submit(fetch, info) for info in models.values()}
+
+    stored = {}
+    for model_name, future in futures.items():
+        try:
+            history = future.result()
+            stored[model_name] = append_points(model_name, history.timestamp or [], history.equity or [])
+            rollup(model_name)
+            print(f"   ✅ {model_name}: {stored[model_name]} point(s)")
+        except Exception as e:
+            print(f"   ❌ {model_name}: backfill failed: {e}")
+    return stored
+
+
+def print_status(models=None):
+    models = models or [info["name"] for info in config.MODELS.values()]
+    print(f"\n📈 Intraday equity store ({EQUITY_DIR})")
+    metrics = intraday_metrics(models)
+    for model in models:
+        counts = ", ".join(f"{tier} {len(load_tier(model, tier))}" for tier in TIERS)
+        m = metrics.get(model)
+        dd = f" | MaxDD {m['intraday_max_drawdown_pct']:.2f}% | DD {m['intraday_current_drawdown_pct']:.2f}%" if m else ""
+        print(f"   {model:<12} {counts}{dd}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Intraday equity store")
+    parser.add_argument("--backfill", action="store_true", help="Fetch intraday portfolio history from Alpaca")
+    parser.add_argument("--timeframe", choices=BACKFILL_TIMEFRAMES, default="15Min")
+    parser.add_argument("--days", type=int, default=7, help=f"Days to backfill (max {MAX_BACKFILL_DAYS})")
+    args = parser.parse_args()
+    if args.backfill:
+        with tracing.span("stage", "equity_backfill"):
+            backfill(timeframe=args.timeframe, days=args.days)
+    print_status()
@@ -2,13 +2,14 @@ import os
 import pyperclip
 import argparse
 import io
-import csv
 import re
 import time
+import threading
+import contextlib
 from dotenv import load_dotenv
-import alpaca_trade_api as tradeapi
 import pathlib
-from datetime import date
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 import sys
 import pathlib
@@ -16,34 +17,61 @@ import pathlib
 root_dir = pathlib.Path(__file__).parent.parent.resolve()
 sys.path.append(str(root_dir))
 import config
+from order_events import OrderEventSubscriber
+from trade_table import parse_trades_text, DIALECT_LABELS
+import tracing
+
+# 1. Select Model and Get API (set by init_session)
+model_info = None
+api = None
+
+def init_session(selected=None):
+    """Selects the model (interactively unless one is given), gets its API client and resets the per-run state."""
+    global model_info, api
+    reset_session()
+    model_info = selected or config.select_model()
+    # 2. Alpaca Connection (Setup in config.py)
+    api = config.get_alpaca_api(model_info)
+    print(f"✅ Connected to Alpaca for {model_info['name']}")
+
+def reset_session():
+    """
+    Clears everything a previous run left behind (snapshot, log lines, ledger, macro gate,
+    order stream), so one process can execute several models' tables in turn.
+    """
+    global macro_gate, ledger, order_events
+    stop_order_events()
+    session.update(loaded=False, orders={}, positions={}, stale=set(), account=None)
+    execution_logs.clear()
+    macro_gate = None
+    ledger = None
+    order_events = None
 
-# 1. Select Model and Get API
-model_info = config.select_model()
-api = config.get_alpaca_api(model_info)
+# Concurrency: rows for different tickers run on a worker pool
+EXECUTION_MAX_WORKERS = int(os.getenv("EXECUTION_MAX_WORKERS", "8"))
 
-# 2. Alpaca Connection (Setup in config.py)
-print(f"✅ Connected to Alpaca for {model_info['name']}")
+# Batch mode reads one table per model from these file types
+BATCH_SUFFIXES = (".md", ".csv", ".txt")
+CLIPBOARD_MARKER = "📋 CLIPBOARD CONTENT:"
 
 # Execution Logging
 execution_logs = []
+_log_context = threading.local()  # .lines: per-ticker buffer while a worker runs that ticker
+
+# PHASE 2 macro gate for this run: (buys_allowed, reason), or None when not checked
+macro_gate = None
+
+# Buying power for this run's BUYs (risk_engine.BuyingPowerLedger), set by run_trades()
+ledger = None
 
 def log_execution(msg):
     """Prints and stores logging info for file saving."""
     print(msg)
-    execution_logs.append(msg)
-
-HEADER_MAP = {
-    "TICKER": ["TICKER", "TICK", "SYMBOL"],
-    "ACTION": ["ACTION", "ACT"],
-    "QTY": ["QTY", "QUANTITY", "AMOUNT", "SIZE", "SHARES"],
-    "TYPE": ["TYPE", "ORDER TYPE"],
-    "LIMIT_PRICE": ["LIMIT_PRICE", "LIMIT PRICE", "LIMIT", "PRICE"],
-    "STOP_LOSS": ["STOP_LOSS", "STOP LOSS", "STOP", "SL", "RISK MANAGEMENT", "RISK"],
-    "TAKE_PROFIT": ["TAKE_PROFIT", "TAKE PROFIT", "TP", "TARGET"],
-    # Optional / ignored by executor if present
-    "REASON": ["REASON", "WHY", "RATIONALE"],
-}
-
+    lines = getattr(_log_context, "lines", None)
+    if lines is not None:
+        lines.append(msg)
+    else:
+        execution_logs.append(msg)
 
 def clean_val(val, is_numeric=False):
     """
@@ -72,35 +100,171 @@ def clean_val(val, is_numeric=False):
     return s_up
 
 
-def map_headers(row_keys):
+ACTIVE_STATUSES = {"new", "accepted", "partially_filled", "pending_new", "held"}
+OPEN_ORDERS_PAGE = 500  # Alpaca's maximum list_orders page
+
+# Session snapshot: active orders and positions indexed by symbol, loaded once per run and
+# updated locally after every mutation. Symbols whose state is uncertain are marked stale and
+# re-fetched (one symbol-filtered call) the next time they are read.
+session = {"loaded": False, "orders": {}, "positions": {}, "stale": set(), "account": None}
+
+
+def _index_order(order):
+    """Adds an order (and any bracket/OTO legs) to the snapshot if it is active."""
+    if order.status in ACTIVE_STATUSES:
+        by_id = session["orders"].setdefault(order.symbol, {})
+        by_id[order.id] = order
+    for leg in getattr(order, "legs", None) or []:
+        _index_order(leg)
+
+
+def load_session_snapshot():
+    """
+    Loads the account, every open order and every position once and indexes them by symbol.
+    status='open' with nested=False includes 'held' bracket/OCO legs as their own orders;
+    pages are walked back with 'until' so accounts with many live orders are complete.
+    """
+    session["orders"] = {}
+    session["account"] = api.get_account()
+    session["positions"] = {p.symbol: p for p in api.list_positions()}
+    seen = set()
+    until = None
+    while True:
+        page = api.list_orders(status="open", limit=OPEN_ORDERS_PAGE, nested=False,
+                               **({"until": until} if until else {}))
+        fresh = [o for o in page if o.id not in seen]
+        for o in fresh:
+            _index_order(o)
+        seen.update(o.id for o in fresh)
+        if len(page) < OPEN_ORDERS_PAGE or not fresh:
+            break
+        # Newest first; 'until' is exclusive, so step just past the oldest to keep orders sharing its timestamp
+        oldest = page[-1].submitted_at or page[-1].created_at
+        until = (oldest + timedelta(microseconds=1)).isoformat()
+    session["stale"] = set()
+    session["loaded"] = True
+
+
+def _refresh_symbol(ticker):
+    """Re-fetches one symbol's orders and position after a mutation with an unknown outcome."""
+    session["orders"][ticker] = {}
+    for o in api.list_orders(status="all", limit=100, symbols=[ticker]):
+        _index_order(o)
+    try:
+        session["positions"][ticker] = api.get_position(ticker)
+    except Exception:
+        session["positions"].pop(ticker, None)
+    session["stale"].discard(ticker)
+
+
+def _ensure_fresh(ticker=None):
+    if not session["loaded"]:
+        load_session_snapshot()
+    if ticker and ticker in session["stale"]:
+        _refresh_symbol(ticker)
+
+
+def mark_stale(ticker):
+    """Flags a symbol whose orders/position may have changed in ways we cannot infer locally."""
+    session["stale"].add(ticker)
+
+
+def record_submitted(order):
+    """Adds a freshly submitted (or replacement) order to the snapshot."""
+    if session["loaded"]:
+        _index_order(order)
+
+
+def record_cancel_requested(order):
     """
-    Maps whatever headers the AI outputs to the canonical headers we support.
-    Unknown columns are ignored.
+    A cancel request only means the broker accepted it; the order may still be
+    pending_cancel (or filled meanwhile), so the symbol is re-read on next access.
     """
-    mapped = {}
-    for canonical, variations in HEADER_MAP.items():
-        for var in variations:
-            for rk in row_keys:
-                if var == rk.upper().strip():
-                    mapped[canonical] = rk
-                    break
-            if canonical in mapped:
-                break
-    return mapped
+    session["orders"].get(order.symbol, {}).pop(order.id, None)
+    mark_stale(order.symbol)
+
+
+def record_replaced(old_order, new_order):
+    session["orders"].get(old_order.symbol, {}).pop(old_order.id, None)
+    record_submitted(new_order)
 
 
 def get_active_orders(ticker=None):
     """
-    Fetches orders that are currently 'active' in Alpaca.
+    Returns orders that are currently 'active' in Alpaca from the session snapshot.
     Includes 'held' orders which are often legs of bracket/OCO orders.
     """
-    params = {"status": "all", "limit": 100}
-    if ticker:
-        params["symbols"] = [ticker]
-    
-    all_orders = api.list_orders(**params)
-    active_statuses = {"new", "accepted", "partially_filled", "pending_new", "held"}
-    return [o for o in all_orders if o.status in active_statuses]
+    if ticker is None:
+        for stale in list(session["stale"]):
+            _ensure_fresh(stale)
+        _ensure_fresh()
+        return [o for by_id in session["orders"].values() for o in by_id.values()]
+    _ensure_fresh(ticker)
+    return list(session["orders"].get(ticker, {}).values())
+
+
+def refetch_active_orders(ticker):
+    """Re-reads a symbol from Alpaca (used while waiting for cancellations to settle)."""
+    mark_stale(ticker)
+    return get_active_orders(ticker)
+
+
+def get_session_position(ticker):
+    """Returns the snapshot position for a ticker, or None if flat."""
+    _ensure_fresh(ticker)
+    return session["positions"].get(ticker)
+
+
+# -------------------------------------------------
+# Order confirmation (trade_updates stream)
+# -------------------------------------------------
+# Set by start_order_events() when the stream connects; None falls back to polling.
+order_events = None
+
+
+def start_order_events():
+    """Subscribes to this account's trade_updates stream so cancels are confirmed by event."""
+    global order_events
+    try:
+        subscriber = OrderEventSubscriber.for_model(model_info)
+        if subscriber.start():
+            order_events = subscriber
+            print("📡 Listening for order updates (trade_updates stream).")
+            return
+        subscriber.stop()
+        print("⚠️  trade_updates stream did not connect. Falling back to polling.")
+    except Exception as e:
+        print(f"⚠️  trade_updates stream unavailable ({e}). Falling back to polling.")
+
+
+def stop_order_events():
+    if order_events is not None:
+        order_events.stop()
+
+
+def wait_for_cancellations(ticker, orders, timeout):
+    """
+    Waits until cancelled orders reach a terminal state and returns any still active.
+    With the stream this returns as soon as the broker confirms each cancel (one re-read
+    only if something is unconfirmed or filled); otherwise it re-reads once per second.
+    """
+    if order_events is not None:
+        resolved, pending = order_events.wait_for([o.id for o in orders], timeout)
+        confirmed = not pending and all(event == "canceled" for event in resolved.values())
+        if confirmed and not session["orders"].get(ticker):
+            # Every order on the symbol is confirmed cancelled, so the snapshot is exact again
+            session["stale"].discard(ticker)
+            return []
+        return refetch_active_orders(ticker)
+
+    remaining = orders
+    for attempt in range(1, timeout + 1):
+        time.sleep(1)
+        remaining = refetch_active_orders(ticker)
+        if not remaining:
+            return []
+        log_execution(f"   ⏳ Waiting for orders to clear ({attempt}/{timeout})...")
+    return remaining
 
 
 def print_preflight_status():
@@ -109,9 +273,9 @@ def print_preflight_status():
     log_execution(f"📊 ALPACA PRE-FLIGHT STATUS ({model_info['name']})")
     log_execution("=" * 50)
     try:
-        account = api.get_account()
-        positions = api.list_positions()
         orders = get_active_orders()
+        account = session["account"]
+        positions = list(session["positions"].values())
 
         log_execution(f"💰 Equity: ${float(account.equity):,.2f}")
         log_execution(f"💸 Buying Power: ${float(account.buying_power):,.2f}")
@@ -146,105 +310,36 @@ def print_preflight_status():
         log_execution(f"⚠️ Could not fetch account status: {e}")
 
 
-def parse_clipboard_trades():
+def parse_clipboard_trades(text=None):
     """
-    Parses the clipboard for an execution table.
+    Parses the clipboard (or the given text) for an execution table in a single pass
+    (see trade_table.iter_trades).
     Supports:
       1) CSV output (Gemini-style)
       2) Markdown pipe table (ChatGPT/Claude-style)
-      3) Regex fallback (last resort)
+      3) Regex fallback (last resort, only when no table header is found)
     Always returns a list (possibly empty).
     """
-    text = pyperclip.paste().strip()
+    if text is None:
+        text = pyperclip.paste()
+    text = text.strip()
     log_execution("📋 Parsing Portfolio Recommendation from Clipboard...")
     log_execution("-" * 20)
-    log_execution("📋 CLIPBOARD CONTENT:")
+    log_execution(CLIPBOARD_MARKER)
     log_execution(text)
     log_execution("-" * 20 + "\n")
 
     # Note: NO_TRADES rows are handled at the row level during parsing
     # This allows other rows (HOLD, SELL, etc.) to be processed even if NO_TRADES is present
-
-    lines = [l.strip() for l in text.splitlines() if l.strip()]
-    trades = []
-
-    # -----------------------------
-    # 1) CSV MODE (Gemini-style)
-    # -----------------------------
-    header_line_idx = None
-    for i, line in enumerate(lines):
-        if "ACTION" in line.upper() and "TICKER" in line.upper() and "," in line:
-            header_line_idx = i
-            break
-
-    if header_line_idx is not None:
-        csv_data = "\n".join(lines[header_line_idx:])
-        f = io.StringIO(csv_data)
-        reader = csv.DictReader(f)
-        if reader.fieldnames:
-            h_map = map_headers(reader.fieldnames)
-            for row in reader:
-                trade = {canonical: row.get(original) for canonical, original in h_map.items()}
-                if trade.get("ACTION") and trade.get("TICKER"):
-                    trades.append(trade)
-
-        if trades:
-            log_execution(f"🔎 Found {len(trades)} trade(s) (CSV).")
-            return trades
-
-    # -----------------------------
-    # 2) MARKDOWN PIPE TABLE MODE
-    # -----------------------------
-    processed_lines = []
-    for line in lines:
-        if "|" in line:
-            parts = [p.strip() for p in line.split("|") if p.strip()]
-            processed_lines.append(",".join(parts))
-        else:
-            processed_lines.append(line)
-
-    header_idx = -1
-    for i, line in enumerate(processed_lines):
-        if any(h in line.upper() for h in ["ACTION", "TICKER"]):
-            header_idx = i
-            break
-
-    if header_idx != -1:
-        csv_data = "\n".join(processed_lines[header_idx:])
-        f = io.StringIO(csv_data)
-        reader = csv.DictReader(f)
-        fieldnames = reader.fieldnames
-        if fieldnames:
-            h_map = map_headers(fieldnames)
-            for row in reader:
-                trade = {canonical: row.get(original) for canonical, original in h_map.items()}
-                if trade.get("ACTION") and trade.get("TICKER"):
-                    trades.append(trade)
-
-    if trades:
-        log_execution(f"🔎 Found {len(trades)} trade(s) (Markdown table).")
-        return trades
-
-    # -----------------------------
-    # 3) REGEX FALLBACK (last resort)
-    # -----------------------------
-    pattern = r"(?:^|[,\s|])\s*(BUY|SELL|HOLD|CANCEL)\s*[,\s|]\s*([A-Z]+)\s*[,\s|]\s*([A-Z0-9\.]+)\s*[,\s|]\s*([A-Z\s/]+)\s*[,\s|]\s*(\$?[NA\d\.\-]+)\s*[,\s|]\s*(\$?[NA\d\.\-]+)\s*(?:[,\s|]\s*(\$?[NA\d\.\-]+))?"
-    matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
-    for m in matches:
-        trades.append(
-            {
-                "ACTION": m[0].upper(),
-                "TICKER": m[1].upper(),
-                "QTY": m[2],
-                "TYPE": m[3].upper(),
-                "LIMIT_PRICE": m[4],
-                "STOP_LOSS": m[5],
-                "TAKE_PROFIT": m[6] if len(m) > 6 else None,
-            }
+    skipped = []
+    trades, dialect = parse_trades_text(text, skipped)
+    for row in skipped:
+        log_execution(
+            f"⚠️ Skipping row for {clean_val(row.get('TICKER'))}: "
+            f"no single-word ACTION (got '{(row.get('ACTION') or '').strip()}')."
         )
-
     if trades:
-        log_execution(f"🔎 Found {len(trades)} trade(s) (Regex fallback).")
+        log_execution(f"🔎 Found {len(trades)} trade(s) ({DIALECT_LABELS[dialect]}).")
         return trades
 
     log_execution("⚠️ No valid trade data found in clipboard.")
@@ -252,11 +347,11 @@ def parse_clipboard_trades():
 
 
 def manage_hold_protection(ticker, stop_loss_price, dry_run=False):
-    try:
-        qty = int(api.get_position(ticker).qty)
-    except Exception:
+    position = get_session_position(ticker)
+    if position is None:
         log_execution(f"   ⚠️ No open position found for {ticker} to protect.")
         return
+    qty = int(position.qty)
 
     log_execution(f"\n🛡️ SYNCING PROTECTION: {ticker} (Target Stop: ${stop_loss_price:.2f})")
 
@@ -300,15 +395,18 @@ def manage_hold_protection(ticker, stop_loss_price, dry_run=False):
                 return
 
             try:
-                api.replace_order(order.id, stop_price=stop_loss_price)
+                replacement = api.replace_order(order.id, stop_price=stop_loss_price)
+                record_replaced(order, replacement)
                 log_execution(f"   ✅ SUCCESS: Stop-loss update requested for {ticker}.")
                 return
             except Exception as e:
                 log_execution(f"   ⚠️ Replace failed: {e}. Falling back to Cancel/Re-submit.")
                 try:
                     api.cancel_order(order.id)
-                    time.sleep(1)
+                    record_cancel_requested(order)
+                    wait_for_cancellations(ticker, [order], timeout=5)
                 except Exception as ce:
+                    mark_stale(ticker)
                     log_execution(f"   ⚠️ Cancel failed: {ce}.")
                     return
     else:
@@ -319,7 +417,7 @@ def manage_hold_protection(ticker, stop_loss_price, dry_run=False):
         return
 
     try:
-        api.submit_order(
+        order = api.submit_order(
             symbol=ticker,
             qty=qty,
             side="sell",
@@ -327,8 +425,10 @@ def manage_hold_protection(ticker, stop_loss_price, dry_run=False):
             time_in_force="gtc",
             stop_price=stop_loss_price,
         )
+        record_submitted(order)
         log_execution(f"   ✅ SUCCESS: New stop-loss placed for {ticker} @ ${stop_loss_price:.2f}")
     except Exception as e:
+        mark_stale(ticker)
         log_execution(f"   ❌ FAILED to place stop-loss: {e}")
 
 def execute_trade(trade, dry_run=False):
@@ -378,22 +478,19 @@ def execute_trade(trade, dry_run=False):
                     log_execution(f"   [DRY RUN] Would cancel {o.side.upper()} {o.type.upper()} order {price_str} ({status_label})")
                 else:
                     api.cancel_order(o.id)
+                    record_cancel_requested(o)
                     log_execution(f"   ✅ Cancelled order {o.id}")
 
             if not dry_run:
-                # Polling loop: Wait up to 5 seconds for orders to clear
-                attempts = 0
-                while attempts < 5:
-                    time.sleep(1)
-                    remaining = get_active_orders(ticker)
-                    if not remaining:
-                        log_execution(f"   ✅ All orders for {ticker} successfully cancelled.")
-                        return
-                    attempts += 1
-                    log_execution(f"   ⏳ Waiting for cancellations to process ({attempts}/5)...")
-                
+                # Wait up to 5 seconds for the broker to confirm the cancellations
+                remaining = wait_for_cancellations(ticker, active_orders, timeout=5)
+                if not remaining:
+                    log_execution(f"   ✅ All orders for {ticker} successfully cancelled.")
+                    return
+
                 log_execution(f"   ⚠️ {len(remaining)} order(s) still pending cancellation for {ticker}.")
         except Exception as e:
+            mark_stale(ticker)
             log_execution(f"   ❌ CANCEL FAILED: {e}")
         return
 
@@ -408,26 +505,17 @@ def execute_trade(trade, dry_run=False):
                     for o in active_orders:
                         if not dry_run:
                             api.cancel_order(o.id)
+                            record_cancel_requested(o)
                         else:
                             log_execution(f"   [DRY RUN] Would cancel order {o.id}")
                     
                     if not dry_run:
-                        # Polling loop: Wait up to 10 seconds for orders to clear
-                        attempts = 0
-                        while attempts < 10:
-                            time.sleep(1)
-                            remaining = get_active_orders(ticker)
-                            if not remaining:
-                                break
-                            attempts += 1
-                            log_execution(f"   ⏳ Waiting for orders to clear ({attempts}/10)...")
-                        
-                        if attempts == 10:
+                        # Wait up to 10 seconds for the broker to confirm the cancellations
+                        remaining = wait_for_cancellations(ticker, active_orders, timeout=10)
+                        if remaining:
                             log_execution(f"   ⚠️ WARNING: Orders for {ticker} did not clear in time. Sell might fail.")
 
-                try:
-                    api.get_position(ticker)
-                except Exception:
+                if get_session_position(ticker) is None:
                     log_execution(f"   ✅ Position already closed or doesn't exist for {ticker}.")
                     return
 
@@ -436,6 +524,7 @@ def execute_trade(trade, dry_run=False):
                         log_execution(f"   [DRY RUN] Would close position for {ticker}.")
                     else:
                         api.close_position(ticker)
+                        mark_stale(ticker)
                 else:
                     qty = int(qty_str) if qty_str else 0
                     if qty <= 0:
@@ -446,15 +535,22 @@ def execute_trade(trade, dry_run=False):
                         log_execution(f"   [DRY RUN] Would submit MARKET sell {qty} {ticker}.")
                     else:
                         api.submit_order(symbol=ticker, qty=qty, side="sell", type="market", time_in_force="day")
+                        mark_stale(ticker)  # Market order may already be (partially) filled
 
                 log_execution(f"   ✅ SELL submitted for {ticker}")
             except Exception as e:
+                mark_stale(ticker)
                 log_execution(f"   ❌ SELL FAILED: {e}")
             return
 
         if action == "BUY":
             log_execution(f"\n🚀 PROCESSING BUY: {ticker}")
 
+            # --- CHECK 0: Macro Gate (no new BUYs when TNX is up >= +2%) ---
+            if macro_gate is not None and not macro_gate[0]:
+                log_execution(f"   ⛔ MACRO GATE: No new BUYs today ({macro_gate[1]}). Skipping.")
+                return
+
             # --- CHECK 1: Ticker Validity ---
             try:
                 asset = api.get_asset(ticker)
@@ -466,12 +562,10 @@ def execute_trade(trade, dry_run=False):
                 return
 
             # --- CHECK 2: Existing Position (Idempotency) ---
-            try:
-                pos = api.get_position(ticker)
+            pos = get_session_position(ticker)
+            if pos is not None:
                 log_execution(f"   ⚠️ Already Owned: You currently hold {pos.qty} shares of {ticker}. Skipping execution.")
                 return
-            except Exception:
-                pass
 
             # --- CHECK 3: Open Buy Order (Idempotency) ---
             active_orders = get_active_orders(ticker)
@@ -486,28 +580,27 @@ def execute_trade(trade, dry_run=False):
                 log_execution(f"   ⚠️ Skipping {ticker}: Missing/invalid Qty or LIMIT_PRICE.")
                 return
 
-            stop_price = float(stop_loss_str) if stop_loss_str else None
-            tp_price = float(take_profit_str) if take_profit_str else None
-
-            # Guard: STOP_LOSS must be < LIMIT_PRICE if provided
-            if stop_price is not None and stop_price >= limit_price:
+            # Every BUY is a bracket order; prevalidate_buys() already rejected rows missing a leg
+            if not stop_loss_str or not take_profit_str:
+                log_execution("   ❌ Invalid BUY: STOP_LOSS and TAKE_PROFIT are both required. Skipping.")
+                return
+            stop_price = float(stop_loss_str)
+            tp_price = float(take_profit_str)
+            if stop_price >= limit_price:
                 log_execution(f"   ❌ Invalid BUY: STOP_LOSS ({stop_price}) >= LIMIT_PRICE ({limit_price}). Skipping.")
                 return
 
-            account = api.get_account()
-            bp = float(account.buying_power)
+            # Cost is reserved in the run's ledger, so concurrent BUYs never spend the same balance
+            buying_power = get_ledger()
             est_cost = qty * limit_price
-            msg = f"   Order: {action} {qty} {ticker} @ ${limit_price:.2f}"
-            if stop_price or tp_price:
-                sl_str = f"SL: ${stop_price:.2f}" if stop_price else "SL: N/A"
-                tp_str = f"TP: ${tp_price:.2f}" if tp_price else "TP: N/A"
-                msg += f" ({sl_str}, {tp_str})"
-            
+            msg = f"   Order: {action} {qty} {ticker} @ ${limit_price:.2f} (SL: ${stop_price:.2f}, TP: ${tp_price:.2f})"
             msg += f" (Est. Cost: ${est_cost:.2f})"
             log_execution(msg)
 
-            if est_cost > bp:
-                log_execution(f"   ⚠️ WARNING: Insufficient Buying Power! (Need ${est_cost:.2f}, Have ${bp:.2f})")
+            if not buying_power.reserve(est_cost):
+                log_execution(
+                    f"   ⚠️ WARNING: Insufficient Buying Power! (Need ${est_cost:.2f}, Have ${buying_power.available:.2f})"
+                )
                 if not dry_run:
                     return
 
@@ -518,40 +611,150 @@ def execute_trade(trade, dry_run=False):
                 "type": "limit",
                 "time_in_force": "gtc",
                 "limit_price": limit_price,
+                "order_class": "bracket",
+                "stop_loss": {"stop_price": stop_price},
+                "take_profit": {"limit_price": tp_price},
             }
 
-            if stop_price and tp_price:
-                params.update(
-                    {
-                        "order_class": "bracket",
-                        "stop_loss": {"stop_price": stop_price},
-                        "take_profit": {"limit_price": tp_price},
-                    }
-                )
-            elif stop_price:
-                params.update({"order_class": "oto", "stop_loss": {"stop_price": stop_price}})
-            else:
-                params["order_class"] = "simple"
-
             if dry_run:
                 log_execution("   [DRY RUN] Would place buy order.")
             else:
-                api.submit_order(**params)
+                try:
+                    order = api.submit_order(**params)
+                except Exception:
+                    buying_power.release(est_cost)
+                    mark_stale(ticker)  # The order may have been accepted before the error
+                    raise
+                record_submitted(order)
                 log_execution("   ✅ SUCCESS: Buy order placed!")
     except Exception as e:
         log_execution(f"   ❌ EXECUTION ERROR for {ticker}: {e}")
 
 
+def group_trades_by_ticker(trades):
+    """Groups rows by ticker (first-appearance order), keeping each ticker's rows in table order."""
+    groups = {}
+    for trade in trades:
+        ticker = clean_val(trade.get("TICKER")) or ""
+        groups.setdefault(ticker, []).append(trade)
+    return groups
+
+
+def _run_ticker_rows(rows, dry_run):
+    """Runs one ticker's rows in order on a worker, buffering its log lines."""
+    _log_context.lines = []
+    ticker = clean_val(rows[0].get("TICKER"))
+    try:
+        with tracing.span("stage", "execute_ticker", model=model_info['name'], symbol=ticker, rows=len(rows)):
+            for trade in rows:
+                execute_trade(trade, dry_run=dry_run)
+    except Exception as e:
+        log_execution(f"   ❌ EXECUTION ERROR: {e}")
+    finally:
+        lines, _log_context.lines = _log_context.lines, None
+    return lines
+
+
+def has_buys(trades):
+    return any(clean_val(t.get("ACTION")) == "BUY" for t in trades)
+
+
+def check_macro_gate(trades, snapshot=None):
+    """
+    Evaluates the macro gate once per run, only if the table has BUYs. The snapshot
+    comes from the shared macro store unless one is given (e.g. a historical replay).
+    """
+    if not has_buys(trades):
+        return None
+    import macro_data  # yfinance is only needed when there is something to gate
+    try:
+        if snapshot is None:
+            snapshot = macro_data.get_macro_snapshot()
+        allowed, reason = macro_data.macro_gate(snapshot)
+    except Exception as e:
+        log_execution(f"⚠️ Macro gate not applied: {e}")
+        return None
+    log_execution(f"🌐 MACRO GATE: {'New BUYs allowed' if allowed else 'New BUYs BLOCKED'} ({reason})")
+    return allowed, reason
+
+
+def get_ledger():
+    """The run's buying-power ledger, created from the session's account on first use."""
+    global ledger
+    if ledger is None:
+        import risk_engine
+        _ensure_fresh()
+        ledger = risk_engine.BuyingPowerLedger.from_account(session["account"])
+    return ledger
+
+
+def prevalidate_buys(trades):
+    """
+    Checks every BUY row against the risk rules in one pass (risk_engine.validate_buys)
+    before any order is sent. Logs each rejected row and returns the rows left to run.
+    """
+    buys = [t for t in trades if clean_val(t.get("ACTION")) == "BUY"]
+    if not buys:
+        return trades
+    import numpy as np
+    import risk_engine
+
+    def column(name):
+        values = []
+        for t in buys:
+            try:
+                values.append(float(clean_val(t.get(name), is_numeric=True)))
+            except (TypeError, ValueError):
+                values.append(np.nan)
+        return np.array(values)
+
+    limit, stop = column("LIMIT_PRICE"), column("STOP_LOSS")
+    codes, numbers = risk_engine.validate_buys(column("QTY"), limit, stop, column("TAKE_PROFIT"), get_ledger().equity)
+    rejected = set()
+    for i in np.flatnonzero(codes != risk_engine.OK):
+        rejected.add(id(buys[i]))
+        reason = risk_engine.describe(codes[i], i, limit, stop, numbers)
+        log_execution(f"   🛡️ RISK CHECK: BUY {clean_val(buys[i].get('TICKER'))} rejected before any order: {reason}.")
+    if rejected:
+        log_execution(f"🛡️ RISK CHECK: {len(rejected)} of {len(buys)} BUY row(s) rejected.")
+    return [t for t in trades if id(t) not in rejected]
+
+
+def run_trades(trades, dry_run=False, max_workers=EXECUTION_MAX_WORKERS, macro_snapshot=None):
+    """
+    Executes parsed rows with different tickers concurrently. Rows for the same ticker
+    run in table order on one worker, every API call shares the account's rate budget,
+    and each ticker's log lines are appended to the saved log as one block.
+    BUY rows that break the risk rules are dropped (and logged) before any order is sent.
+    """
+    global macro_gate, ledger
+    if not trades:
+        return
+
+    macro_gate = check_macro_gate(trades, macro_snapshot)
+    # Load the session snapshot (and account) once up front; workers then only touch their own symbol
+    _ensure_fresh()
+    ledger = None
+    groups = group_trades_by_ticker(prevalidate_buys(trades))
+    workers = max(1, min(max_workers, len(groups)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ticker") as pool:
+        futures = [pool.submit(_run_ticker_rows, rows, dry_run) for rows in groups.values()]
+        for future in futures:
+            execution_logs.extend(future.result())
+
+
+def execution_log_path(info):
+    file_name = f"{info['name'].lower().replace(' ', '_')}.md"
+    return pathlib.Path(f"logs/trades/{date.today()}") / file_name
+
+
 def save_execution_log():
     """Saves the recorded execution log to a file."""
     if not execution_logs:
         return
 
-    log_dir = pathlib.Path(f"logs/trades/{date.today()}")
-    log_dir.mkdir(parents=True, exist_ok=True)
-    
-    file_name = f"{model_info['name'].lower().replace(' ', '_')}.md"
-    log_file = log_dir / file_name
+    log_file = execution_log_path(model_info)
+    log_file.parent.mkdir(parents=True, exist_ok=True)
     
     # Format as markdown
     content = "# Trade Execution Log\n\n"
@@ -565,19 +768,136 @@ def save_execution_log():
         with open(log_file, "w", encoding="utf-8") as f:
             f.write(content)
         print(f"\n📂 EXECUTION LOG SAVED TO: {log_file}")
+        return log_file
     except Exception as e:
         print(f"\n❌ Failed to save execution log: {e}")
 
 
+def main(dry_run=False, text=None):
+    """Executes the trade table on the clipboard (or in text) for the model chosen in init_session()."""
+    if not dry_run:
+        start_order_events()
+
+    print_preflight_status()
+    trades = parse_clipboard_trades(text)
+    try:
+        run_trades(trades, dry_run=dry_run)
+    finally:
+        stop_order_events()
+    
+    save_execution_log()
+    config.print_api_stats()
+    return trades
+
+
+# -------------------------------------------------
+# Batch mode: one table file per model, executed concurrently
+# -------------------------------------------------
+def read_table_file(path):
+    """
+    Returns the execution table in a file. Plain .md/.csv/.txt tables are returned as is;
+    a saved execution log yields the table recorded under its clipboard section.
+    """
+    # Logs saved on Windows can hold "\r\r\n" line endings; fold them so rows stay adjacent
+    text = re.sub(r"\r+\n", "\n", pathlib.Path(path).read_bytes().decode("utf-8"))
+    lines = text.splitlines()
+    if CLIPBOARD_MARKER in lines:
+        start = lines.index(CLIPBOARD_MARKER) + 1
+        end = lines.index("-" * 20, start) if "-" * 20 in lines[start:] else len(lines)
+        return "\n".join(lines[start:end])
+    return text
+
+
+def find_table_files(tables_dir):
+    """Maps each model to its table file (<model>.md / .csv / .txt, matched case-insensitively)."""
+    found = {}
+    for path in sorted(pathlib.Path(tables_dir).iterdir()):
+        if path.suffix.lower() not in BATCH_SUFFIXES or not path.is_file():
+            continue
+        try:
+            info = config.find_model(path.stem)
+        except ValueError:
+            print(f"   ⚠️ Skipping {path.name}: file name does not match a model.")
+            continue
+        if info['name'] in found:
+            print(f"   ⚠️ Skipping {path.name}: already using {found[info['name']][1].name} for {info['name']}.")
+            continue
+        found[info['name']] = (info, path)
+    return found
+
+
+def _execute_table_file(info, path, dry_run):
+    """Batch worker (own process): runs one model's table against its account, output captured and returned."""
+    started = time.perf_counter()
+    text = read_table_file(path)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        init_session(info)
+        trades = main(dry_run=dry_run, text=text)
+    return {
+        "model": info['name'],
+        "rows": len(trades),
+        "failures": sum("❌" in line for line in execution_logs),
+        "seconds": time.perf_counter() - started,
+        "log_file": str(execution_log_path(info)),
+        "output": output.getvalue(),
+    }
+
+
+def run_batch(tables_dir, dry_run=False):
+    """
+    Executes every model's table in tables_dir concurrently, one process per model
+    (each with its own account client, session snapshot and execution log).
+    """
+    if not pathlib.Path(tables_dir).is_dir():
+        print(f"❌ Batch directory not found: {tables_dir}")
+        return []
+    tables = find_table_files(tables_dir)
+    if not tables:
+        print(f"❌ No model tables ({', '.join(BATCH_SUFFIXES)}) found in {tables_dir}")
+        return []
+
+    print(f"🚀 Batch executing {len(tables)} model(s) from {tables_dir}{' (DRY RUN)' if dry_run else ''} ...")
+    started = time.perf_counter()
+    if any(has_buys(parse_trades_text(read_table_file(path))[0]) for _, path in tables.values()):
+        # Refresh the shared macro store once here so the workers all read it from disk
+        import macro_data
+        macro_data.refresh()
+    results = []
+    # A fresh process per table, so no model's module state can reach another's run
+    with ProcessPoolExecutor(max_workers=len(tables), max_tasks_per_child=1) as pool:
+        futures = {
+            name: pool.submit(_execute_table_file, info, path, dry_run)
+            for name, (info, path) in tables.items()
+        }
+        for name, future in futures.items():
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"   ❌ {name}: batch worker failed: {e}")
+                continue
+            results.append(result)
+            # Workers finish in any order; each model's output is printed as one block, in table order
+            print(f"\n===== {name} =====")
+            print(result["output"].rstrip())
+            status = "✅" if not result["failures"] else "⚠️"
+            print(
+                f"   {status} {name}: {result['rows']} row(s), {result['failures']} failure line(s) "
+                f"in {result['seconds']:.1f}s -> {result['log_file']}"
+            )
+    print(f"   ⏱️ Batch finished in {time.perf_counter() - started:.1f}s")
+    return results
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--batch", metavar="DIR", help="Execute every <model>.md/.csv table in DIR concurrently")
     args = parser.parse_args()
 
-    print_preflight_status()
-    trades = parse_clipboard_trades()
-    for t in trades:
-        execute_trade(t, dry_run=args.dry_run)
-    
-    save_execution_log()
+    if args.batch:
+        run_batch(args.batch, dry_run=args.dry_run)
+    else:
+        init_session()
+        main(dry_run=args.dry_run)
 
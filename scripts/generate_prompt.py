@@ -1,10 +1,11 @@
 import os
 import pyperclip
-import alpaca_trade_api as tradeapi
-import yfinance as yf
+import argparse
+import numpy as np
+import pandas as pd
 from dotenv import load_dotenv
 from datetime import date
-import json
+from concurrent.futures import ThreadPoolExecutor
 import pathlib
 
 import sys
@@ -13,155 +14,147 @@ import pathlib
 root_dir = pathlib.Path(__file__).parent.parent.resolve()
 sys.path.append(str(root_dir))
 import config
+import bar_store
+import macro_data
+import tracing
 
 # -------------------------------------------------
-# 1. Select Model and Get API
+# 1. Select Model and Get API (set by init_session)
 # -------------------------------------------------
-model_info = config.select_model()
-api = config.get_alpaca_api(model_info)
+model_info = None
+api = None
 
-# Macro Data
-MACRO_CACHE_DIR = config.MACRO_CACHE_DIR
+def init_session(selected=None):
+    """Selects the model (interactively unless one is given) and gets its API client."""
+    global model_info, api
+    model_info = selected or config.select_model()
+    api = config.get_alpaca_api(model_info)
 
+# Macro Data
 def get_macro_data():
     """
-    Fetches standardized macro data. Caches results for the day to avoid redundant calls.
+    Returns the (TNX, DXY) prompt lines from the shared macro store (macro_data.py).
+    Only the first session after the numbers expire touches the network.
     """
-    today_str = date.today().isoformat()
-    cache_file = MACRO_CACHE_DIR / f"{today_str}.json"
+    snapshot = macro_data.get_macro_snapshot()
+    return macro_data.format_tnx(snapshot), macro_data.format_dxy(snapshot)
 
-    if cache_file.exists():
-        try:
-            with open(cache_file, "r") as f:
-                data = json.load(f)
-                print(f"   🏠 Loaded Macro Data from cache ({today_str})")
-                return data["tnx"], data["dxy"]
-        except Exception as e:
-            print(f"⚠️ Cache read error: {e}. Re-fetching...")
-
-    # --- TNX ---
-    try:
-        tnx = yf.Ticker("^TNX").history(period="5d")
-        if len(tnx) >= 2:
-            prev = float(tnx["Close"].iloc[-2])
-            last = float(tnx["Close"].iloc[-1])
-            pct = ((last - prev) / prev) * 100 if prev else 0.0
-            tnx_str = f"TNX: {last:.2f} ({pct:+.2f}% vs prior close)"
-        else:
-            tnx_str = "TNX: Not enough data"
-    except Exception as e:
-        tnx_str = f"TNX: Data Error ({e})"
+# -------------------------------------------------
+# Technical Data for Holdings
+# -------------------------------------------------
+MIN_TECH_BARS = 55
+TECH_LOOKBACK_BARS = 126  # ~6 months of daily bars
 
-    # --- DXY (fallback to UUP) ---
-    try:
-        source = "DX-Y.NYB"
-        dxy = yf.Ticker(source).history(period="5d")
 
-        if dxy is None or dxy.empty or len(dxy) < 2:
-            source = "UUP"
-            dxy = yf.Ticker(source).history(period="5d")
+def _trend_label(last_close, sma_20, sma_50):
+    above_20 = last_close > sma_20
+    above_50 = last_close > sma_50
+    return np.select(
+        [above_20 & above_50, ~above_50],
+        ["ABOVE_20&50", "BELOW_50"],
+        default="BELOW_20",
+    )
 
-        if dxy is not None and not dxy.empty and len(dxy) >= 2:
-            col = "Adj Close" if "Adj Close" in dxy.columns else "Close"
-            prev = float(dxy[col].iloc[-2])
-            last = float(dxy[col].iloc[-1])
 
-            direction = "UP" if last > prev else ("DOWN" if last < prev else "FLAT")
-            pct = ((last - prev) / prev) * 100 if prev else 0.0
+def compute_technicals(closes: pd.DataFrame) -> dict:
+    """
+    Computes last close, 20SMA, 50SMA and trend for every column of a
+    (dates x symbols) close-price frame in one set of array operations.
+    Returns: {symbol: (tech_string, last_close)}
+    """
+    arr = closes.to_numpy(dtype=float)
+    # Push each column's NaNs to the top so the newest valid closes line up at the bottom
+    order = np.argsort(~np.isnan(arr), axis=0, kind="stable")
+    aligned = np.take_along_axis(arr, order, axis=0)
+    counts = (~np.isnan(arr)).sum(axis=0)
+
+    last_close = aligned[-1]
+    sma_20 = aligned[-20:].mean(axis=0)
+    sma_50 = aligned[-50:].mean(axis=0)
+    trends = _trend_label(last_close, sma_20, sma_50)
+
+    results = {}
+    for i, symbol in enumerate(closes.columns):
+        if counts[i] < MIN_TECH_BARS:
+            results[symbol] = ("N/A (Insufficient history)", None)
+            continue
+        tech_str = (
+            f"LastClose ${last_close[i]:.2f} | "
+            f"20SMA ${sma_20[i]:.2f} | "
+            f"50SMA ${sma_50[i]:.2f} | "
+            f"Trend {trends[i]}"
+        )
+        results[symbol] = (tech_str, float(last_close[i]))
+    return results
 
-            dxy_str = f"DXY: {direction} ({pct:+.2f}% vs prior close, source={source})"
-        else:
-            dxy_str = "DXY: Not enough data"
-    except Exception as e:
-        dxy_str = f"DXY: Data Error ({e})"
 
-    # Save to cache ONLY if data is valid (not errors)
-    tnx_valid = "Not enough data" not in tnx_str and "Data Error" not in tnx_str
-    dxy_valid = "Not enough data" not in dxy_str and "Data Error" not in dxy_str
-    
-    if tnx_valid and dxy_valid:
-        try:
-            MACRO_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-            with open(cache_file, "w") as f:
-                json.dump({"tnx": tnx_str, "dxy": dxy_str}, f)
-            print(f"   💾 Macro Data cached for {today_str}")
-        except Exception as e:
-            print(f"⚠️ Cache write error: {e}")
-    else:
-        print(f"   ⚠️ Macro Data NOT cached (errors detected, will retry next run)")
+def get_technical_data_batch(symbols) -> dict:
+    """
+    Uses last daily close + 20SMA + 50SMA for every symbol at once.
+    Data source: local bar store (Yahoo Finance daily bars, only gaps are fetched).
+    Returns: {symbol: (tech_string, last_close)}
+    """
+    symbols = sorted(set(symbols))
+    if not symbols:
+        return {}
+
+    try:
+        closes = bar_store.get_close_frame(symbols, lookback=TECH_LOOKBACK_BARS)
+        if closes.empty:
+            return {s: ("N/A (Insufficient history)", None) for s in symbols}
+        return compute_technicals(closes.reindex(columns=symbols))
+    except Exception as e:
+        return {s: (f"Data Error ({e})", None) for s in symbols}
 
-    return tnx_str, dxy_str
 
-# -------------------------------------------------
-# Technical Data for Holdings
-# -------------------------------------------------
 def get_technical_data(symbol: str) -> tuple:
     """
-    Uses last daily close + 20SMA + 50SMA.
-    Data source: Yahoo Finance, daily bars only.
+    Single-symbol convenience wrapper around get_technical_data_batch.
     Returns: (tech_string, last_close) tuple
     """
-    try:
-        hist = yf.Ticker(symbol).history(period="6mo")
-        if hist is None or len(hist) < 55:
-            return "N/A (Insufficient history)", None
-
-        closes = hist["Close"].dropna()
-        if len(closes) < 55:
-            return "N/A (Insufficient close data)", None
-
-        last_close = float(closes.iloc[-1])
-        sma_20 = closes.rolling(20).mean().iloc[-1]
-        sma_50 = closes.rolling(50).mean().iloc[-1]
-
-        above_20 = last_close > sma_20
-        above_50 = last_close > sma_50
-
-        if above_20 and above_50:
-            trend = "ABOVE_20&50"
-        elif not above_50:
-            trend = "BELOW_50"
-        else:
-            trend = "BELOW_20"
-
-        tech_str = (
-            f"LastClose ${last_close:.2f} | "
-            f"20SMA ${sma_20:.2f} | "
-            f"50SMA ${sma_50:.2f} | "
-            f"Trend {trend}"
-        )
-        return tech_str, last_close
-    except Exception as e:
-        return f"Data Error ({e})", None
+    return get_technical_data_batch([symbol])[symbol]
 
 # -------------------------------------------------
 # Prompt Generator
 # -------------------------------------------------
-def generate_daily_prompt():
-    print(f"⏳ Generating {model_info['name']} AI Prompt for {date.today()}...")
+# Account reads behind each prompt; all-models mode issues every (model, call) pair at once
+ACCOUNT_CALLS = {
+    "account": lambda api: api.get_account(),
+    "positions": lambda api: api.list_positions(),
+    "orders": lambda api: api.list_orders(status='open'),
+}
+
+
+def fetch_account_state(api):
+    """Returns (account, positions, open orders) for one account."""
+    return tuple(call(api) for call in ACCOUNT_CALLS.values())
 
-    try:
-        account = api.get_account()
-        positions = api.list_positions()
-        orders = api.list_orders(status='open')
-    except Exception as e:
-        print(f"❌ Alpaca Error: {e}")
-        return
 
+def fetch_shared_data(symbols, model=None):
+    """Macro lines and technicals for symbols, fetched once for every prompt that needs them."""
+    print("   ... Fetching Macro Data ...")
+    with tracing.span("stage", "macro_data", model=model):
+        macro_lines = get_macro_data()
+    technicals = {}
+    if symbols:
+        print(f"   ... Fetching Technicals for {len(set(symbols))} symbol(s) ...")
+        with tracing.span("stage", "technicals", model=model, symbols=len(set(symbols))):
+            technicals = get_technical_data_batch(symbols)
+    return macro_lines, technicals
+
+
+def render_prompt(info, account, positions, orders, macro_lines, technicals):
+    """Builds one model's prompt text from its account state and the shared market data."""
+    tnx_str, dxy_str = macro_lines
     cash = float(account.cash)
     equity = float(account.equity)
     max_risk = equity * 0.015
 
-    # Macro
-    print("   ... Fetching Macro Data ...")
-    tnx_str, dxy_str = get_macro_data()
-
     # Holdings
     holdings_lines = []
     if positions:
-        print(f"   ... Fetching Technicals for {len(positions)} positions ...")
         for p in positions:
-            tech_str, last_close = get_technical_data(p.symbol)
+            tech_str, last_close = technicals[p.symbol]
             entry_price = float(p.avg_entry_price)
             # Calculate PnL from entry price vs last close (more reliable than Alpaca's unrealized_plpc)
             if last_close and entry_price > 0:
@@ -179,7 +172,6 @@ def generate_daily_prompt():
     # Pending Orders
     orders_lines = []
     if orders:
-        print(f"   ... Found {len(orders)} pending orders ...")
         for o in orders:
             # Format: SIDE SYMBOL QTY @ LIMIT/STOP PRICE (TYPE)
             details = []
@@ -198,7 +190,7 @@ def generate_daily_prompt():
     # -------------------------------------------------
     prompt_text = f"""**CURRENT DATE:** {date.today()}
 
-**PORTFOLIO STATUS (ALPACA PAPER - {model_info['name']}):**
+**PORTFOLIO STATUS (ALPACA PAPER - {info['name']}):**
 - Cash: ${cash:.2f}
 - Equity: ${equity:.2f}
 
@@ -306,26 +298,96 @@ ACTION VALUES: BUY, SELL, HOLD, CANCEL, NO_TRADES
 If no actions are taken, use:
 | NO_TRADES | N/A | N/A | N/A | N/A | N/A | N/A | Macro blocked / No valid setups |
 """
+    return prompt_text
 
-    pyperclip.copy(prompt_text)
-    print("✅ PROMPT COPIED TO CLIPBOARD")
 
-    # -------------------------------------------------
-    # LOG PROMPT TO FILE
-    # -------------------------------------------------
+def save_prompt(info, prompt_text):
+    """Writes a prompt to logs/prompts/<date>/<model>.md. Returns the path, or None on failure."""
     log_dir = pathlib.Path(f"logs/prompts/{date.today()}")
     log_dir.mkdir(parents=True, exist_ok=True)
-    
-    file_name = f"{model_info['name'].lower().replace(' ', '_')}.md"
-    log_file = log_dir / file_name
-    
+    log_file = log_dir / f"{info['name'].lower().replace(' ', '_')}.md"
     try:
         with open(log_file, "w", encoding="utf-8") as f:
             f.write(prompt_text)
         print(f"📝 PROMPT SAVED TO: {log_file}")
+        return log_file
     except Exception as e:
         print(f"❌ Failed to save prompt to file: {e}")
 
+
+def generate_daily_prompt():
+    print(f"⏳ Generating {model_info['name']} AI Prompt for {date.today()}...")
+
+    try:
+        account, positions, orders = fetch_account_state(api)
+    except Exception as e:
+        print(f"❌ Alpaca Error: {e}")
+        return
+
+    macro_lines, technicals = fetch_shared_data([p.symbol for p in positions], model=model_info['name'])
+    if orders:
+        print(f"   ... Found {len(orders)} pending orders ...")
+    prompt_text = render_prompt(model_info, account, positions, orders, macro_lines, technicals)
+
+    pyperclip.copy(prompt_text)
+    print("✅ PROMPT COPIED TO CLIPBOARD")
+    save_prompt(model_info, prompt_text)
+
+
+def generate_all_prompts(models=None):
+    """
+    Generates and saves every model's prompt in one run: all accounts are read
+    concurrently, then macro data and the technicals for the union of held symbols
+    are fetched once and shared. Returns {model name: saved path}.
+    """
+    models = models or list(config.MODELS.values())
+    print(f"⏳ Generating prompts for {len(models)} model(s) for {date.today()}...")
+
+    clients = {}
+    for info in models:
+        try:
+            clients[info['name']] = config.get_alpaca_api(info)
+        except ValueError as e:
+            print(f"❌ {e}")
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(clients) * len(ACCOUNT_CALLS))) as pool:
+        futures = {
+            (name, key): pool.submit(call, client)
+            for name, client in clients.items()
+            for key, call in ACCOUNT_CALLS.items()
+        }
+        for (name, key), future in futures.items():
+            try:
+                results.setdefault(name, {})[key] = future.result()
+            except Exception as e:
+                print(f"❌ Alpaca Error ({name}, {key}): {e}")
+    states = {
+        name: tuple(values[key] for key in ACCOUNT_CALLS)
+        for name, values in results.items() if len(values) == len(ACCOUNT_CALLS)
+    }
+
+    symbols = sorted({p.symbol for _, positions, _ in states.values() for p in positions})
+    macro_lines, technicals = fetch_shared_data(symbols)
+
+    saved = {}
+    for info in models:
+        if info['name'] not in states:
+            continue
+        account, positions, orders = states[info['name']]
+        print(f"   ✅ {info['name']}: {len(positions)} position(s), {len(orders)} pending order(s)")
+        saved[info['name']] = save_prompt(info, render_prompt(info, account, positions, orders, macro_lines, technicals))
+    print(f"✅ {len(saved)}/{len(models)} prompt(s) saved (not copied to the clipboard; paste each file)")
+    return saved
+
 # -------------------------------------------------
 if __name__ == "__main__":
-    generate_daily_prompt()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--all", action="store_true", help="Generate every model's prompt with one shared data fetch")
+    args = parser.parse_args()
+
+    if args.all:
+        generate_all_prompts()
+    else:
+        init_session()
+        generate_daily_prompt()
@@ -1,42 +1,52 @@
-import pandas as pd
 from datetime import datetime
+from contextlib import closing
 import sys
 import pathlib
 # Add root directory to path to import config
 root_dir = pathlib.Path(__file__).parent.parent.resolve()
 sys.path.append(str(root_dir))
 import config
+import datastore
 
 # Configuration targets
 PERFORMANCE_LOG = config.PERFORMANCE_LOG
 REPORT_OUTPUT = config.LOGS_DIR / "substack_report.md"
 INTERACTIVE_URL = config.INTERACTIVE_URL
+REPORT_WINDOW = 6  # Latest date plus the 5 before it for the weekly delta
 
 def generate_report():
     if not PERFORMANCE_LOG.exists():
         print(f"❌ Error: {PERFORMANCE_LOG} not found. Run log_performance.py first.")
         return
 
-    # Load data
-    df = pd.read_csv(PERFORMANCE_LOG)
-    df['Date'] = pd.to_datetime(df['Date'])
-    df = df.sort_values('Date')
+    # Load only the rows the report needs (latest + up to 5 prior dates) with an indexed query
+    with closing(datastore.connect()) as conn:
+        dates = datastore.recent_equity_dates(conn, REPORT_WINDOW)
+        rows = datastore.equity_rows(conn, since=dates[0]) if dates else []
 
-    if len(df) < 2:
+    by_date = {}
+    for row in rows:
+        by_date.setdefault(row['date'], {})[row['model']] = row['equity']
+    models = [
+        info['name'] for info in config.MODELS.values()
+        if any(info['name'] in equities for equities in by_date.values())
+    ]
+    table = [(datetime.strptime(d, '%Y-%m-%d'), by_date[d]) for d in sorted(by_date)]
+
+    if len(table) < 2:
         print("❌ Error: Need at least 2 days of data for a comparison report.")
         return
 
     # Get latest and previous data
-    latest = df.iloc[-1]
-    last_week = df.iloc[-6] if len(df) >= 6 else df.iloc[0] # Compare to start of week or first record
+    latest_date, latest = table[-1]
+    last_week_date, last_week = table[-6] if len(table) >= 6 else table[0] # Compare to start of week or first record
     
     start_capital = 1000.0
-    models = [c for c in df.columns if c != 'Date']
 
     # Generate Markdown
     report = []
     report.append(f"# 📊 AI Trading Challenge: Weekly Performance Report (TEST RUN)")
-    report.append(f"**Period**: {last_week['Date'].strftime('%b %d')} - {latest['Date'].strftime('%b %d, %Y')}\n")
+    report.append(f"**Period**: {last_week_date.strftime('%b %d')} - {latest_date.strftime('%b %d, %Y')}\n")
 
     # 1. Summary Table
     report.append("## 📈 Portfolio Overview")
@@ -44,19 +54,59 @@ def generate_report():
     report.append("| :--- | :--- | :--- | :--- |")
 
     for model in models:
-        current = float(latest[model])
-        prev = float(last_week[model])
+        current = float(latest.get(model, 'nan'))
+        prev = float(last_week.get(model, 'nan'))
         total_return = ((current - start_capital) / start_capital) * 100
         weekly_delta = ((current - prev) / prev) * 100
         
         delta_str = f"{weekly_delta:+.2f}%"
         report.append(f"| {model} | ${current:,.2f} | {total_return:+.2f}% | {delta_str} |")
 
+    # 2. Risk metrics over the full history (cached until new equity is logged)
+    try:
+        import analytics
+        metrics = analytics.get_metrics()
+    except Exception as e:
+        print(f"⚠️ Risk metrics unavailable: {e}")
+        metrics = {}
+
+    if metrics:
+        fmt = analytics.format_metric
+        report.append("\n## 📐 Risk Metrics (since inception)")
+        report.append("| AI Model | Sharpe | Sortino | Volatility (ann.) | Max Drawdown | Beta vs SPY |")
+        report.append("| :--- | :--- | :--- | :--- | :--- | :--- |")
+        for model in models:
+            m = metrics.get(model)
+            if not m:
+                continue
+            report.append(
+                f"| {model} | {fmt(m['sharpe'], '.2f')} | {fmt(m['sortino'], '.2f')} | "
+                f"{fmt(m['ann_vol_pct'], '.1f')}% | {fmt(m['max_drawdown_pct'], '.1f')}% "
+                f"({fmt(m['max_drawdown_days'], '.0f')}d) | {fmt(m['beta'], '.2f')} |"
+            )
+
+    # 3. Intraday drawdowns from the equity store (points recorded on every refresh)
+    try:
+        import equity_store
+        intraday = equity_store.intraday_metrics(models)
+    except Exception as e:
+        print(f"⚠️ Intraday metrics unavailable: {e}")
+        intraday = {}
+
+    if intraday:
+        report.append("\n## ⏱️ Intraday Drawdowns")
+        report.append("| AI Model | Max Intraday Drawdown | Current Drawdown |")
+        report.append("| :--- | :--- | :--- |")
+        for model in models:
+            m = intraday.get(model)
+            if m:
+                report.append(f"| {model} | {m['intraday_max_drawdown_pct']:.2f}% | {m['intraday_current_drawdown_pct']:.2f}% |")
+
     report.append("\n## 🏆 Leaderboard")
-    sorted_models = sorted(models, key=lambda m: float(latest[m]), reverse=True)
+    sorted_models = sorted(models, key=lambda m: float(latest.get(m, 'nan')), reverse=True)
     for i, model in enumerate(sorted_models):
         medal = "🥇" if i == 0 else ("🥈" if i == 1 else ("🥉" if i == 2 else "📉"))
-        report.append(f"{medal} **{model}**: ${latest[model]:,.2f}")
+        report.append(f"{medal} **{model}**: ${float(latest.get(model, 'nan')):,.2f}")
 
     report.append(f"\n---")
     report.append(f"🔗 **[View Interactive Dashboard]({INTERACTIVE_URL})**")
@@ -0,0 +1,382 @@
+"""
+Local dashboard server with live updates (asyncio, standard library only):
+
+    GET /              -> index.html
+    GET /logs/...      -> the logs and bundle files the dashboard fetches (LOG_FILES, IMMUTABLE)
+    GET /events        -> Server-Sent Events: one "snapshot" of the latest portfolios, then
+                          "delta" events carrying only the fields that changed per model
+
+Files are held in memory and only re-read when their mtime changes. Text files are
+compressed (gzip, plus brotli when installed) once per version; bundle artifacts never
+change, so they are compressed once at the highest level. Each event is encoded once for every viewer, and a viewer too slow to keep up
+is disconnected; its browser reconnects and starts from a fresh snapshot.
+
+Updates are picked up when a refresh in this process finishes (--schedule runs the
+scheduler here) or when another process rewrites logs/dashboard/manifest.json.
+
+Usage: python scripts/live_server.py [--host 127.0.0.1] [--port 8000] [--schedule]
+"""
+import sys
+import re
+import json
+import gzip
+import signal
+import asyncio
+import pathlib
+import argparse
+import mimetypes
+import contextlib
+import urllib.parse
+from contextlib import closing
+
+# Add root directory to path to import config
+root_dir = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.append(str(root_dir))
+import config
+import datastore
+
+try:
+    import brotli
+except ImportError:  # Optional; responses fall back to gzip
+    brotli = None
+
+# Configuration
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+MANIFEST = config.LOGS_DIR / "dashboard" / "manifest.json"
+LAST_UPDATED_LOG = config.LOGS_DIR / "last_updated.json"
+POLL_SECONDS = 5            # How often the manifest is checked for refreshes made by other processes
+KEEPALIVE_SECONDS = 15      # SSE comment sent to idle viewers so proxies keep the stream open
+IDLE_TIMEOUT = 30           # Seconds a keep-alive connection may wait for its next request
+CLIENT_QUEUE = 32           # Events buffered per viewer before it is dropped as too slow
+RETRY_MS = 5000             # Browser reconnect delay after a dropped stream
+MIN_COMPRESS = 1024         # Smaller responses are sent uncompressed
+
+# URL -> file: index.html and og-image.png from the repo root, plus only the files under
+# logs/ that the dashboard fetches (caches, checkpoints and bench results stay private)
+STATIC_FILES = {"index.html", "og-image.png"}
+LOG_FILES = {
+    "dashboard/manifest.json", "portfolios.json", "performance.csv", "last_updated.json", "transactions.json",
+}
+COMPRESSIBLE = {".html", ".json", ".csv"}
+# Bundle artifacts (build_dashboard.py) are named by content hash and never change
+IMMUTABLE = re.compile(r"^dashboard/[a-z]+\.[0-9a-f]{12}\.json$")
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+# -------------------------------------------------
+# Live state
+# -------------------------------------------------
+def _wire(entry):
+    """A portfolios.json entry with positions keyed by ticker, so deltas name what changed."""
+    if isinstance(entry, list):  # Early snapshots stored positions only
+        entry = {"positions": entry}
+    return {**entry, "positions": {p["ticker"]: p for p in entry.get("positions", [])}}
+
+
+def load_state():
+    """{"date", "last_updated", "models": {model: {"equity", "cash", "buying_power", "positions"}}} from the datastore."""
+    from build_dashboard import build_latest
+    models = [info['name'] for info in config.MODELS.values()]
+    with closing(datastore.connect()) as conn:
+        latest = build_latest(conn, models)
+    try:
+        with open(LAST_UPDATED_LOG, "r") as f:
+            last_updated = json.load(f).get("timestamp")
+    except (FileNotFoundError, json.JSONDecodeError):
+        last_updated = None
+    return {
+        "date": latest["date"],
+        "last_updated": last_updated,
+        "models": {model: _wire(entry) for model, entry in latest["models"].items()},
+    }
+
+
+def diff(old, new):
+    """Keys of new whose values differ from old, recursing into dicts; keys missing from new map to None."""
+    delta = {}
+    for key, value in new.items():
+        before = old.get(key)
+        if isinstance(value, dict) and isinstance(before, dict):
+            nested = diff(before, value)
+            if nested:
+                delta[key] = nested
+        elif key not in old or before != value:
+            delta[key] = value
+    for key in old.keys() - new.keys():
+        delta[key] = None
+    return delta
+
+
+def _event(kind, payload, seq):
+    data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+    return f"id: {seq}\nevent: {kind}\ndata: {data}\n\n".encode("utf-8")
+
+
+class LiveHub:
+    """Holds the current state and fans each change out to every connected viewer's queue."""
+
+    def __init__(self):
+        self.state = None
+        self.seq = 0
+        self.snapshot = b""
+        self.viewers = set()
+
+    def publish(self, state):
+        """Sends viewers the delta from the previous state (a snapshot the first time). Returns False if nothing changed."""
+        if self.state is None:
+            kind, payload = "snapshot", state
+        else:
+            kind, payload = "delta", diff(self.state, state)
+            if not payload:
+                return False
+        self.seq += 1
+        self.state = state
+        self.snapshot = _event("snapshot", state, self.seq)
+        message = self.snapshot if kind == "snapshot" else _event(kind, payload, self.seq)
+        for queue in list(self.viewers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self.drop(queue)
+        return True
+
+    def drop(self, queue):
+        """Ends a viewer's stream (None tells its handler to close)."""
+        self.viewers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def close(self):
+        for queue in list(self.viewers):
+            self.drop(queue)
+
+
+# -------------------------------------------------
+# Static files
+# -------------------------------------------------
+class StaticCache:
+    """File bytes (and their compressed variants) kept in memory per (mtime, size) version."""
+
+    def __init__(self):
+        self.entries = {}
+
+    def resolve(self, url_path):
+        """Maps a URL path to an allowed file, or None."""
+        rel = url_path.lstrip("/") or "index.html"
+        parts = pathlib.PurePosixPath(rel).parts
+        if not parts or any(p.startswith(".") for p in parts):
+            return None, None
+        if rel in STATIC_FILES:
+            return root_dir / rel, rel
+        log_rel = "/".join(parts[1:])
+        if parts[0] == "logs" and (log_rel in LOG_FILES or IMMUTABLE.match(log_rel)):
+            return config.LOGS_DIR.joinpath(*parts[1:]), log_rel
+        return None, None
+
+    def _load(self, path, stat, immutable):
+        data = path.read_bytes()
+        variants = {"identity": data}
+        if path.suffix in COMPRESSIBLE and len(data) >= MIN_COMPRESS:
+            # Immutable artifacts are compressed once for good; other files on every change
+            variants["gzip"] = gzip.compress(data, compresslevel=9 if immutable else 6)
+            if brotli is not None:
+                variants["br"] = brotli.compress(data, quality=11 if immutable else 5)
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        if path.suffix in COMPRESSIBLE:
+            content_type += "; charset=utf-8"
+        return {
+            "version": (stat.st_mtime_ns, stat.st_size),
+            "etag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+            "type": content_type,
+            "variants": variants,
+        }
+
+    async def get(self, url_path):
+        """The cached entry for a URL path (re-read only when the file changed), or None."""
+        path, rel = self.resolve(url_path)
+        if path is None:
+            return None
+        try:
+            stat = path.stat()
+        except OSError:
+            self.entries.pop(path, None)
+            return None
+        entry = self.entries.get(path)
+        if entry is None or entry["version"] != (stat.st_mtime_ns, stat.st_size):
+            immutable = bool(rel and IMMUTABLE.match(rel))
+            entry = await asyncio.to_thread(self._load, path, stat, immutable)
+            entry["immutable"] = immutable
+            self.entries[path] = entry
+        return entry
+
+
+def _pick_encoding(entry, accept_encoding):
+    accepted = {token.split(";")[0].strip() for token in accept_encoding.lower().split(",")}
+    for encoding in ("br", "gzip"):
+        if encoding in accepted and encoding in entry["variants"]:
+            return encoding
+    return "identity"
+
+
+def _response(status, headers, body=b"", head_only=False):
+    headers = {**headers, "Content-Length": str(len(body))}
+    lines = [f"HTTP/1.1 {status} {REASONS[status]}"] + [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (b"" if head_only else body)
+
+
+# -------------------------------------------------
+# Server
+# -------------------------------------------------
+class LiveServer:
+    def __init__(self):
+        self.hub = LiveHub()
+        self.files = StaticCache()
+        self.refreshed = asyncio.Event()
+        self.loop = None
+
+    def notify_refresh(self, snapshots=None):
+        """refresh_engine listener; runs on a worker thread."""
+        self.loop.call_soon_threadsafe(self.refreshed.set)
+
+    async def watch(self):
+        """Reloads the state after every refresh and publishes what changed."""
+        version = object()  # Matches no manifest state, so the first pass always loads (even without a bundle)
+        while True:
+            try:
+                current = MANIFEST.stat().st_mtime_ns
+            except OSError:
+                current = None
+            if current != version or self.refreshed.is_set():
+                self.refreshed.clear()
+                version = current
+                try:
+                    state = await asyncio.to_thread(load_state)
+                    if self.hub.publish(state):
+                        print(f"📡 Update #{self.hub.seq} ({state['date']}) sent to {len(self.hub.viewers)} viewer(s)")
+                except Exception as e:
+                    print(f"⚠️ Live state reload failed: {e}")
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.refreshed.wait(), POLL_SECONDS)
+
+    async def stream(self, writer):
+        """SSE: the current snapshot, then every event until the viewer leaves or falls behind."""
+        queue = asyncio.Queue(CLIENT_QUEUE)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+            b"Connection: keep-alive\r\nX-Accel-Buffering: no\r\n\r\n"
+            + f"retry: {RETRY_MS}\n\n".encode() + self.hub.snapshot
+        )
+        # Subscribed in the same step the snapshot was queued, so no event falls in between
+        self.hub.viewers.add(queue)
+        try:
+            await writer.drain()
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    message = b": keep-alive\n\n"
+                if message is None:
+                    break
+                writer.write(message)
+                await writer.drain()
+        finally:
+            self.hub.viewers.discard(queue)
+
+    async def serve_file(self, writer, path, headers, head_only):
+        entry = await self.files.get(path)
+        if entry is None:
+            writer.write(_response(404, {"Content-Type": "text/plain"}, b"Not found", head_only))
+            return
+        common = {
+            "ETag": entry["etag"],
+            "Cache-Control": "public, max-age=31536000, immutable" if entry["immutable"] else "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if headers.get("if-none-match") == entry["etag"]:
+            writer.write(_response(304, common, head_only=True))
+            return
+        encoding = _pick_encoding(entry, headers.get("accept-encoding", ""))
+        response_headers = {**common, "Content-Type": entry["type"]}
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        writer.write(_response(200, response_headers, entry["variants"][encoding], head_only))
+
+    async def handle(self, reader, writer):
+        """One connection: keep-alive GET/HEAD requests, or a single event stream."""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                request = lines[0].split(" ")
+                if len(request) != 3:
+                    writer.write(_response(400, {"Connection": "close"}))
+                    break
+                method, target, version = request
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if value:
+                        headers[name.strip().lower()] = value.strip()
+                path = urllib.parse.unquote(urllib.parse.urlsplit(target).path)
+
+                if method not in ("GET", "HEAD"):
+                    # Request bodies are never read, so the connection cannot be reused
+                    writer.write(_response(405, {"Allow": "GET, HEAD", "Connection": "close"}))
+                    break
+                if path == "/events" and method == "GET":
+                    await self.stream(writer)
+                    break
+                else:
+                    await self.serve_file(writer, path, headers, method == "HEAD")
+                await writer.drain()
+                if version != "HTTP/1.1" or headers.get("connection", "").lower() == "close":
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+
+async def main(host=DEFAULT_HOST, port=DEFAULT_PORT, schedule=False):
+    import refresh_engine
+    live = LiveServer()
+    live.loop = asyncio.get_running_loop()
+    refresh_engine.REFRESH_LISTENERS.append(live.notify_refresh)
+
+    server = await asyncio.start_server(live.handle, host, port)
+    watcher = asyncio.create_task(live.watch())
+    scheduler = None
+    if schedule:
+        import scheduler as scheduler_module
+        scheduler = scheduler_module.Scheduler()
+        scheduled = asyncio.create_task(scheduler.run())
+    print(f"🌐 Dashboard at http://{host}:{port}/ (live updates on /events{', refresh scheduler running' if schedule else ''})")
+
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        live.loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    print("\n👋 Shutting down ...")
+    server.close()
+    live.hub.close()
+    watcher.cancel()
+    if scheduler is not None:
+        scheduler.stop()
+        await scheduled
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the dashboard with live updates")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--schedule", action="store_true", help="Also run the refresh scheduler in this process")
+    args = parser.parse_args()
+    asyncio.run(main(args.host, args.port, args.schedule))
@@ -1,5 +1,4 @@
 import sys
-import csv
 import json
 import pathlib
 import os
@@ -8,15 +7,48 @@ from datetime import datetime, timezone, timedelta
 root_dir = pathlib.Path(__file__).parent.parent.resolve()
 sys.path.append(str(root_dir))
 import config
+import refresh_engine
+import datastore
 
 # Configuration
 PERFORMANCE_LOG = config.PERFORMANCE_LOG
+PERFORMANCE_CHECKPOINT = config.LOGS_DIR / "performance_checkpoint.json"
 LAST_UPDATED_LOG = config.LOGS_DIR / "last_updated.json"
 EXPERIMENT_START_DATE = config.EXPERIMENT_START_DATE
+START_CAPITAL = 1000.0
 
-def log_all_performance():
-    """Fetches historical equity for all models and rebuilds the performance CSV."""
-    print(f"📈 Rebuilding Performance History (Start: {EXPERIMENT_START_DATE}) ...")
+def load_checkpoint():
+    """Returns the last finalized date (YYYY-MM-DD) recorded in the checkpoint, or None."""
+    if PERFORMANCE_CHECKPOINT.exists():
+        try:
+            with open(PERFORMANCE_CHECKPOINT, 'r') as f:
+                return json.load(f).get("last_finalized")
+        except (json.JSONDecodeError, IOError):
+            return None
+    return None
+
+def save_checkpoint(last_finalized):
+    with open(PERFORMANCE_CHECKPOINT, 'w') as f:
+        json.dump({"last_finalized": last_finalized}, f, indent=2)
+
+def history_start_date(full=False):
+    """First date whose equity still needs fetching: the day after the checkpoint, or the experiment start."""
+    start = datetime.strptime(EXPERIMENT_START_DATE, '%Y-%m-%d').date()
+    last_finalized = None if full else load_checkpoint()
+    if last_finalized and PERFORMANCE_LOG.exists():
+        start = max(start, datetime.strptime(last_finalized, '%Y-%m-%d').date() + timedelta(days=1))
+    return min(start, datetime.now().date())
+
+def log_all_performance(snapshots=None, full=False):
+    """
+    Updates the performance history from historical equity for all models.
+    Rows up to the checkpointed last finalized date are kept in the datastore;
+    only later dates are (re)built and upserted, then performance.csv is exported.
+    Pass full=True to rebuild from EXPERIMENT_START_DATE.
+    Uses pre-fetched refresh_engine snapshots when given, otherwise fetches them.
+    """
+    fetch_start = history_start_date(full=full)
+    print(f"📈 Updating Performance History (Start: {EXPERIMENT_START_DATE}, fetching from {fetch_start}) ...")
     
     # 1. Generate the list of dates we want to cover
     start_dt = datetime.strptime(EXPERIMENT_START_DATE, '%Y-%m-%d')
@@ -28,18 +60,23 @@ def log_all_performance():
         day = start_dt + timedelta(days=i)
         target_dates.append(day.strftime('%Y-%m-%d'))
     
-    # 2. Initialize master_data with default 1000.0 for all models on all target dates
-    master_data = {dt: {info['name']: 1000.0 for info in config.MODELS.values()} for dt in target_dates}
+    # 2. Finalized rows stay in the datastore; only dates from fetch_start on are rebuilt
+    fetch_start_str = fetch_start.strftime('%Y-%m-%d')
+    conn = datastore.connect()
+    master_data = {dt: {} for dt in target_dates if dt >= fetch_start_str}
     
-    # 3. Fetch actual data from Alpaca
-    for key, info in config.MODELS.items():
-        model_name = info['name']
-        print(f"   ... Fetching History for {model_name} ...")
+    # 3. Apply actual data from Alpaca
+    if snapshots is None:
+        snapshots = refresh_engine.fetch_all_snapshots(history_start=fetch_start)
+
+    failed_models = []
+    for model_name, snapshot in snapshots.items():
+        print(f"   ... Applying History for {model_name} ...")
         
         try:
-            api = config.get_alpaca_api(info)
-            # Fetch last 1 month of daily history
-            history = api.get_portfolio_history(period='1M', timeframe='1D')
+            if "history" in snapshot["errors"]:
+                raise snapshot["errors"]["history"]
+            history = snapshot["history"]
             
             for ts, eq in zip(history.timestamp, history.equity):
                 dt_str = datetime.fromtimestamp(ts).strftime('%Y-%m-%d')
@@ -50,34 +87,48 @@ def log_all_performance():
                     master_data[dt_str][model_name] = eq
             
             # --- Live Patch ---
-            # Historical data can lag. Fetch live equity for "today" to ensure absolute accuracy.
+            # Historical data can lag. Use live equity for "today" to ensure absolute accuracy.
             today_str = datetime.now().strftime('%Y-%m-%d')
             if today_str in master_data:
-                account = api.get_account()
-                live_equity = float(account.equity)
+                if "account" in snapshot["errors"]:
+                    raise snapshot["errors"]["account"]
+                live_equity = float(snapshot["account"].equity)
                 master_data[today_str][model_name] = live_equity
                 print(f"   ✨ {model_name} live equity patched: ${live_equity:.2f}")
                 
             print(f"   ✅ {model_name} synced.")
         except Exception as e:
+            failed_models.append(model_name)
             print(f"   ❌ Error fetching {model_name}: {e}")
 
-    # 4. Save to CSV
-    headers = ["Date"] + [info['name'] for info in config.MODELS.values()]
-    
+    # 3b. Days without a history point (weekends, holidays, failed fetches) carry the prior equity forward
+    models = [info['name'] for info in config.MODELS.values()]
+    last_known = {model: START_CAPITAL for model in models}
+    last_known.update(datastore.last_equity_before(conn, fetch_start_str))
+    for dt in sorted(master_data):
+        for model in models:
+            if model in master_data[dt]:
+                last_known[model] = master_data[dt][model]
+            else:
+                master_data[dt][model] = last_known[model]
+
+    # 4. Upsert the rebuilt rows and export the CSV
     try:
-        PERFORMANCE_LOG.parent.mkdir(parents=True, exist_ok=True)
-        with open(PERFORMANCE_LOG, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
-            writer.writeheader()
-            
-            for dt in sorted(master_data.keys()):
-                row = {"Date": dt}
-                for model in headers[1:]:
-                    row[model] = master_data[dt].get(model, 1000.0)
-                writer.writerow(row)
-                
-        print(f"\n📂 Performance history rebuilt and saved to: {PERFORMANCE_LOG}")
+        datastore.upsert_equity(conn, [
+            (dt, model, master_data[dt][model]) for dt in master_data for model in models
+        ])
+        datastore.export_performance_csv(conn, PERFORMANCE_LOG, models)
+        print(f"\n📂 Performance history updated and saved to: {PERFORMANCE_LOG}")
+
+        # Everything before today is final once every model synced; today is re-fetched next run
+        if not failed_models:
+            yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+            finalized = max(load_checkpoint() or "", min(yesterday, target_dates[-1]))
+            if finalized >= EXPERIMENT_START_DATE:
+                save_checkpoint(finalized)
+                print(f"📌 Checkpoint: history finalized through {finalized}")
+        else:
+            print(f"⚠️ Checkpoint not advanced ({', '.join(failed_models)} failed to sync)")
         
         # 5. Write last_updated.json for dashboard
         source = "github_actions" if os.getenv("GITHUB_ACTIONS") else "local"
@@ -91,14 +142,10 @@ def log_all_performance():
         
     except Exception as e:
         print(f"\n❌ Failed to save performance data: {e}")
+    finally:
+        conn.close()
 
 if __name__ == "__main__":
-    log_all_performance()
-    
-    # Also log current portfolio holdings
-    from log_portfolios import log_all_portfolios
-    log_all_portfolios()
-
-    # Log historical transactions
-    from log_transactions import log_transactions
-    log_transactions()
+    # Fetch every model once and write performance, portfolios and transactions
+    # --full ignores the checkpoint and rebuilds from EXPERIMENT_START_DATE
+    refresh_engine.run_refresh(full="--full" in sys.argv)
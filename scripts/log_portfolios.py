@@ -1,12 +1,19 @@
 import sys
+import os
 import json
 import pathlib
-from datetime import datetime
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 
 # Add root directory to path to import config
 root_dir = pathlib.Path(__file__).parent.parent.resolve()
 sys.path.append(str(root_dir))
 import config
+import refresh_engine
+import datastore
+import tracing
 
 # Configuration
 import yfinance as yf
@@ -16,76 +23,134 @@ PORTFOLIOS_LOG = config.LOGS_DIR / "portfolios.json"
 MACRO_CACHE_DIR = config.LOGS_DIR / "macro_cache"
 TICKER_METADATA_CACHE = MACRO_CACHE_DIR / "ticker_metadata.json"
 
+UNKNOWN_METADATA = {"sector": "Unknown", "industry": "Unknown"}
+METADATA_TTL = timedelta(days=30)
+METADATA_MAX_WORKERS = 8
+
+# Loaded once per process; written back once per run by flush_ticker_metadata()
+_metadata_cache = None
+_metadata_dirty = False
+_metadata_failed = {}  # Ticker -> time of its last failed fetch; not retried until METADATA_TTL has passed
+_metadata_lock = threading.Lock()
+
+def _load_metadata_cache():
+    global _metadata_cache
+    if _metadata_cache is None:
+        _metadata_cache = {}
+        if TICKER_METADATA_CACHE.exists():
+            try:
+                with open(TICKER_METADATA_CACHE, 'r') as f:
+                    _metadata_cache = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                pass
+    return _metadata_cache
+
+def _is_fresh(entry, now):
+    fetched_at = entry.get("fetched_at")
+    if not fetched_at:
+        return False
+    return now - datetime.fromisoformat(fetched_at) < METADATA_TTL
+
+def _failed_recently(ticker, now):
+    failed_at = _metadata_failed.get(ticker)
+    return failed_at is not None and now - failed_at < METADATA_TTL
+
+def _fetch_metadata(ticker):
+    """Fetches sector and industry for one ticker from yfinance (slow .info call)."""
+    print(f"      > Fetching metadata for {ticker}...")
+    with tracing.span("yahoo", "info", symbol=ticker):
+        info = yf.Ticker(ticker).info
+    return {
+        "sector": info.get('sector', 'Unknown'),
+        "industry": info.get('industry', 'Unknown'),
+        "fetched_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+def prefetch_ticker_metadata(tickers):
+    """Fetches every missing or expired ticker in parallel and stores the results in memory."""
+    global _metadata_dirty
+    cache = _load_metadata_cache()
+    now = datetime.now()
+    stale = sorted({
+        t for t in tickers
+        if not _failed_recently(t, now) and (t not in cache or not _is_fresh(cache[t], now))
+    })
+    if not stale:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(METADATA_MAX_WORKERS, len(stale))) as pool:
+        futures = {ticker: pool.submit(_fetch_metadata, ticker) for ticker in stale}
+        for ticker, future in futures.items():
+            try:
+                data = future.result()
+            except Exception as e:
+                # Keep serving the expired entry, if any, rather than degrading to Unknown
+                print(f"      ! Error fetching metadata for {ticker}: {e}")
+                _metadata_failed[ticker] = now
+                continue
+            with _metadata_lock:
+                cache[ticker] = data
+                _metadata_dirty = True
+
 def get_ticker_metadata(ticker):
-    """Fetches sector and industry data from yfinance with caching."""
-    # Ensure cache dir exists
-    MACRO_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    
-    cache = {}
-    if TICKER_METADATA_CACHE.exists():
-        try:
-            with open(TICKER_METADATA_CACHE, 'r') as f:
-                cache = json.load(f)
-        except:
-            pass
-            
-    if ticker in cache:
-        return cache[ticker]
-        
-    # Fetch from yfinance
+    """Returns sector and industry data for a ticker from the in-memory cache, fetching on a miss."""
+    cache = _load_metadata_cache()
+    if ticker not in cache:
+        prefetch_ticker_metadata([ticker])
+    entry = cache.get(ticker, UNKNOWN_METADATA)
+    return {"sector": entry.get("sector", "Unknown"), "industry": entry.get("industry", "Unknown")}
+
+def flush_ticker_metadata():
+    """Writes the metadata cache to disk (atomic replace) if anything changed this run."""
+    global _metadata_dirty
+    if not _metadata_dirty:
+        return
     try:
-        print(f"      > Fetching metadata for {ticker}...")
-        tk = yf.Ticker(ticker)
-        info = tk.info
-        data = {
-            "sector": info.get('sector', 'Unknown'),
-            "industry": info.get('industry', 'Unknown')
-        }
-        cache[ticker] = data
-        
-        # Save cache
-        with open(TICKER_METADATA_CACHE, 'w') as f:
-            json.dump(cache, f)
-            
-        return data
+        MACRO_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = TICKER_METADATA_CACHE.with_suffix(".tmp")
+        with _metadata_lock:
+            with open(tmp, 'w') as f:
+                json.dump(_metadata_cache, f)
+            os.replace(tmp, TICKER_METADATA_CACHE)
+            _metadata_dirty = False
     except Exception as e:
-        print(f"      ! Error fetching metadata for {ticker}: {e}")
-        return {"sector": "Unknown", "industry": "Unknown"}
+        print(f"      ! Failed to save metadata cache: {e}")
 
-def load_existing_portfolios():
-    """Load existing portfolio data from JSON file."""
-    if PORTFOLIOS_LOG.exists():
-        try:
-            with open(PORTFOLIOS_LOG, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            return {}
-    return {}
-
-def log_all_portfolios():
-    """Fetches current positions for all models and saves to portfolios.json."""
+def log_all_portfolios(snapshots=None):
+    """
+    Upserts today's positions for all models into the datastore and exports portfolios.json.
+    Uses pre-fetched refresh_engine snapshots when given, otherwise fetches them.
+    """
     print(f"\n📂 Logging Portfolio Holdings...")
     
     today = datetime.now().strftime('%Y-%m-%d')
     
-    # Load existing data
-    all_portfolios = load_existing_portfolios()
-    
     # Initialize today's entry
     today_portfolios = {}
     
-    for key, info in config.MODELS.items():
-        model_name = info['name']
-        print(f"   ... Fetching positions for {model_name} ...")
+    if snapshots is None:
+        snapshots = refresh_engine.fetch_all_snapshots()
+
+    # Resolve metadata for every held ticker across all models in one parallel batch
+    prefetch_ticker_metadata([
+        pos.symbol
+        for snapshot in snapshots.values() if snapshot["positions"]
+        for pos in snapshot["positions"]
+    ])
+
+    for model_name, snapshot in snapshots.items():
+        print(f"   ... Processing positions for {model_name} ...")
         
         try:
-            api = config.get_alpaca_api(info)
+            for name in ("account", "positions"):
+                if name in snapshot["errors"]:
+                    raise snapshot["errors"][name]
             
-            # Fetch Account Data (Equity & Cash)
-            account = api.get_account()
+            # Account Data (Equity & Cash)
+            account = snapshot["account"]
             
-            # Fetch Positions
-            positions = api.list_positions()
+            # Positions
+            positions = snapshot["positions"]
             
             holdings = []
             for pos in positions:
@@ -117,19 +182,17 @@ def log_all_portfolios():
                 print(f"   ✅ {model_name}: All Cash | Equity: ${float(account.equity):.2f}")
                 
         except Exception as e:
-            print(f"   ❌ Error fetching {model_name}: {e}")
-            today_portfolios[model_name] = {
-                "equity": 0, "cash": 0, "buying_power": 0, "positions": []
-            }
+            # Leave the model's stored snapshot untouched rather than overwriting it with zeros
+            print(f"   ❌ Error fetching {model_name}: {e} (keeping previous snapshot)")
     
-    # Update the master data with today's snapshot
-    all_portfolios[today] = today_portfolios
-    
-    # Save to JSON
+    flush_ticker_metadata()
+
+    # Upsert today's snapshot and export the dashboard JSON
     try:
-        PORTFOLIOS_LOG.parent.mkdir(parents=True, exist_ok=True)
-        with open(PORTFOLIOS_LOG, 'w') as f:
-            json.dump(all_portfolios, f, indent=2)
+        with closing(datastore.connect()) as conn:
+            for model_name, entry in today_portfolios.items():
+                datastore.upsert_portfolio(conn, today, model_name, entry)
+            datastore.export_portfolios_json(conn, PORTFOLIOS_LOG, [info['name'] for info in config.MODELS.values()])
         print(f"\n📂 Portfolio holdings saved to: {PORTFOLIOS_LOG}")
     except Exception as e:
         print(f"\n❌ Failed to save portfolio data: {e}")
@@ -1,62 +1,58 @@
 import sys
-import json
 import pathlib
-from datetime import datetime
-import os
+from contextlib import closing
 
 # Add root directory to path to import config
 root_dir = pathlib.Path(__file__).parent.parent.resolve()
 sys.path.append(str(root_dir))
 import config
+import refresh_engine
+import transaction_store
+import datastore
 
 # Configuration
-TRANSACTIONS_LOG = config.LOGS_DIR / "transactions.json"
+TRANSACTIONS_LOG = transaction_store.TRANSACTIONS_LOG
 
-def log_transactions():
-    """Fetches closed orders (transactions) for all models."""
-    print(f"\n📂 Logging Transactions...")
+def log_transactions(snapshots=None):
+    """
+    Appends newly filled orders for all models to the transaction store and
+    datastore, then exports transactions.json.
+    Uses pre-fetched refresh_engine snapshots when given, otherwise fetches them.
+    """
+    print("\n📂 Logging Transactions...")
     
-    all_transactions = {}
-    
-    for key, info in config.MODELS.items():
-        model_name = info['name']
-        print(f"   ... Fetching orders for {model_name} ...")
-        
-        try:
-            api = config.get_alpaca_api(info)
-            # Fetch closed orders, most recent first
-            orders = api.list_orders(status='closed', limit=50) 
-            
-            # Filter for filled orders and format
-            model_txs = []
-            for order in orders:
-                if order.status == 'filled':
-                    tx = {
-                        "symbol": order.symbol,
-                        "side": order.side,
-                        "qty": float(order.qty) if order.qty else 0,
-                        "price": float(order.filled_avg_price) if order.filled_avg_price else 0,
-                        "timestamp": order.filled_at.isoformat() if order.filled_at else order.created_at.isoformat(),
-                        "type": order.type,
-                        "id": order.id
-                    }
-                    model_txs.append(tx)
-            
-            all_transactions[model_name] = model_txs
-            print(f"   ✅ {model_name}: {len(model_txs)} transaction(s)")
+    transaction_store.ensure_seeded()
+
+    if snapshots is None:
+        snapshots = refresh_engine.fetch_all_snapshots()
+
+    # The datastore may be stale or rebuilt, so fills already in the committed store count as known too
+    stored_ids = transaction_store.stored_ids()
+
+    with closing(datastore.connect()) as conn:
+        for model_name, snapshot in snapshots.items():
+            print(f"   ... Processing orders for {model_name} ...")
             
+            try:
+                if "orders" in snapshot["errors"]:
+                    raise snapshot["errors"]["orders"]
+                # Closed orders submitted since the model's cursor, oldest first
+                orders = snapshot["orders"]
+                known_ids = datastore.known_fill_ids(conn, [o.id for o in orders]) | stored_ids
+                new_records = transaction_store.ingest(model_name, orders, known_ids)
+                datastore.upsert_fills(conn, new_records)
+                print(f"   ✅ {model_name}: {len(new_records)} new transaction(s) ({len(orders)} order(s) scanned)")
+                
+            except Exception as e:
+                # Previously stored fills are kept; only this run's new fills are missing
+                print(f"   ❌ Error fetching transactions for {model_name}: {e}")
+
+        # Save to JSON
+        try:
+            datastore.export_transactions_json(conn, TRANSACTIONS_LOG, [info['name'] for info in config.MODELS.values()])
+            print(f"\n📂 Transactions saved to: {TRANSACTIONS_LOG}")
         except Exception as e:
-            print(f"   ❌ Error fetching transactions for {model_name}: {e}")
-            all_transactions[model_name] = []
-
-    # Save to JSON
-    try:
-        TRANSACTIONS_LOG.parent.mkdir(parents=True, exist_ok=True)
-        with open(TRANSACTIONS_LOG, 'w') as f:
-            json.dump(all_transactions, f, indent=2)
-        print(f"\n📂 Transactions saved to: {TRANSACTIONS_LOG}")
-    except Exception as e:
-        print(f"\n❌ Failed to save transaction data: {e}")
+            print(f"\n❌ Failed to save transaction data: {e}")
 
 if __name__ == "__main__":
     log_transactions()
@@ -0,0 +1,272 @@
+import sys
+import os
+import json
+import pathlib
+import threading
+from datetime import datetime, time as dt_time, timedelta
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor
+
+# Add root directory to path to import config
+root_dir = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.append(str(root_dir))
+import config
+import tracing
+
+# Configuration
+MACRO_STORE = config.MACRO_CACHE_DIR / "macro_series.json"
+MARKET_TZ = ZoneInfo("America/New_York")
+SESSION_OPEN = dt_time(9, 30)
+SESSION_CLOSE = dt_time(16, 0)
+INTRADAY_TTL = timedelta(minutes=30)  # Quotes fetched while the market is open go stale quickly
+FAILED_RETRY = timedelta(minutes=10)  # A failed source is not retried by other sessions before this
+HISTORY_PERIOD = "1mo"                # Fetched per symbol; the store keeps the newest MAX_POINTS closes
+MAX_POINTS = 60
+
+# Indicator -> sources tried in order. Expired sources in a chain are fetched together
+# (concurrently), so the fallback runs on stored numbers instead of a second round trip.
+MACRO_SOURCES = {
+    "TNX": ["^TNX"],
+    "DXY": ["DX-Y.NYB", "UUP"],
+}
+TNX_GATE_PCT = 2.0  # PHASE 2 macro gate: no new BUYs when TNX is up this much vs prior close
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _now():
+    return datetime.now(MARKET_TZ)
+
+
+def _in_session(moment):
+    return moment.weekday() < 5 and SESSION_OPEN <= moment.time() < SESSION_CLOSE
+
+
+def _next_open(moment):
+    """Next regular-session open strictly after moment (weekdays; holidays cost one extra fetch)."""
+    day = moment.date()
+    if moment.time() >= SESSION_OPEN:
+        day += timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return datetime.combine(day, SESSION_OPEN, tzinfo=MARKET_TZ)
+
+
+def expires_at(fetched):
+    """
+    Session-aware TTL. A quote fetched during the session is live: it expires after
+    INTRADAY_TTL or at the close, whichever is first, so the settled close is picked up.
+    Anything fetched outside the session cannot change before the next open.
+    """
+    if _in_session(fetched):
+        close = datetime.combine(fetched.date(), SESSION_CLOSE, tzinfo=MARKET_TZ)
+        return min(fetched + INTRADAY_TTL, close)
+    return _next_open(fetched)
+
+
+def _load_store():
+    global _store
+    if _store is None:
+        _store = {}
+        if MACRO_STORE.exists():
+            try:
+                with open(MACRO_STORE, "r") as f:
+                    _store = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                pass
+    return _store
+
+
+def _save_store(store):
+    MACRO_STORE.parent.mkdir(parents=True, exist_ok=True)
+    # Batch workers share the store, so each process writes through its own temp file
+    tmp = MACRO_STORE.with_name(f"{MACRO_STORE.stem}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(store, f, indent=2, sort_keys=True)
+    os.replace(tmp, MACRO_STORE)
+
+
+def _is_fresh(entry, now):
+    if not entry or not entry.get("closes"):
+        return False
+    return now < expires_at(datetime.fromisoformat(entry["fetched"]))
+
+
+def _recently_failed(entry, now):
+    return bool(entry and entry.get("failed")) and now < datetime.fromisoformat(entry["failed"]) + FAILED_RETRY
+
+
+def _stale_symbols(store, now, force=False):
+    """
+    Sources to fetch: for each indicator, every expired source up to the first fresh one
+    (a fresh primary means its fallbacks are not needed). Recent failures wait FAILED_RETRY.
+    """
+    stale = []
+    for sources in MACRO_SOURCES.values():
+        for symbol in sources:
+            entry = store.get(symbol)
+            if force:
+                stale.append(symbol)
+            elif _is_fresh(entry, now):
+                break
+            elif not _recently_failed(entry, now):
+                stale.append(symbol)
+    return stale
+
+
+def _fetch_series(symbol):
+    """Returns (dates, closes) for recent daily bars, including today's live bar during the session."""
+    import yfinance as yf
+    with tracing.span("yahoo", "history", symbol=symbol, period=HISTORY_PERIOD):
+        hist = yf.Ticker(symbol).history(period=HISTORY_PERIOD)
+    if hist is None or hist.empty:
+        return [], []
+    col = "Adj Close" if "Adj Close" in hist.columns else "Close"
+    closes = hist[col].dropna()
+    return [ts.strftime("%Y-%m-%d") for ts in closes.index], [float(v) for v in closes]
+
+
+def _merge(entry, dates, closes, fetched):
+    """Merges fetched closes into a stored entry by date; the newest fetch wins for a date."""
+    series = dict(zip((entry or {}).get("dates", []), (entry or {}).get("closes", [])))
+    series.update(zip(dates, closes))
+    ordered = sorted(series)[-MAX_POINTS:]
+    return {"fetched": fetched.isoformat(), "dates": ordered, "closes": [series[d] for d in ordered]}
+
+
+def _mark_failed(entry, error, now):
+    """Keeps a source's previous numbers and records the failed attempt."""
+    entry = dict(entry or {})
+    entry.update(failed=now.isoformat(), error=error)
+    return entry
+
+
+def refresh(force=False):
+    """
+    Fetches every expired macro source at once on a thread pool and stores the numbers.
+    Failed sources keep their previous numbers; the failure is stored too, so other
+    sessions reuse it for FAILED_RETRY instead of hitting the network again.
+    Returns the store ({symbol: {"fetched", "dates", "closes"[, "failed", "error"]}}).
+    """
+    global _store
+    with _store_lock:
+        now = _now()
+        stale = _stale_symbols(_load_store(), now, force)
+        if stale and not force:
+            # Another session (e.g. a batch worker) may have refreshed the file meanwhile
+            _store = None
+            stale = _stale_symbols(_load_store(), now)
+        store = _load_store()
+        if not stale:
+            return store
+
+        print(f"   🌐 Fetching macro series: {', '.join(stale)} ...")
+        with ThreadPoolExecutor(max_workers=len(stale)) as pool:
+            futures = {s: pool.submit(_fetch_series, s) for s in stale}
+        failed = []
+        for symbol, future in futures.items():
+            try:
+                dates, closes = future.result()
+                error = None if len(closes) >= 2 else "Not enough data"
+            except Exception as e:
+                error = str(e)
+            if error:
+                store[symbol] = _mark_failed(store.get(symbol), error, now)
+                failed.append(symbol)
+            else:
+                store[symbol] = _merge(store.get(symbol), dates, closes, now)
+
+        try:
+            _save_store(store)
+        except Exception as e:
+            print(f"⚠️ Macro store write error: {e}")
+        if failed:
+            print(f"   ⚠️ Macro sources failed ({', '.join(failed)}); stored numbers kept, retry after {FAILED_RETRY}")
+        return store
+
+
+def _change(entry, symbol, stale):
+    closes = entry["closes"]
+    prev, last = closes[-2], closes[-1]
+    return {
+        "source": symbol,
+        "date": entry["dates"][-1],
+        "last": last,
+        "prev": prev,
+        "pct": ((last - prev) / prev) * 100 if prev else 0.0,
+        "stale": stale,
+    }
+
+
+def get_macro_snapshot(refresh_stale=True):
+    """
+    Returns {indicator: {"source", "date", "last", "prev", "pct", "stale"}}.
+    Each indicator uses the first source in MACRO_SOURCES with fresh numbers, else the
+    first with any stored numbers (marked stale), else {"error": last error or None}.
+    Expired sources are re-fetched first unless refresh_stale is False.
+    """
+    store = refresh() if refresh_stale else _load_store()
+    now = _now()
+    snapshot = {}
+    for indicator, sources in MACRO_SOURCES.items():
+        usable = [s for s in sources if len(store.get(s, {}).get("closes", [])) >= 2]
+        fresh = [s for s in usable if _is_fresh(store[s], now)]
+        if fresh or usable:
+            symbol = (fresh or usable)[0]
+            snapshot[indicator] = _change(store[symbol], symbol, stale=not fresh)
+        else:
+            errors = [store[s]["error"] for s in sources if store.get(s, {}).get("error")]
+            snapshot[indicator] = {"error": next((e for e in errors if e != "Not enough data"), None)}
+    return snapshot
+
+
+def _unavailable(value):
+    return value is None or "error" in value
+
+
+def _describe_missing(name, value):
+    error = (value or {}).get("error")
+    return f"{name}: Data Error ({error})" if error else f"{name}: Not enough data"
+
+
+def _as_of(value):
+    return f", as of {value['date']}" if value["stale"] else ""
+
+
+def format_tnx(snapshot):
+    tnx = snapshot.get("TNX")
+    if _unavailable(tnx):
+        return _describe_missing("TNX", tnx)
+    return f"TNX: {tnx['last']:.2f} ({tnx['pct']:+.2f}% vs prior close{_as_of(tnx)})"
+
+
+def format_dxy(snapshot):
+    dxy = snapshot.get("DXY")
+    if _unavailable(dxy):
+        return _describe_missing("DXY", dxy)
+    last, prev = dxy["last"], dxy["prev"]
+    direction = "UP" if last > prev else ("DOWN" if last < prev else "FLAT")
+    return f"DXY: {direction} ({dxy['pct']:+.2f}% vs prior close, source={dxy['source']}{_as_of(dxy)})"
+
+
+def macro_gate(snapshot):
+    """
+    PHASE 2 macro gate. Returns (buys_allowed, reason).
+    Missing TNX data does not block BUYs; the reason says so.
+    """
+    tnx = snapshot.get("TNX")
+    if _unavailable(tnx):
+        return True, "TNX unavailable; macro gate not applied"
+    reason = f"TNX {tnx['pct']:+.2f}% vs prior close{_as_of(tnx)}"
+    if tnx["pct"] >= TNX_GATE_PCT:
+        return False, f"{reason} (>= +{TNX_GATE_PCT:.2f}%)"
+    return True, reason
+
+
+if __name__ == "__main__":
+    snap = get_macro_snapshot()
+    print(f"- {format_tnx(snap)}")
+    print(f"- {format_dxy(snap)}")
+    allowed, reason = macro_gate(snap)
+    print(f"{'✅ New BUYs allowed' if allowed else '⛔ New BUYs blocked'}: {reason}")
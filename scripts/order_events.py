@@ -0,0 +1,130 @@
+import sys
+import time
+import asyncio
+import pathlib
+import threading
+from concurrent.futures import Future, wait
+
+# Add root directory to path to import config
+root_dir = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.append(str(root_dir))
+import config
+
+# trade_updates events after which an order will not change again
+TERMINAL_EVENTS = {"fill", "canceled", "expired", "rejected", "replaced", "done_for_day"}
+CONNECT_TIMEOUT = 5.0  # Seconds to wait for the stream to authenticate and subscribe
+
+
+class LocalTradeUpdates:
+    """
+    In-process stand-in for Alpaca's TradingStream (same subscribe/run/stop surface).
+    Fake brokers call publish() to emit trade_updates messages without a network.
+    """
+
+    def __init__(self):
+        self._handler = None
+        self._loop = None
+        self._queue = None
+        self._running = False
+
+    def subscribe_trade_updates(self, handler):
+        self._handler = handler
+
+    def publish(self, event, order):
+        """Thread-safe: emits {"event": event, "order": order} to the subscriber."""
+        if self._loop is None:
+            return
+        msg = {"stream": "trade_updates", "data": {"event": event, "order": order}}
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, msg)
+
+    async def _run_forever(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._running = True
+        while True:
+            msg = await self._queue.get()
+            if msg is None:
+                break
+            if self._handler:
+                await self._handler(msg)
+        self._running = False
+
+    def stop(self):
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+
+
+class OrderEventSubscriber:
+    """
+    Listens to the trade_updates stream on a background asyncio loop and resolves
+    one Future per order id when that order reaches a terminal event.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._lock = threading.Lock()
+        self._futures = {}   # order id -> Future resolved with the terminal event name
+        self._terminal = {}  # order id -> terminal event seen before anyone waited on it
+        self._thread = None
+        stream.subscribe_trade_updates(self._on_update)
+
+    @classmethod
+    def for_model(cls, model_info):
+        """Builds a subscriber on Alpaca's paper trading stream for a model's account."""
+        from alpaca_trade_api.stream import TradingStream
+        key, secret, base_url = config.get_alpaca_credentials(model_info)
+        return cls(TradingStream(key, secret, base_url, raw_data=True))
+
+    async def _on_update(self, msg):
+        data = msg.get("data", msg)
+        event = data.get("event")
+        order_id = (data.get("order") or {}).get("id")
+        if not order_id or event not in TERMINAL_EVENTS:
+            return
+        with self._lock:
+            future = self._futures.pop(order_id, None)
+            if future is None:
+                self._terminal[order_id] = event
+        if future is not None and not future.done():
+            future.set_result(event)
+
+    def start(self, connect_timeout=CONNECT_TIMEOUT):
+        """Starts the stream thread and waits until it is subscribed. Returns False if it never connects."""
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self._stream._run_forever()),
+            name="trade-updates",
+            daemon=True,
+        )
+        self._thread.start()
+        deadline = time.monotonic() + connect_timeout
+        # TradingStream flips _running once authenticated and listening
+        while time.monotonic() < deadline:
+            if getattr(self._stream, "_running", False):
+                return True
+            time.sleep(0.05)
+        return False
+
+    def stop(self):
+        try:
+            self._stream.stop()
+        except Exception:
+            pass
+
+    def watch(self, order_id):
+        """Registers interest in an order. Call before (or right after) the mutation."""
+        with self._lock:
+            if order_id in self._terminal:
+                future = Future()
+                future.set_result(self._terminal.pop(order_id))
+                return future
+            return self._futures.setdefault(order_id, Future())
+
+    def wait_for(self, order_ids, timeout):
+        """
+        Blocks until every order reaches a terminal event or the timeout expires.
+        Returns ({order_id: event} for resolved orders, set of still-pending ids).
+        """
+        futures = {order_id: self.watch(order_id) for order_id in order_ids}
+        wait(futures.values(), timeout=timeout)
+        resolved = {oid: f.result() for oid, f in futures.items() if f.done()}
+        return resolved, set(futures) - set(resolved)
@@ -0,0 +1,186 @@
+import sys
+import os
+import time
+import types
+import pathlib
+from contextlib import closing
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+# Add root directory to path to import config
+root_dir = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.append(str(root_dir))
+import config
+import transaction_store
+import datastore
+import tracing
+
+# Configuration
+# Upper bound on concurrent Alpaca requests across all models
+MAX_WORKERS = int(os.getenv("REFRESH_MAX_WORKERS", "32"))
+
+# Portfolio history is requested in bounded daily ranges so backfills past one month stay complete
+HISTORY_CHUNK_DAYS = 28
+
+# Calls issued for every model on each refresh. Each takes the model's client.
+SNAPSHOT_CALLS = {
+    "account": lambda api: api.get_account(),
+    "positions": lambda api: api.list_positions(),
+}
+SNAPSHOT_KEYS = list(SNAPSHOT_CALLS) + ["history", "orders"]
+
+# Called with the snapshots once run_refresh has written everything (e.g. live_server.py pushing updates)
+REFRESH_LISTENERS = []
+
+
+def history_chunks(start, end, chunk_days=HISTORY_CHUNK_DAYS):
+    """Splits the inclusive date range [start, end] into ranges of at most chunk_days days."""
+    chunks = []
+    while start <= end:
+        chunk_end = min(start + timedelta(days=chunk_days - 1), end)
+        chunks.append((start, chunk_end))
+        start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def _history_call(start, end):
+    return lambda api: api.get_portfolio_history(
+        date_start=start.isoformat(), date_end=end.isoformat(), timeframe='1D'
+    )
+
+
+def _orders_call(after):
+    return lambda api: transaction_store.fetch_closed_orders(api, after=after)
+
+
+def _merge_history(parts):
+    """Concatenates chunked portfolio histories into one timestamp-ordered series."""
+    points = {}
+    for part in parts:
+        for ts, eq in zip(part.timestamp or [], part.equity or []):
+            points[ts] = eq
+    ordered = sorted(points)
+    return types.SimpleNamespace(timestamp=ordered, equity=[points[ts] for ts in ordered])
+
+
+def fetch_all_snapshots(models=None, history_start=None):
+    """
+    Fetches account, positions, portfolio history and closed orders for every model.
+    All (model, call) pairs run concurrently on one thread pool, with a single client
+    reused per model, so wall-clock time tracks the slowest account.
+
+    Portfolio history covers history_start (default: the last HISTORY_CHUNK_DAYS days)
+    through today, fetched as parallel HISTORY_CHUNK_DAYS-sized ranges. Closed orders
+    are paged from each model's cursor in the transaction store.
+
+    Returns: {model_name: {"info", "account", "positions", "history", "orders", "errors"}}
+    Failed calls leave their key as None and store the exception under "errors".
+    """
+    models = models or config.MODELS
+    today = date.today()
+    history_start = history_start or today - timedelta(days=HISTORY_CHUNK_DAYS - 1)
+    calls = dict(SNAPSHOT_CALLS)
+    for i, (start, end) in enumerate(history_chunks(history_start, today)):
+        calls[("history", i)] = _history_call(start, end)
+    transaction_store.ensure_seeded()
+    with closing(datastore.connect()) as conn:
+        cursors = transaction_store.model_cursors(datastore.newest_fill_stamps(conn))
+
+    print(f"🔄 Fetching snapshots for {len(models)} model(s) concurrently (history since {history_start}) ...")
+    started = time.perf_counter()
+
+    snapshots = {}
+    for info in models.values():
+        snapshot = {"info": info, "errors": {}}
+        snapshot.update({name: None for name in SNAPSHOT_KEYS})
+        try:
+            snapshot["api"] = config.get_alpaca_api(info)
+        except Exception as e:
+            snapshot["api"] = None
+            snapshot["errors"] = {name: e for name in SNAPSHOT_KEYS}
+        snapshots[info['name']] = snapshot
+
+    jobs = {}
+    for model_name, snapshot in snapshots.items():
+        if snapshot["api"] is None:
+            continue
+        for name, call in calls.items():
+            jobs[(model_name, name)] = call
+        jobs[(model_name, "orders")] = _orders_call(cursors.get(model_name))
+
+    if jobs:
+        history_parts = {model_name: [] for model_name in snapshots}
+        workers = max(1, min(MAX_WORKERS, len(jobs)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                job: pool.submit(call, snapshots[job[0]]["api"])
+                for job, call in jobs.items()
+            }
+            for (model_name, name), future in futures.items():
+                key = name[0] if isinstance(name, tuple) else name
+                try:
+                    result = future.result()
+                except Exception as e:
+                    snapshots[model_name]["errors"][key] = e
+                    continue
+                if key == "history":
+                    history_parts[model_name].append(result)
+                else:
+                    snapshots[model_name][key] = result
+
+        for model_name, parts in history_parts.items():
+            if "history" not in snapshots[model_name]["errors"] and snapshots[model_name]["api"] is not None:
+                snapshots[model_name]["history"] = _merge_history(parts)
+
+    for model_name, snapshot in snapshots.items():
+        if snapshot["errors"]:
+            failed = ", ".join(sorted(snapshot["errors"]))
+            print(f"   ⚠️ {model_name}: failed to fetch {failed}")
+
+    print(f"   ✅ Snapshots fetched in {time.perf_counter() - started:.2f}s")
+    return snapshots
+
+
+def run_refresh(full=False):
+    """
+    Fetches every model once, then writes performance, intraday equity, portfolios and
+    transactions concurrently (each only reads the snapshots) and rebuilds the dashboard bundle.
+    """
+    from log_performance import log_all_performance, history_start_date
+    from log_portfolios import log_all_portfolios
+    from log_transactions import log_transactions
+    from build_dashboard import build_bundle
+    from equity_store import record_snapshots
+
+    with tracing.span("stage", "fetch_all_snapshots"):
+        snapshots = fetch_all_snapshots(history_start=history_start_date(full=full))
+
+    writers = {
+        "log_all_performance": lambda: log_all_performance(snapshots, full=full),
+        "record_intraday_equity": lambda: record_snapshots(snapshots),
+        "log_all_portfolios": lambda: log_all_portfolios(snapshots),
+        "log_transactions": lambda: log_transactions(snapshots),
+    }
+
+    def run_stage(name):
+        with tracing.span("stage", name):
+            writers[name]()
+
+    with ThreadPoolExecutor(max_workers=len(writers)) as pool:
+        futures = [pool.submit(run_stage, name) for name in writers]
+    for future in futures:
+        future.result()  # A failed writer still stops the run before the bundle is rebuilt
+
+    with tracing.span("stage", "build_bundle"):
+        build_bundle()
+    for listener in REFRESH_LISTENERS:
+        try:
+            listener(snapshots)
+        except Exception as e:
+            print(f"   ⚠️ Refresh listener failed: {e}")
+    print("\n📊 Alpaca API usage:")
+    config.print_api_stats()
+
+
+if __name__ == "__main__":
+    run_refresh()
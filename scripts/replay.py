@@ -0,0 +1,513 @@
+"""
+Replays the saved execution tables (logs/trades/<date>/<model>.md) against simulated
+accounts, using the current parser and executor (parse_clipboard_trades / run_trades),
+so the effect of a rule or parser change can be measured on the real history.
+
+Each model starts with START_CAPITAL in cash on the first replayed session. A table
+dated D runs before the open of the first session on or after D. Its orders then
+fill from the cached daily bars (bar_store):
+  - market orders fill at the open;
+  - buy limits fill at min(open, limit) once low <= limit;
+  - sell limits at max(open, limit) once high >= limit;
+  - sell stops at min(open, stop) once low <= stop.
+Bracket and OTO legs are armed when their entry fills and can trigger from the next
+session. If both legs of a bracket trigger in one bar, the stop is assumed to fill
+first. Every session's fills are decided for all models' open orders at once.
+
+Writes a performance.csv-shaped equity curve (Date + one column per model).
+
+Usage: python scripts/replay.py [--start YYYY-MM-DD] [--end YYYY-MM-DD] [--out PATH] [--no-refresh]
+"""
+import io
+import sys
+import csv
+import time
+import types
+import pathlib
+import argparse
+import threading
+import contextlib
+from datetime import date
+
+import numpy as np
+
+# Add root directory to path to import config
+root_dir = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.append(str(root_dir))
+import config
+import bar_store
+import execute_trade as et
+
+# Configuration
+TRADES_DIR = config.LOGS_DIR / "trades"
+REPLAY_DIR = config.LOGS_DIR / "replay"
+REPLAY_PERFORMANCE = REPLAY_DIR / "performance.csv"
+START_CAPITAL = 1000.0
+MACRO_SYMBOL = "^TNX"
+
+ACTIVE = {"new", "accepted", "held"}
+# list_orders(status=...) filters, as in Alpaca: closed is everything no longer active
+ORDER_STATUS_FILTERS = {
+    "open": lambda status: status in ACTIVE,
+    "closed": lambda status: status not in ACTIVE,
+    "all": lambda status: True,
+}
+# Order kinds for the vectorized fill rules
+MARKET, LIMIT, STOP = 0, 1, 2
+KINDS = {"market": MARKET, "limit": LIMIT, "stop": STOP}
+
+
+class SimAPIError(Exception):
+    """Raised where Alpaca would reject a request."""
+
+
+# -------------------------------------------------
+# Market data
+# -------------------------------------------------
+class Market:
+    """Daily OHLC for the replay window as (sessions x symbols) arrays, plus the replay clock."""
+
+    def __init__(self, symbols, start, end, refresh=True):
+        symbols = sorted({s.upper() for s in symbols})
+        if refresh:
+            bar_store.update_bars(symbols + [MACRO_SYMBOL])
+        start, end = np.datetime64(start, "D"), np.datetime64(end, "D")
+
+        stored = {s: bar_store.load_bars(s) for s in symbols}
+        dates = [b["date"][(b["date"] >= start) & (b["date"] <= end)] for b in stored.values()]
+        sessions = np.unique(np.concatenate(dates)) if dates else np.empty(0, "datetime64[D]")
+        if not len(sessions):
+            # No bars at all (e.g. offline with an empty store): weekdays, nothing ever fills
+            sessions = np.arange(start, end + 1)
+        self.sessions = sessions[np.is_busday(sessions)]
+        self.symbols = symbols
+        self.column = {s: j for j, s in enumerate(symbols)}
+
+        shape = (len(self.sessions), len(symbols))
+        self.open, self.high, self.low, self.close = (np.full(shape, np.nan) for _ in range(4))
+        for j, bars in enumerate(stored.values()):
+            bars = bars[np.isin(bars["date"], self.sessions)]
+            rows = np.searchsorted(self.sessions, bars["date"])
+            for field, target in (("open", self.open), ("high", self.high), ("low", self.low), ("close", self.close)):
+                target[rows, j] = bars[field]
+        self.has_bars = ~np.isnan(self.close).all(axis=0)
+
+        # Last known close at every session, for marking positions to market
+        filled = np.where(np.isnan(self.close), 0, np.arange(len(self.sessions))[:, None])
+        self.last_close = self.close[np.maximum.accumulate(filled, axis=0), np.arange(len(symbols))]
+        self.macro = bar_store.load_bars(MACRO_SYMBOL)
+        self.cursor = 0  # Session whose open the executor is trading into
+
+    def prior_close(self, symbol):
+        """Close of the session before the cursor (what the executor sees as current), or None."""
+        j = self.column.get(symbol)
+        if j is None or self.cursor == 0:
+            return None
+        value = self.last_close[self.cursor - 1, j]
+        return None if np.isnan(value) else float(value)
+
+    def macro_snapshot(self):
+        """TNX change between the two closes before the cursor, shaped like macro_data's snapshot."""
+        closes = self.macro[self.macro["date"] < self.sessions[self.cursor]]
+        if len(closes) < 2:
+            return {"TNX": {"error": "no stored ^TNX bars"}}
+        prev, last = float(closes["close"][-2]), float(closes["close"][-1])
+        return {"TNX": {
+            "source": MACRO_SYMBOL, "date": str(closes["date"][-1]), "last": last, "prev": prev,
+            "pct": ((last - prev) / prev) * 100 if prev else 0.0, "stale": False,
+        }}
+
+
+# -------------------------------------------------
+# Simulated Alpaca account
+# -------------------------------------------------
+def _fmt(value):
+    return None if value is None else str(round(float(value), 4))
+
+
+class SimAccount:
+    """The slice of the Alpaca REST client that execute_trade uses, backed by in-memory state."""
+
+    def __init__(self, name, market, cash=START_CAPITAL):
+        self.name = name
+        self.market = market
+        self.cash = cash
+        self.positions = {}  # symbol -> [qty, cost basis]
+        self.orders = {}     # id -> order namespace, in submission order
+        self.fills = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    # --- Orders ---
+    def _new_order(self, symbol, qty, side, type, time_in_force, limit_price=None, stop_price=None,
+                   order_class="simple", status="new", parent=None):
+        self._seq += 1
+        order = types.SimpleNamespace(
+            id=f"{self.name.lower()}-{self._seq}", symbol=symbol.upper(), qty=str(int(qty)), side=side,
+            type=type, time_in_force=time_in_force, limit_price=_fmt(limit_price), stop_price=_fmt(stop_price),
+            order_class=order_class, status=status, legs=None, filled_avg_price=None,
+            parent_id=parent.id if parent else None, armed=status != "held",
+        )
+        self.orders[order.id] = order
+        return order
+
+    def _group(self, order):
+        """An order plus its OCO siblings (bracket/OTO legs share one parent)."""
+        if order.parent_id is None:
+            return [order]
+        return [o for o in self.orders[order.parent_id].legs if o.status in ACTIVE]
+
+    def _available(self, symbol, exclude=None):
+        """Shares not reserved by armed sell orders; each OCO group reserves its largest leg once."""
+        reserved = {}
+        for o in self.orders.values():
+            if o.symbol == symbol and o.side == "sell" and o.status in ACTIVE and o.armed and o.id != exclude:
+                key = o.parent_id or o.id
+                reserved[key] = max(reserved.get(key, 0), int(o.qty))
+        return int(self.positions.get(symbol, [0, 0])[0]) - sum(reserved.values())
+
+    def _reserved_cash(self):
+        return sum(int(o.qty) * float(o.limit_price) for o in self.orders.values()
+                   if o.side == "buy" and o.status in ACTIVE and o.limit_price)
+
+    def submit_order(self, symbol, qty, side, type, time_in_force, limit_price=None, stop_price=None,
+                     order_class=None, stop_loss=None, take_profit=None, **kwargs):
+        with self._lock:
+            symbol, qty = symbol.upper(), int(qty)
+            if qty <= 0:
+                raise SimAPIError("qty must be > 0")
+            if side == "buy":
+                cost = qty * float(limit_price or self.market.prior_close(symbol) or 0)
+                if cost > self.cash - self._reserved_cash():
+                    raise SimAPIError("insufficient buying power")
+            elif qty > self._available(symbol):
+                raise SimAPIError(f"insufficient qty available for order (requested: {qty}, available: {self._available(symbol)})")
+
+            order_class = order_class or "simple"
+            parent = self._new_order(symbol, qty, side, type, time_in_force, limit_price, stop_price, order_class)
+            if order_class in ("bracket", "oto"):
+                legs = []
+                if take_profit:
+                    legs.append(self._new_order(symbol, qty, "sell", "limit", "gtc",
+                                                limit_price=take_profit["limit_price"],
+                                                order_class=order_class, status="held", parent=parent))
+                if stop_loss:
+                    legs.append(self._new_order(symbol, qty, "sell", "stop", "gtc",
+                                                stop_price=stop_loss["stop_price"],
+                                                order_class=order_class, status="held", parent=parent))
+                parent.legs = legs
+            return parent
+
+    def cancel_order(self, order_id):
+        with self._lock:
+            order = self.orders.get(order_id)
+            if order is None or order.status not in ACTIVE:
+                raise SimAPIError(f"order {order_id} is not cancelable")
+            self._cancel(order)
+
+    def _cancel(self, order):
+        order.status = "canceled"
+        for leg in order.legs or []:
+            if leg.status in ACTIVE:
+                leg.status = "canceled"
+        for sibling in self._group(order):
+            sibling.status = "canceled"  # Cancelling one OCO leg cancels the other
+
+    def replace_order(self, order_id, qty=None, limit_price=None, stop_price=None, **kwargs):
+        with self._lock:
+            old = self.orders.get(order_id)
+            if old is None or old.status not in ACTIVE:
+                raise SimAPIError(f"order {order_id} is not replaceable")
+            qty = int(qty or old.qty)
+            if old.side == "sell" and old.armed and qty > self._available(old.symbol, exclude=old.id):
+                raise SimAPIError("insufficient qty available for order")
+            parent = self.orders.get(old.parent_id)
+            new = self._new_order(old.symbol, qty, old.side, old.type, old.time_in_force,
+                                  limit_price if limit_price is not None else old.limit_price,
+                                  stop_price if stop_price is not None else old.stop_price,
+                                  old.order_class, old.status, parent)
+            new.armed = old.armed
+            old.status = "replaced"
+            if parent is not None:
+                parent.legs = [new if leg.id == old.id else leg for leg in parent.legs]
+            return new
+
+    def list_orders(self, status="open", limit=50, symbols=None, nested=None, **kwargs):
+        if status not in ORDER_STATUS_FILTERS:
+            raise ValueError(f"unsupported order status filter: {status!r}")
+        keep = ORDER_STATUS_FILTERS[status]
+        with self._lock:
+            wanted = {s.upper() for s in symbols} if symbols else None
+            orders = [
+                o for o in reversed(list(self.orders.values()))  # Newest first, like Alpaca
+                if (wanted is None or o.symbol in wanted) and keep(o.status)
+            ]
+            return orders[:limit]
+
+    def get_order(self, order_id):
+        if order_id not in self.orders:
+            raise SimAPIError(f"order not found: {order_id}")
+        return self.orders[order_id]
+
+    # --- Positions and account ---
+    def _position(self, symbol):
+        qty, cost = self.positions[symbol]
+        price = self.market.prior_close(symbol) or cost / qty
+        avg = cost / qty
+        return types.SimpleNamespace(
+            symbol=symbol, qty=str(int(qty)), avg_entry_price=_fmt(avg), current_price=_fmt(price),
+            market_value=_fmt(qty * price), unrealized_pl=_fmt(qty * (price - avg)),
+            unrealized_plpc=_fmt(price / avg - 1),
+        )
+
+    def list_positions(self):
+        with self._lock:
+            return [self._position(s) for s in self.positions]
+
+    def get_position(self, symbol):
+        with self._lock:
+            if symbol.upper() not in self.positions:
+                raise SimAPIError("position does not exist")
+            return self._position(symbol.upper())
+
+    def close_position(self, symbol):
+        with self._lock:
+            symbol = symbol.upper()
+            available = self._available(symbol)
+            if symbol not in self.positions or available <= 0:
+                raise SimAPIError("insufficient qty available for order")
+            return self._new_order(symbol, available, "sell", "market", "day")
+
+    def get_account(self):
+        with self._lock:
+            equity = self.cash + sum(float(self._position(s).market_value) for s in self.positions)
+            buying_power = self.cash - self._reserved_cash()
+            return types.SimpleNamespace(equity=_fmt(equity), cash=_fmt(self.cash), buying_power=_fmt(buying_power))
+
+    def get_asset(self, symbol):
+        j = self.market.column.get(symbol.upper())
+        return types.SimpleNamespace(symbol=symbol.upper(), tradable=j is not None and bool(self.market.has_bars[j]))
+
+    # --- Fills (called by step_market) ---
+    def fill(self, order, price):
+        if order.status not in ACTIVE:
+            return  # Cancelled by an OCO sibling earlier in this session
+        qty = int(order.qty)
+        if order.side == "buy":
+            held, cost = self.positions.get(order.symbol, [0, 0.0])
+            self.positions[order.symbol] = [held + qty, cost + qty * price]
+            self.cash -= qty * price
+            for leg in order.legs or []:
+                leg.armed = True
+                # Alpaca shows the bracket stop as 'held' while its take-profit sibling works
+                if not (leg.type == "stop" and order.order_class == "bracket" and len(order.legs) > 1):
+                    leg.status = "new"
+        else:
+            held, cost = self.positions.get(order.symbol, [0, 0.0])
+            qty = min(qty, int(held))
+            if qty <= 0:
+                order.status = "canceled"
+                return
+            self.cash += qty * price
+            if qty == held:
+                self.positions.pop(order.symbol)
+            else:
+                self.positions[order.symbol] = [held - qty, cost * (held - qty) / held]
+            for sibling in self._group(order):
+                if sibling is not order:
+                    sibling.status = "canceled"
+        order.status = "filled"
+        order.filled_avg_price = _fmt(price)
+        self.fills += 1
+
+
+class SimOrderEvents:
+    """Stands in for OrderEventSubscriber: simulated cancels are final immediately."""
+
+    def __init__(self, account):
+        self.account = account
+
+    def wait_for(self, order_ids, timeout):
+        resolved = {oid: self.account.orders[oid].status for oid in order_ids
+                    if self.account.orders[oid].status not in ACTIVE}
+        return resolved, set(order_ids) - set(resolved)
+
+    def stop(self):
+        pass
+
+
+# -------------------------------------------------
+# Vectorized session step
+# -------------------------------------------------
+def step_market(accounts, market, s):
+    """
+    Fills every armed order of every account against session s's bar in one pass,
+    then expires unfilled day orders. Stops are applied before other orders so a
+    bracket whose legs both trigger in the same bar exits at the stop.
+    """
+    orders = [(acct, o) for acct in accounts for o in acct.orders.values()
+              if o.status in ACTIVE and o.armed]
+    if not orders:
+        return 0
+
+    cols = np.array([market.column.get(o.symbol, -1) for _, o in orders])
+    kind = np.array([KINDS.get(o.type, -1) for _, o in orders])
+    buy = np.array([o.side == "buy" for _, o in orders])
+    limit = np.array([float(o.limit_price) if o.limit_price else np.nan for _, o in orders])
+    stop = np.array([float(o.stop_price) if o.stop_price else np.nan for _, o in orders])
+
+    known = cols >= 0
+    safe = np.where(known, cols, 0)
+    op, hi, lo = (np.where(known, arr[s, safe], np.nan) for arr in (market.open, market.high, market.low))
+    traded = ~np.isnan(op)
+
+    with np.errstate(invalid="ignore"):
+        price = np.select(
+            [kind == MARKET, (kind == LIMIT) & buy, kind == LIMIT, (kind == STOP) & ~buy, kind == STOP],
+            [op, np.minimum(op, limit), np.maximum(op, limit), np.minimum(op, stop), np.maximum(op, stop)],
+            default=np.nan,
+        )
+        hit = traded & np.select(
+            [kind == MARKET, (kind == LIMIT) & buy, kind == LIMIT, (kind == STOP) & ~buy, kind == STOP],
+            [True, lo <= limit, hi >= limit, lo <= stop, hi >= stop],
+            default=False,
+        )
+
+    filled = 0
+    for i in np.flatnonzero(hit)[np.argsort(kind[hit] != STOP, kind="stable")]:
+        acct, order = orders[i]
+        acct.fill(order, float(price[i]))
+        filled += order.status == "filled"
+
+    for acct, order in orders:
+        if order.status in ACTIVE and order.time_in_force == "day":
+            order.status = "expired"
+    return filled
+
+
+def mark_to_market(accounts, market, s):
+    """Equity of every account at session s's close (last known close, else cost)."""
+    owner, cols, qty, cost = [], [], [], []
+    for a, acct in enumerate(accounts):
+        for symbol, (q, c) in acct.positions.items():
+            owner.append(a)
+            cols.append(market.column.get(symbol, -1))
+            qty.append(q)
+            cost.append(c)
+    cash = np.array([acct.cash for acct in accounts])
+    if not owner:
+        return cash
+    cols, qty, cost = np.array(cols), np.array(qty, dtype=float), np.array(cost)
+    prices = np.where(cols >= 0, market.last_close[s, np.where(cols >= 0, cols, 0)], np.nan)
+    value = np.where(np.isnan(prices), cost, qty * prices)
+    return cash + np.bincount(owner, weights=value, minlength=len(accounts))
+
+
+# -------------------------------------------------
+# Replay
+# -------------------------------------------------
+def load_tables(trades_dir=TRADES_DIR, start=None, end=None):
+    """Returns {date: [(model_info, table text)]} for every saved execution log in range."""
+    tables = {}
+    for day_dir in sorted(p for p in pathlib.Path(trades_dir).iterdir() if p.is_dir()):
+        if (start and day_dir.name < start) or (end and day_dir.name > end):
+            continue
+        for info, path in et.find_table_files(day_dir).values():
+            tables.setdefault(day_dir.name, []).append((info, et.read_table_file(path)))
+    return tables
+
+
+def run_table(account, info, text, snapshot):
+    """Runs one table through the executor against a simulated account. Returns its log lines."""
+    et.reset_session()
+    et.model_info, et.api = info, account
+    et.order_events = SimOrderEvents(account)
+    with contextlib.redirect_stdout(io.StringIO()):
+        et.print_preflight_status()
+        trades = et.parse_clipboard_trades(text)
+        # One worker keeps fills and buying-power checks in table order, so replays are deterministic
+        et.run_trades(trades, max_workers=1, macro_snapshot=snapshot)
+    return list(et.execution_logs)
+
+
+def _table_symbols(tables):
+    from trade_table import parse_trades_text
+    symbols = set()
+    for entries in tables.values():
+        for _, text in entries:
+            for trade in parse_trades_text(text)[0]:
+                ticker = et.clean_val(trade.get("TICKER"))
+                if ticker and ticker.replace(".", "").replace("-", "").isalpha():
+                    symbols.add(ticker)
+    return symbols
+
+
+def save_replay_log(day, info, lines):
+    path = REPLAY_DIR / "trades" / day / f"{info['name'].lower().replace(' ', '_')}.md"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    content = f"# Replay Execution Log\n\n**Model:** {info['name']}\n**Date:** {day}\n\n```text\n"
+    path.write_text(content + "\n".join(lines) + "\n```\n", encoding="utf-8")
+
+
+def replay(start=None, end=None, refresh=True, out=REPLAY_PERFORMANCE, trades_dir=TRADES_DIR):
+    """Replays every saved table in [start, end] and writes the equity curve. Returns (dates, {model: equity})."""
+    started = time.perf_counter()
+    tables = load_tables(trades_dir, start, end)
+    if not tables:
+        print(f"❌ No execution logs found in {trades_dir}")
+        return [], {}
+
+    start = start or min(tables)
+    end = end or date.today().isoformat()
+    market = Market(_table_symbols(tables), start, end, refresh=refresh)
+    models = [info['name'] for info in config.MODELS.values()]
+    accounts = [SimAccount(name, market) for name in models]
+    by_name = dict(zip(models, accounts))
+    print(f"🔁 Replaying {sum(map(len, tables.values()))} table(s) over {len(market.sessions)} session(s) "
+          f"({len(market.symbols)} symbols, {int(market.has_bars.sum())} with bars)")
+
+    # Tables dated on a weekend or holiday trade into the next session
+    table_days = sorted(tables)
+    run_at = np.searchsorted(market.sessions, np.array(table_days, dtype="datetime64[D]"))
+    equity = np.empty((len(market.sessions), len(accounts)))
+    for s in range(len(market.sessions)):
+        market.cursor = s
+        for day in (d for d, at in zip(table_days, run_at) if at == s):
+            snapshot = market.macro_snapshot()
+            for info, text in tables[day]:
+                save_replay_log(day, info, run_table(by_name[info['name']], info, text, snapshot))
+        step_market(accounts, market, s)
+        equity[s] = mark_to_market(accounts, market, s)
+
+    skipped = [d for d, at in zip(table_days, run_at) if at >= len(market.sessions)]
+    if skipped:
+        print(f"   ⚠️ No sessions on or after {', '.join(skipped)}; those tables were not replayed")
+
+    dates = [str(d) for d in market.sessions]
+    curves = {name: equity[:, a].round(2) for a, name in enumerate(models)}
+    out = pathlib.Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["Date"] + models)
+        writer.writeheader()
+        for i, dt in enumerate(dates):
+            writer.writerow({"Date": dt, **{m: float(curves[m][i]) for m in models}})
+
+    print(f"\n{'Model':<11} {'Final':>10} {'Return':>8} {'Fills':>6} {'Open orders':>12}")
+    for name, acct in by_name.items():
+        final = float(curves[name][-1]) if dates else START_CAPITAL
+        open_orders = sum(o.status in ACTIVE for o in acct.orders.values())
+        print(f"{name:<11} ${final:>9,.2f} {(final / START_CAPITAL - 1) * 100:>+7.2f}% {acct.fills:>6} {open_orders:>12}")
+    print(f"\n📂 Replay equity saved to: {out} (logs in {REPLAY_DIR / 'trades'})")
+    print(f"   ⏱️ Replay finished in {time.perf_counter() - started:.2f}s")
+    return dates, curves
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay saved execution tables against simulated accounts")
+    parser.add_argument("--start", help="First table date to replay (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last session to simulate (YYYY-MM-DD, default today)")
+    parser.add_argument("--out", default=str(REPLAY_PERFORMANCE), help="Equity curve CSV (performance.csv shape)")
+    parser.add_argument("--no-refresh", action="store_true", help="Use only bars already in the local store")
+    args = parser.parse_args()
+    replay(start=args.start, end=args.end, refresh=not args.no_refresh, out=args.out)
@@ -0,0 +1,108 @@
+"""
+Pre-trade risk checks for execute_trade.py:
+
+  - validate_buys(): every BUY row of a table checked at once, before any order is
+    sent, against the prompt's rules (generate_prompt.py PHASE 3): whole-share qty,
+    LIMIT_PRICE in the $3-$50 band, STOP_LOSS below LIMIT_PRICE, risk
+    qty * (entry - stop) within 1.5% of equity and TAKE_PROFIT >= 2R (both legs
+    are required, so every accepted BUY goes out as a bracket order);
+  - BuyingPowerLedger: equity and buying power read once per run, with each accepted
+    BUY's cost reserved locally so later rows see what earlier ones committed.
+"""
+import threading
+
+import numpy as np
+
+# Configuration
+MAX_RISK_PCT = 0.015        # Max $risk per BUY as a fraction of equity (generate_prompt: equity * 0.015)
+MIN_REWARD_R = 2.0          # TAKE_PROFIT must be at least this many R above the entry
+PRICE_BAND = (3.0, 50.0)    # LIMIT_PRICE range of the scanner universe
+TOLERANCE = 0.005           # Half a cent, so prices rounded to cents are not rejected
+
+# Rejection codes, in the order the checks apply (the first failing check is reported)
+OK, BAD_ORDER, OUT_OF_BAND, NO_STOP, STOP_ABOVE_LIMIT, TOO_MUCH_RISK, NO_TAKE_PROFIT, LOW_REWARD = range(8)
+
+
+def validate_buys(qty, limit, stop, take_profit, equity):
+    """
+    Checks BUY rows given as arrays (NaN for a missing value). Returns an array with
+    one rejection code per row (OK for rows that pass) and the per-row numbers used
+    in describe() (max risk, risk, minimum take-profit).
+    """
+    qty, limit, stop, take_profit = (np.asarray(a, dtype=float) for a in (qty, limit, stop, take_profit))
+    max_risk = equity * MAX_RISK_PCT
+    risk = qty * (limit - stop)
+    min_tp = limit + MIN_REWARD_R * (limit - stop)
+    low, high = PRICE_BAND
+
+    with np.errstate(invalid="ignore"):
+        codes = np.select(
+            [
+                ~(qty >= 1) | (qty != np.floor(qty)) | ~(limit > 0),
+                (limit < low) | (limit > high),
+                np.isnan(stop),
+                stop >= limit,
+                risk > max_risk + TOLERANCE,
+                np.isnan(take_profit),
+                take_profit < min_tp - TOLERANCE,
+            ],
+            [BAD_ORDER, OUT_OF_BAND, NO_STOP, STOP_ABOVE_LIMIT, TOO_MUCH_RISK, NO_TAKE_PROFIT, LOW_REWARD],
+            default=OK,
+        )
+    return codes, {"max_risk": max_risk, "risk": risk, "min_tp": min_tp}
+
+
+def describe(code, i, limit, stop, numbers):
+    """Human-readable reason for row i's rejection code."""
+    if code == BAD_ORDER:
+        return "Missing/invalid Qty or LIMIT_PRICE"
+    if code == OUT_OF_BAND:
+        return f"LIMIT_PRICE ${limit[i]:.2f} outside the ${PRICE_BAND[0]:.0f}-${PRICE_BAND[1]:.0f} band"
+    if code == NO_STOP:
+        return "No STOP_LOSS, so the risk cannot be sized"
+    if code == STOP_ABOVE_LIMIT:
+        return f"STOP_LOSS ({stop[i]}) >= LIMIT_PRICE ({limit[i]})"
+    if code == TOO_MUCH_RISK:
+        return (f"Risk ${numbers['risk'][i]:.2f} exceeds max ${numbers['max_risk']:.2f} "
+                f"({MAX_RISK_PCT * 100:.1f}% of equity)")
+    if code == NO_TAKE_PROFIT:
+        return "No TAKE_PROFIT (a BUY needs both bracket legs)"
+    if code == LOW_REWARD:
+        return f"TAKE_PROFIT below {MIN_REWARD_R:.0f}R (needs >= ${numbers['min_tp'][i]:.2f})"
+    return None
+
+
+class BuyingPowerLedger:
+    """
+    Equity and buying power read once per run. BUY costs are reserved locally as
+    orders are accepted (and released if a submit fails), so concurrent rows never
+    spend the same balance and no BUY needs its own get_account() round trip.
+    Cancels and fills during the run are not credited back, which keeps it conservative.
+    """
+
+    def __init__(self, equity, buying_power):
+        self.equity = equity
+        self.buying_power = buying_power
+        self.reserved = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_account(cls, account):
+        return cls(float(account.equity), float(account.buying_power))
+
+    @property
+    def available(self):
+        with self._lock:
+            return self.buying_power - self.reserved
+
+    def reserve(self, cost):
+        """Reserves cost if it fits in the unreserved buying power. Returns True if reserved."""
+        with self._lock:
+            if cost > self.buying_power - self.reserved:
+                return False
+            self.reserved += cost
+            return True
+
+    def release(self, cost):
+        with self._lock:
+            self.reserved = max(0.0, self.reserved - cost)
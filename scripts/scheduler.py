@@ -0,0 +1,198 @@
+"""
+Long-running refresh scheduler, for a machine that stays up instead of the GitHub cron:
+
+  - Alpaca's clock and trading calendar are read once per market day, so DST, holidays
+    and early closes come from the broker rather than a fixed UTC cron;
+  - jobs run every REFRESH_EVERY inside a session, plus once CLOSE_GRACE after the close
+    so the settled equity is written; nothing runs while the market is closed;
+  - jobs due at the same slot run concurrently, and a job still running skips the slot;
+  - modules, Alpaca clients (config.get_alpaca_api) and in-process caches stay loaded
+    between runs, so a refresh pays no interpreter, import or connection setup.
+
+Each slot writes its own trace file (tracing.py).
+
+Usage: python scripts/scheduler.py [--once]    # --once: run every job now and exit
+"""
+import sys
+import os
+import time
+import signal
+import asyncio
+import pathlib
+import argparse
+import importlib
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# Add root directory to path to import config
+root_dir = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.append(str(root_dir))
+import config
+import tracing
+
+# Configuration
+MARKET_TZ = ZoneInfo("America/New_York")
+REFRESH_EVERY = timedelta(minutes=int(os.getenv("SCHEDULER_REFRESH_MINUTES", "30")))
+OPEN_DELAY = timedelta(minutes=1)     # First slot just after the open, once the opening prints settle
+CLOSE_GRACE = timedelta(minutes=5)    # Last slot after the close, for the settled equity
+CALENDAR_DAYS = 10                    # Calendar window read per market day (covers long weekends)
+MAX_SLEEP = 3600                      # Seconds; the loop re-checks the date at least this often
+
+# Job -> (module imported once and kept loaded, call). Jobs have no dependencies on each other.
+JOBS = {
+    "refresh": ("refresh_engine", lambda module: module.run_refresh()),
+    "macro": ("macro_data", lambda module: module.refresh()),  # Keeps the prompt's macro store fresh
+}
+
+
+def _now():
+    return datetime.now(MARKET_TZ)
+
+
+def _at(day, clock_time):
+    """Session boundary from a calendar entry's date and HH:MM (ET)."""
+    return datetime.fromisoformat(f"{str(day)[:10]}T{str(clock_time)[:5]}").replace(tzinfo=MARKET_TZ)
+
+
+def _market_time(timestamp):
+    """The clock's next_open/next_close (ISO timestamps with an offset) in ET."""
+    return datetime.fromisoformat(str(timestamp)).astimezone(MARKET_TZ)
+
+
+def session_slots(sessions, every=REFRESH_EVERY):
+    """Sorted run times for a list of (open, close) sessions."""
+    slots = []
+    for open_at, close_at in sessions:
+        slot = open_at + OPEN_DELAY
+        while slot < close_at:
+            slots.append(slot)
+            slot += every
+        slots.append(close_at + CLOSE_GRACE)
+    return sorted(slots)
+
+
+class Scheduler:
+    def __init__(self, jobs=JOBS):
+        self.jobs = jobs
+        self.modules = {}
+        self.running = {}
+        self.slots = []
+        self.calendar_day = None
+        self.last_slot = None
+        self.stopping = asyncio.Event()
+
+    def _api(self):
+        # Clock and calendar are market-wide; any account's client answers them
+        return config.get_alpaca_api(next(iter(config.MODELS.values())))
+
+    def _fetch_sessions(self, today):
+        api = self._api()
+        clock = api.get_clock()
+        state = "open" if clock.is_open else "closed"
+        print(f"🕰️  Market is {state}; next open {clock.next_open}, next close {clock.next_close}")
+        try:
+            calendar = api.get_calendar(start=today.isoformat(), end=(today + timedelta(days=CALENDAR_DAYS)).isoformat())
+            return [(_at(day.date, day.open), _at(day.date, day.close)) for day in calendar]
+        except Exception as e:
+            # The clock alone still knows the next session
+            print(f"⚠️ Calendar unavailable ({e}); using the clock's next session")
+            open_at = _now() - OPEN_DELAY if clock.is_open else _market_time(clock.next_open)
+            return [(open_at, _market_time(clock.next_close))]
+
+    async def load_calendar(self):
+        """Reads the clock and calendar (once per market day) and rebuilds the slot list."""
+        today = _now().date()
+        try:
+            sessions = await asyncio.to_thread(self._fetch_sessions, today)
+        except Exception as e:
+            print(f"❌ Clock/calendar fetch failed: {e}; retrying in {MAX_SLEEP // 60} min")
+            self.slots = []
+            return
+        self.calendar_day = today
+        self.slots = session_slots(sessions)
+        upcoming = [s for s in self.slots if s >= _now()]
+        if upcoming:
+            print(f"📅 {len(upcoming)} slot(s) scheduled; next at {upcoming[0]:%a %Y-%m-%d %H:%M} ET")
+
+    def next_slot(self, now):
+        """Earliest slot that is due or upcoming and not yet run; a slot missed by over a period is dropped."""
+        for slot in self.slots:
+            if (self.last_slot is None or slot > self.last_slot) and slot > now - REFRESH_EVERY:
+                return slot
+        return None
+
+    async def _run_job(self, name):
+        module_name, call = self.jobs[name]
+        started = time.perf_counter()
+        try:
+            if module_name not in self.modules:
+                self.modules[module_name] = await asyncio.to_thread(importlib.import_module, module_name)
+            await asyncio.to_thread(call, self.modules[module_name])
+            print(f"✅ {name} finished in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            print(f"❌ {name} failed after {time.perf_counter() - started:.2f}s: {e}")
+        finally:
+            self.running.pop(name, None)
+
+    def run_slot(self, slot=None):
+        """Starts every job that is not still running from an earlier slot. Returns the started tasks."""
+        tracing.start_run("schedule")
+        label = f"{slot:%H:%M} ET slot" if slot else "manual run"
+        tasks = []
+        for name in self.jobs:
+            if name in self.running:
+                print(f"⏭️  {name} still running; skipping the {label}")
+                continue
+            self.running[name] = asyncio.create_task(self._run_job(name), name=name)
+            tasks.append(self.running[name])
+        print(f"\n▶️  {label}: {', '.join(t.get_name() for t in tasks) or 'nothing to start'}")
+        return tasks
+
+    async def _sleep(self, seconds):
+        """Sleeps up to `seconds`; returns early (True) when asked to stop."""
+        try:
+            await asyncio.wait_for(self.stopping.wait(), timeout=max(0.0, seconds))
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def run(self):
+        print(f"🗓️  Scheduler started: {', '.join(self.jobs)} every {REFRESH_EVERY} during market sessions")
+        while not self.stopping.is_set():
+            now = _now()
+            if self.calendar_day != now.date():
+                await self.load_calendar()
+            slot = self.next_slot(now)
+            if slot is None:
+                await self._sleep(MAX_SLEEP)
+                continue
+            if slot > now:
+                await self._sleep(min((slot - now).total_seconds(), MAX_SLEEP))
+                continue
+            self.last_slot = slot
+            self.run_slot(slot)
+        if self.running:
+            print(f"⏳ Waiting for {', '.join(self.running)} to finish ...")
+            await asyncio.gather(*self.running.values())
+        print("👋 Scheduler stopped")
+
+    def stop(self):
+        self.stopping.set()
+
+
+async def main(once=False):
+    scheduler = Scheduler()
+    if once:
+        await asyncio.gather(*scheduler.run_slot())
+        return
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, scheduler.stop)
+    await scheduler.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run refresh jobs during market sessions")
+    parser.add_argument("--once", action="store_true", help="Run every job once now and exit")
+    args = parser.parse_args()
+    asyncio.run(main(once=args.once))
@@ -0,0 +1,208 @@
+"""
+Timing spans for broker (Alpaca), market-data (Yahoo) and stage calls, written as one
+JSONL trace file per run under logs/traces/:
+
+    {"kind": "run", "run": ..., "name": "refresh", "argv": [...], "pid": ..., "started": ...}
+    {"kind": "alpaca", "endpoint": "list_orders", "model": "Claude", "symbol": "AAPL",
+     "ms": 182.4, "wait_ms": 0.0, "attempts": 1, "outcome": "ok", "ts": ..., "thread": ..., "pid": ...}
+
+Every AlpacaClient call is traced (config.py); Yahoo calls are wrapped where the
+scripts make them. A run starts with start_run() (python -m scripts does this) or on the
+first span. Child processes (batch execution) append to their parent's file.
+Set TRACE=0 to turn tracing off.
+
+Usage: python scripts/tracing.py [TRACE_FILE] [--top N]   # Summarizes the newest run by default
+"""
+import os
+import sys
+import json
+import time
+import pathlib
+import argparse
+import threading
+import contextlib
+from datetime import datetime, timezone
+
+# Add root directory to path to import config
+root_dir = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.append(str(root_dir))
+import config
+
+# Configuration
+TRACE_DIR = config.LOGS_DIR / "traces"
+TRACE_ENABLED = os.getenv("TRACE", "1") != "0"
+TRACE_FILE_ENV = "TRACE_FILE"  # Set by start_run() so child processes append to the same file
+TRACE_KEEP = 50                # Newest run files kept in TRACE_DIR
+TOP_SLOWEST = 15
+
+_lock = threading.Lock()
+_file = None
+
+
+def _reset_after_fork():
+    global _lock, _file
+    _lock = threading.Lock()
+    _file = None  # Reopened (same path, via TRACE_FILE) on the child's first span
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def _prune(keep=TRACE_KEEP):
+    runs = sorted(TRACE_DIR.glob("*.jsonl"))
+    for path in runs[:-keep]:
+        with contextlib.suppress(OSError):
+            path.unlink()
+
+
+def _open(path):
+    global _file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Line buffered and appended, so each span is one write even with several processes
+    _file = open(path, "a", buffering=1, encoding="utf-8")
+    return _file
+
+
+def _start(name):
+    """Opens a new run file and writes its header. Call with _lock held."""
+    name = name or pathlib.Path(sys.argv[0]).stem or "python"
+    run = f"{datetime.now():%Y%m%d-%H%M%S}-{name}-{os.getpid()}"
+    path = TRACE_DIR / f"{run}.jsonl"
+    if _file is not None:
+        _file.close()
+    _prune(TRACE_KEEP - 1)
+    _open(path).write(json.dumps({
+        "kind": "run", "run": run, "name": name, "argv": sys.argv, "pid": os.getpid(), "started": _now(),
+    }) + "\n")
+    os.environ[TRACE_FILE_ENV] = str(path)
+    return path
+
+
+def start_run(name=None):
+    """Starts a new trace file for this run and returns its path (None when tracing is off)."""
+    if not TRACE_ENABLED:
+        return None
+    with _lock:
+        return _start(name)
+
+
+def _write(record):
+    with _lock:
+        if _file is None:
+            inherited = os.getenv(TRACE_FILE_ENV)
+            if inherited:
+                _open(pathlib.Path(inherited))
+            else:
+                _start(None)
+        _file.write(json.dumps(record, default=str) + "\n")
+
+
+@contextlib.contextmanager
+def span(kind, endpoint, model=None, symbol=None, **fields):
+    """
+    Times the block and writes one span. Yields the span's dict so callers can add
+    fields (e.g. attempts); an exception marks it outcome="error" and is re-raised.
+    """
+    record = {"kind": kind, "endpoint": endpoint, "model": model, "symbol": symbol, **fields}
+    if not TRACE_ENABLED:
+        yield record
+        return
+    started_at = _now()
+    started = time.perf_counter()
+    try:
+        yield record
+        record.setdefault("outcome", "ok")
+    except BaseException as e:
+        record.update(outcome="error", error=f"{type(e).__name__}: {e}"[:300])
+        raise
+    finally:
+        record.update(
+            ms=round((time.perf_counter() - started) * 1000, 2),
+            ts=started_at,
+            thread=threading.current_thread().name,
+            pid=os.getpid(),
+        )
+        try:
+            _write(record)
+        except Exception:
+            pass  # Tracing never breaks the traced call
+
+
+# -------------------------------------------------
+# Summary
+# -------------------------------------------------
+def load_trace(path):
+    """Returns (run header or {}, [spans]) from one trace file."""
+    header, spans = {}, []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A line cut short by a killed process
+            if record.get("kind") == "run":
+                header = header or record
+            else:
+                spans.append(record)
+    return header, spans
+
+
+def latest_trace():
+    runs = sorted(TRACE_DIR.glob("*.jsonl"))
+    return runs[-1] if runs else None
+
+
+def summarize(path, top=TOP_SLOWEST):
+    """Prints call counts and time per endpoint, then the slowest calls, for one run."""
+    header, spans = load_trace(path)
+    print(f"\n🔎 Trace: {path}")
+    if header:
+        print(f"   Run: {header.get('name')} (pid {header.get('pid')}) started {header.get('started')}")
+    if not spans:
+        print("   (no spans recorded)")
+        return
+
+    starts = [datetime.fromisoformat(s["ts"]).timestamp() for s in spans]
+    ends = [t + s["ms"] / 1000 for t, s in zip(starts, spans)]
+    print(f"   {len(spans)} span(s) over {max(ends) - min(starts):.2f}s, "
+          f"{len({s.get('pid') for s in spans})} process(es)\n")
+
+    groups = {}
+    for s in spans:
+        groups.setdefault((s["kind"], s["endpoint"]), []).append(s)
+    print(f"   {'kind':<7} {'endpoint':<24} {'calls':>6} {'errors':>6} {'total':>9} {'avg':>8} {'max':>8}")
+    for (kind, endpoint), items in sorted(groups.items(), key=lambda g: -sum(s["ms"] for s in g[1])):
+        durations = [s["ms"] for s in items]
+        errors = sum(s.get("outcome") == "error" for s in items)
+        print(f"   {kind:<7} {endpoint:<24} {len(items):>6} {errors:>6} {sum(durations) / 1000:>8.2f}s "
+              f"{sum(durations) / len(items):>6.0f}ms {max(durations):>6.0f}ms")
+
+    by_model = {}
+    for s in spans:
+        if s["kind"] == "alpaca":
+            by_model[s.get("model")] = by_model.get(s.get("model"), 0) + 1
+    if by_model:
+        print("\n   Alpaca calls per model: " + ", ".join(f"{m}: {n}" for m, n in sorted(by_model.items(), key=str)))
+
+    print(f"\n   🐢 Slowest {min(top, len(spans))} call(s):")
+    for s in sorted(spans, key=lambda s: -s["ms"])[:top]:
+        where = " ".join(str(v) for v in (s.get("model"), s.get("symbol")) if v)
+        extra = f" [{s.get('error')}]" if s.get("outcome") == "error" else ""
+        wait = f" (waited {s['wait_ms']:.0f}ms for rate limit)" if s.get("wait_ms") else ""
+        print(f"   {s['ms']:>8.0f}ms  {s['kind']}.{s['endpoint']} {where}{wait}{extra}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a run's trace file")
+    parser.add_argument("trace", nargs="?", help="Trace file (default: newest in logs/traces)")
+    parser.add_argument("--top", type=int, default=TOP_SLOWEST, help="Slowest calls to list")
+    args = parser.parse_args()
+    path = args.trace or latest_trace()
+    if path is None:
+        print(f"❌ No trace files in {TRACE_DIR}")
+        sys.exit(1)
+    summarize(path, top=args.top)
@@ -0,0 +1,196 @@
+import re
+import csv
+
+# Canonical execution-table columns and the header spellings the AIs use for them.
+# Earlier spellings win when a table has several columns for the same field.
+HEADER_MAP = {
+    "TICKER": ["TICKER", "TICK", "SYMBOL"],
+    "ACTION": ["ACTION", "ACT"],
+    "QTY": ["QTY", "QUANTITY", "AMOUNT", "SIZE", "SHARES"],
+    "TYPE": ["TYPE", "ORDER TYPE"],
+    "LIMIT_PRICE": ["LIMIT_PRICE", "LIMIT PRICE", "LIMIT", "PRICE"],
+    "STOP_LOSS": ["STOP_LOSS", "STOP LOSS", "STOP", "SL", "RISK MANAGEMENT", "RISK"],
+    "TAKE_PROFIT": ["TAKE_PROFIT", "TAKE PROFIT", "TP", "TARGET"],
+    # Optional / ignored by executor if present
+    "REASON": ["REASON", "WHY", "RATIONALE"],
+}
+
+_HEADER_NOISE = re.compile(r"[\s_]+")
+
+
+def normalize_header(header):
+    """Upper-cases a header and folds markdown emphasis, underscores and repeated spaces."""
+    return _HEADER_NOISE.sub(" ", str(header).strip().strip("*`").strip().upper())
+
+
+# normalized spelling -> (canonical, preference rank), built once
+HEADER_LOOKUP = {
+    normalize_header(var): (canonical, rank)
+    for canonical, variations in HEADER_MAP.items()
+    for rank, var in enumerate(variations)
+}
+
+_ACTION_HEADERS = frozenset(HEADER_MAP["ACTION"])
+_SEPARATOR_ROW = re.compile(r"^\|?[\s:|-]*-[\s:|-]*$")
+# An ACTION cell is a single word (BUY, SELL, NO_TRADES, ...); prose lines after a table are not rows
+_ACTION_CELL = re.compile(r"^\**[A-Za-z_]+\**$")
+_ACTION_WORD = re.compile(r"\b(?:BUY|SELL|HOLD|CANCEL)\b")  # Matched against the upper-cased line
+_FALLBACK_ROW = re.compile(
+    r"(?:^|[,\s|])\s*(BUY|SELL|HOLD|CANCEL)\s*[,\s|]\s*([A-Z]+)\s*[,\s|]\s*([A-Z0-9\.]+)\s*[,\s|]\s*([A-Z\s/]+)"
+    r"\s*[,\s|]\s*(\$?[NA\d\.\-]+)\s*[,\s|]\s*(\$?[NA\d\.\-]+)\s*(?:[,\s|]\s*(\$?[NA\d\.\-]+))?",
+    re.IGNORECASE,
+)
+
+DIALECT_LABELS = {"csv": "CSV", "markdown": "Markdown table", "regex": "Regex fallback"}
+
+
+def map_headers(row_keys):
+    """
+    Maps whatever headers the AI outputs to the canonical headers we support.
+    Returns {canonical: column index}; unknown columns are ignored.
+    """
+    best = {}
+    for idx, key in enumerate(row_keys):
+        hit = HEADER_LOOKUP.get(normalize_header(key))
+        if hit and (hit[0] not in best or hit[1] < best[hit[0]][1]):
+            best[hit[0]] = (idx, hit[1])
+    return {canonical: idx for canonical, (idx, _) in best.items()}
+
+
+def _is_header(h_map):
+    return "ACTION" in h_map and "TICKER" in h_map
+
+
+def _pipe_cells(line):
+    """Splits a markdown table row, keeping empty cells so columns stay aligned."""
+    inner = line.strip()
+    if inner.startswith("|"):
+        inner = inner[1:]
+    if inner.endswith("|"):
+        inner = inner[:-1]
+    return [cell.strip() for cell in inner.split("|")]
+
+
+def _repeats_header(cells, h_map):
+    """Cheap check first (is the ACTION cell an ACTION header?) before resolving the whole row."""
+    idx = h_map["ACTION"]
+    if idx >= len(cells) or cells[idx].strip("*` ").upper() not in _ACTION_HEADERS:
+        return None
+    row_map = map_headers(cells)
+    return row_map if _is_header(row_map) else None
+
+
+def _row_to_trade(cells, h_map, skipped):
+    """The row as a trade, or None. Rows naming a ticker are added to skipped when dropped."""
+    trade = {canonical: (cells[idx] if idx < len(cells) else None) for canonical, idx in h_map.items()}
+    if trade.get("ACTION") and trade.get("TICKER") and _ACTION_CELL.match(trade["ACTION"]):
+        return trade
+    if trade.get("TICKER"):
+        skipped.append(trade)
+    return None
+
+
+def _fallback_trade(m):
+    return {
+        "ACTION": m[0].upper(),
+        "TICKER": m[1].upper(),
+        "QTY": m[2],
+        "TYPE": m[3].upper(),
+        "LIMIT_PRICE": m[4],
+        "STOP_LOSS": m[5],
+        "TAKE_PROFIT": m[6] or None,
+    }
+
+
+def iter_trades(text, dialect_out=None):
+    """
+    Streams trade rows ({canonical: raw value}) from an execution table in one pass.
+    The dialect is fixed by the first header line that names both ACTION and TICKER:
+    a pipe-delimited header means a markdown table, otherwise CSV. Markdown separator
+    rows and repeated headers are skipped; a non-table line ends a markdown table.
+    Without any header, rows matched by the regex fallback are yielded at the end.
+    dialect_out (a dict) receives {"dialect": "csv" | "markdown" | "regex" | None,
+    "skipped": [table rows with a TICKER that were dropped, e.g. a multi-word ACTION]}.
+    """
+    dialect_out = dialect_out if dialect_out is not None else {}
+    dialect_out["dialect"] = None
+    dialect_out["skipped"] = skipped = []
+    lines = iter(text.splitlines())
+    fallback = []
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        upper = line.upper()
+        # A header must name the ACTION column, so most lines are ruled out by one substring test
+        if "ACT" in upper:
+            if "|" in line:
+                h_map = map_headers(_pipe_cells(line))
+                if _is_header(h_map):
+                    dialect_out["dialect"] = "markdown"
+                    yield from _iter_markdown(lines, h_map, skipped)
+                    return
+            elif "," in line:
+                h_map = map_headers(next(csv.reader([line])))
+                if _is_header(h_map):
+                    dialect_out["dialect"] = "csv"
+                    yield from _iter_csv(lines, h_map, skipped)
+                    return
+
+        if _ACTION_WORD.search(upper):
+            fallback.extend(_FALLBACK_ROW.findall(line))
+
+    if fallback:
+        dialect_out["dialect"] = "regex"
+        for m in fallback:
+            yield _fallback_trade(m)
+
+
+def _iter_markdown(lines, h_map, skipped):
+    in_table = True
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if "|" not in line:
+            in_table = False
+            continue
+        if _SEPARATOR_ROW.match(line):
+            continue
+        cells = _pipe_cells(line)
+        if not in_table:
+            # Only a new header line restarts a table after non-table text
+            row_map = map_headers(cells)
+            if _is_header(row_map):
+                h_map, in_table = row_map, True
+            continue
+        row_map = _repeats_header(cells, h_map)
+        if row_map:
+            h_map = row_map  # A repeated or new table header
+            continue
+        trade = _row_to_trade(cells, h_map, skipped)
+        if trade:
+            yield trade
+
+
+def _iter_csv(lines, h_map, skipped):
+    for cells in csv.reader(line.strip() for line in lines if line.strip()):
+        if _repeats_header(cells, h_map):
+            continue
+        trade = _row_to_trade([c.strip() for c in cells], h_map, skipped)
+        if trade:
+            yield trade
+
+
+def parse_trades_text(text, skipped=None):
+    """
+    Returns (list of trade rows, dialect) for an execution table; dialect is None if nothing parsed.
+    Rows that name a ticker but could not be parsed are appended to skipped, if given.
+    """
+    dialect_out = {}
+    trades = list(iter_trades(text, dialect_out))
+    if skipped is not None:
+        skipped.extend(dialect_out["skipped"])
+    return trades, dialect_out["dialect"] if trades else None
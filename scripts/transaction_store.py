@@ -0,0 +1,119 @@
+import sys
+import os
+import json
+import pathlib
+from datetime import datetime, timedelta, timezone
+
+# Add root directory to path to import config
+root_dir = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.append(str(root_dir))
+import config
+
+# Configuration
+TRANSACTIONS_STORE = config.LOGS_DIR / "transactions.jsonl"   # Append-only, one fill per line
+TRANSACTIONS_LOG = config.LOGS_DIR / "transactions.json"      # Dashboard view, rebuilt from the store
+PAGE_LIMIT = 500  # Alpaca maximum for list_orders
+# Orders are filtered by submission time, so re-scan a window before the newest stored fill to
+# catch GTC orders (and bracket legs) that were submitted earlier but filled since the last run.
+OVERLAP = timedelta(days=int(os.getenv("TRANSACTION_OVERLAP_DAYS", "14")))
+
+
+def order_to_record(model_name, order):
+    """Formats a filled Alpaca order as a stored transaction."""
+    submitted = order.submitted_at or order.created_at
+    return {
+        "model": model_name,
+        "symbol": order.symbol,
+        "side": order.side,
+        "qty": float(order.qty) if order.qty else 0,
+        "price": float(order.filled_avg_price) if order.filled_avg_price else 0,
+        "timestamp": order.filled_at.isoformat() if order.filled_at else order.created_at.isoformat(),
+        "submitted_at": submitted.isoformat() if submitted is not None else None,
+        "type": order.type,
+        "id": order.id,
+    }
+
+
+def _seed_from_view():
+    """Builds initial records from an existing transactions.json so earlier fills are kept."""
+    if not TRANSACTIONS_LOG.exists():
+        return []
+    try:
+        with open(TRANSACTIONS_LOG, 'r') as f:
+            view = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return []
+    records = []
+    for model_name, txs in view.items():
+        for tx in reversed(txs):  # View is newest first; the store is append order
+            records.append({"model": model_name, **tx, "submitted_at": tx.get("timestamp")})
+    return records
+
+
+def ensure_seeded():
+    """Seeds the append-only store from transactions.json the first time it is used."""
+    if TRANSACTIONS_STORE.exists():
+        return
+    records = _seed_from_view()
+    if records:
+        append_records(records)
+        print(f"   🌱 Seeded transaction store with {len(records)} fill(s) from {TRANSACTIONS_LOG.name}")
+
+
+def stored_ids():
+    """Ids of every fill already in the append-only store (the committed source of truth)."""
+    if not TRANSACTIONS_STORE.exists():
+        return set()
+    with open(TRANSACTIONS_STORE, 'r') as f:
+        return {json.loads(line).get("id") for line in f if line.strip()}
+
+
+def append_records(records):
+    if not records:
+        return
+    TRANSACTIONS_STORE.parent.mkdir(parents=True, exist_ok=True)
+    with open(TRANSACTIONS_STORE, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def model_cursors(newest_stamps):
+    """Maps {model: newest stored submission timestamp} to the datetime to page from (minus OVERLAP)."""
+    return {model: datetime.fromisoformat(stamp) - OVERLAP for model, stamp in newest_stamps.items() if stamp}
+
+
+def fetch_closed_orders(api, after=None):
+    """
+    Pages through closed orders submitted after the cursor (oldest first), bounded by
+    'until' = now so pages stay stable while new orders arrive.
+    Without a cursor, pages from the experiment start.
+    """
+    if after is None:
+        after = datetime.strptime(config.EXPERIMENT_START_DATE, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    until = datetime.now(timezone.utc).isoformat()
+
+    orders = []
+    seen = set()
+    cursor = after.isoformat()
+    while True:
+        page = api.list_orders(status='closed', limit=PAGE_LIMIT, after=cursor, until=until, direction='asc')
+        fresh = [o for o in page if o.id not in seen]
+        orders.extend(fresh)
+        seen.update(o.id for o in fresh)
+        if len(page) < PAGE_LIMIT or not fresh:
+            break
+        # 'after' is exclusive; step back slightly so orders sharing the boundary timestamp are not lost
+        last = page[-1].submitted_at or page[-1].created_at
+        cursor = (last - timedelta(microseconds=1)).isoformat()
+    return orders
+
+
+def ingest(model_name, orders, known_ids):
+    """Appends filled orders whose id is not in known_ids to the store. Returns the records that were added."""
+    new_records = []
+    for order in orders:
+        if order.status == 'filled' and order.id not in known_ids:
+            new_records.append(order_to_record(model_name, order))
+            known_ids.add(order.id)
+    append_records(new_records)
+    return new_records